@@ -0,0 +1,287 @@
+"""
+Offline benchmarks for the three scrapers.
+
+The laptop listings of the static, paginated and AJAX test sites are served
+from saved HTML fixtures by a local stand-in server, and every stage of each
+scraper is timed on its own:
+
+- fetch: downloading the listing pages over HTTP
+- revalidate: fetching them again through the HTTP cache, which the server
+  answers with 304 Not Modified
+- parse[<backend>]: building the product container with each parse backend
+- extract_products: the card extractor on the parsed pages
+- the site's own extract function (extract, extract_data_from_pages or
+  extract_data_via_xhr): fetch and parse as the scraper runs them
+- join and load_to_csv
+
+Each stage is run --repeat times and the fastest run is reported, together
+with pages/sec and rows/sec. Results are checked against the minimum rates
+in thresholds.json and the exit status is 1 if any stage regressed.
+
+Usage:
+    python benchmarks/bench.py
+    python benchmarks/bench.py --sites website2 --repeat 10 --json results.json
+    python benchmarks/bench.py --update-thresholds
+    python benchmarks/bench.py --parse-workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from webscrape.ajax import xhr_headers
+from webscrape.cache import ResponseCache
+from webscrape.pagination import page_url
+from webscrape.parse import parse_listing, parsers
+from webscrape.session import create_session, fetch
+from webscrape.sites import create_site
+
+from fixtures import build_fixtures, fixtures_dir
+from server import FixtureServer
+
+thresholds_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thresholds.json')
+threshold_margin = 0.25  # --update-thresholds allows a quarter of the measured rate, to absorb noise
+
+# How each scraper is driven: its fixture set and its end-to-end extract function.
+sites = {
+    'website1': {'fixture': 'static', 'extract': 'extract'},
+    'website2': {'fixture': 'paginated', 'extract': 'extract_data_from_pages'},
+    'website3': {'fixture': 'ajax', 'extract': 'extract_data_via_xhr'},
+}
+
+
+def load_site(name, url, workdir, parse_workers=0):
+    """
+    Build a scraper's site adapter pointed at the stand-in server.
+
+    The log and output files go to workdir, and the HTTP cache and the rate
+    limit are switched off so every run really fetches, at full speed.
+
+    Args:
+        name (str): 'website1', 'website2' or 'website3'.
+        url (str): The listing URL on the stand-in server.
+        workdir (str): A directory for the log and output files.
+        parse_workers (int): Processes parsing pages in the site's extract
+            function; 0 parses in the benchmark process.
+
+    Returns:
+        Site: The adapter.
+    """
+    return create_site(name, os.path.join(workdir, name), url=url, use_cache=False, rate=None,
+                       parse_workers=parse_workers)
+
+
+def page_requests(fixture, url, pages):
+    """
+    Return the (url, headers) pairs a scraper requests for a fixture set.
+    """
+    if fixture == 'static':
+        return [(url, None)]
+    if fixture == 'paginated':
+        return [(page_url(url, page), None) for page in range(1, pages + 1)]
+    return [(url, None)] + [(page_url(url, page), xhr_headers) for page in range(1, pages + 1)]
+
+
+def best_of(function, repeat):
+    """
+    Run a function several times and keep the fastest run.
+
+    Returns:
+        tuple: (seconds, result of the last run)
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def stage_result(site, stage, seconds, pages, rows, size=0):
+    return {
+        'site': site,
+        'stage': stage,
+        'seconds': seconds,
+        'pages': pages,
+        'rows': rows,
+        'bytes': size,
+        'pages_per_sec': pages / seconds if seconds else float('inf'),
+        'rows_per_sec': rows / seconds if seconds else float('inf'),
+    }
+
+
+def bench_site(name, server, workdir, repeat, parse_workers=0):
+    """
+    Time every stage of one scraper against the stand-in server.
+
+    Args:
+        name (str): 'website1', 'website2' or 'website3'.
+        server (FixtureServer): The running stand-in server.
+        workdir (str): A directory for the log and output files.
+        repeat (int): How often each stage is run.
+        parse_workers (int): Processes parsing pages in the site's extract function.
+
+    Returns:
+        list: One result dictionary per stage.
+    """
+    spec = sites[name]
+    fixture = spec['fixture']
+    url = server.url(fixture)
+    site = load_site(name, url, workdir, parse_workers)
+    site.logger.start()
+    try:
+        pages = len([f for f in os.listdir(os.path.join(fixtures_dir, fixture)) if f.startswith('page_')]) or 1
+        requests = page_requests(fixture, url, pages)
+        session = create_session()
+
+        def fetch_all():
+            return [fetch(page, session=session, headers=headers).text for page, headers in requests]
+
+        seconds, texts = best_of(fetch_all, repeat)
+        size = sum(len(text.encode('utf-8')) for text in texts)
+
+        cache = ResponseCache(os.path.join(workdir, name, 'cache'))
+
+        def revalidate_all():
+            return [fetch(page, session=session, cache=cache, headers=headers) for page, headers in requests]
+
+        revalidate_all()  # fills the cache; the timed runs only revalidate
+        revalidate_seconds, responses = best_of(revalidate_all, repeat)
+        not_modified = sum(response.from_cache for response in responses)
+        if not_modified != len(requests):
+            raise RuntimeError(f'{name}: only {not_modified} of {len(requests)} cached pages were answered '
+                               f'304 Not Modified')
+
+        if fixture == 'ajax':
+            # XHR replies are card fragments; the replay parses them whole.
+            texts = texts[1:]
+            seconds_by_backend = {}
+            seconds_by_backend['fragment'], boxes = best_of(
+                lambda: [BeautifulSoup(text, 'lxml') for text in texts], repeat)
+        else:
+            seconds_by_backend = {}
+            for backend in parsers:
+                seconds_by_backend[backend], parsed = best_of(
+                    lambda: [parse_listing(text, backend) for text in texts], repeat)
+                if backend == site.parse_backend:
+                    boxes = parsed
+
+        extract_seconds, products = best_of(lambda: site.extract_products(boxes), repeat)
+        rows = len(products)
+
+        results = [stage_result(name, 'fetch', seconds, len(requests), rows, size),
+                   stage_result(name, 'revalidate', revalidate_seconds, len(requests), rows)]
+        for backend, backend_seconds in seconds_by_backend.items():
+            results.append(stage_result(name, f'parse[{backend}]', backend_seconds, len(texts), rows))
+        results.append(stage_result(name, 'extract_products', extract_seconds, len(texts), rows))
+
+        site_extract = getattr(site, spec['extract'])
+        site_seconds, _ = best_of(lambda: site_extract(url), repeat)
+        results.append(stage_result(name, spec['extract'], site_seconds, len(requests), rows))
+
+        join_seconds, df = best_of(lambda: site.join(products), repeat)
+        results.append(stage_result(name, 'join', join_seconds, len(texts), rows))
+
+        load_seconds, _ = best_of(lambda: site.load_to_csv(df, site.filename), repeat)
+        results.append(stage_result(name, 'load_to_csv', load_seconds, len(texts), rows))
+        return results
+    finally:
+        site.close_parse_pool()
+        site.logger.close()
+
+
+def check_thresholds(results, thresholds):
+    """
+    Compare stage rates with the minimum rates of the thresholds file.
+
+    Args:
+        results (list): Stage results from bench_site().
+        thresholds (dict): ``{site: {stage: {"min_rows_per_sec": ...,
+            "min_pages_per_sec": ...}}}``.
+
+    Returns:
+        list: A message for every stage below its threshold.
+    """
+    failures = []
+    for result in results:
+        limits = thresholds.get(result['site'], {}).get(result['stage'], {})
+        for metric in ('rows_per_sec', 'pages_per_sec'):
+            minimum = limits.get(f'min_{metric}')
+            if minimum is not None and result[metric] < minimum:
+                failures.append(f'{result["site"]} {result["stage"]}: {result[metric]:,.1f} '
+                                f'{metric.replace("_per_sec", "/sec")} is below the threshold of {minimum:,.1f}')
+    return failures
+
+
+def thresholds_from(results, margin=threshold_margin):
+    """
+    Build a thresholds dictionary that allows a fraction of the measured rates.
+    """
+    thresholds = {}
+    for result in results:
+        thresholds.setdefault(result['site'], {})[result['stage']] = {
+            'min_pages_per_sec': round(result['pages_per_sec'] * margin, 1),
+            'min_rows_per_sec': round(result['rows_per_sec'] * margin, 1),
+        }
+    return thresholds
+
+
+def print_results(results):
+    print(f'{"site":<10} {"stage":<26} {"seconds":>10} {"pages/sec":>12} {"rows/sec":>12} {"bytes":>10}')
+    for result in results:
+        print(f'{result["site"]:<10} {result["stage"]:<26} {result["seconds"]:>10.4f} '
+              f'{result["pages_per_sec"]:>12,.1f} {result["rows_per_sec"]:>12,.1f} {result["bytes"]:>10,}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the scrapers offline against saved fixtures.')
+    parser.add_argument('--sites', nargs='+', choices=sorted(sites), default=sorted(sites))
+    parser.add_argument('--repeat', type=int, default=5, help='runs per stage; the fastest is kept')
+    parser.add_argument('--thresholds', default=thresholds_file, help='minimum rates per stage')
+    parser.add_argument('--update-thresholds', action='store_true',
+                        help=f'write {threshold_margin:.0%} of the measured rates to the thresholds file')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='processes parsing pages in the site extract stage (default: 0, in-process)')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(fixtures_dir):
+        build_fixtures()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, FixtureServer() as server:
+        for name in args.sites:
+            try:
+                results.extend(bench_site(name, server, workdir, args.repeat, args.parse_workers))
+            except ImportError as e:
+                print(f'Skipping {name}: {e}')
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.update_thresholds:
+        with open(args.thresholds, 'w') as f:
+            json.dump(thresholds_from(results), f, indent=2)
+            f.write('\n')
+        print(f'Thresholds written to {args.thresholds}')
+        return 0
+
+    if not os.path.exists(args.thresholds):
+        return 0
+    with open(args.thresholds) as f:
+        failures = check_thresholds(results, json.load(f))
+    for failure in failures:
+        print(f'REGRESSION: {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
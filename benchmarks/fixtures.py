@@ -0,0 +1,182 @@
+"""
+HTML fixtures for the offline benchmarks.
+
+The fixtures are rendered from the CSV files the scrapers saved from the live
+test sites, using the same markup as webscraper.io: a listing page with a
+sidebar, a 'col-lg-9' product container and one 'product-wrapper' card per
+product. Three sets are written:
+
+- static/: the allinone laptops page, every product on one page (website1)
+- paginated/: the static laptops listing, six products per '?page=N' (website2)
+- ajax/: the AJAX laptops page and the card fragments its XHR calls return (website3)
+
+Run ``python benchmarks/fixtures.py`` to rebuild them.
+"""
+import csv
+import html
+import os
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+sources = {
+    'static': os.path.join(root_dir, 'website1', 'data', 'data_2024-10-28 16:52:43.csv'),
+    'paginated': os.path.join(root_dir, 'website2', 'data', 'data_2024-10-30 16:36:19.csv'),
+    'ajax': os.path.join(root_dir, 'website3', 'data', 'data_2024-11-03 18:41:37.csv'),
+}
+page_size = 6  # products per page on the paginated and AJAX sites
+first_product_id = 545
+
+
+def read_rows(path):
+    """
+    Read product rows from a saved scraper CSV.
+
+    Args:
+        path (str): The CSV file.
+
+    Returns:
+        list: One dictionary per product, keyed by column name.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def render_card(row, product_id, site):
+    """
+    Render one product card as the test sites do.
+
+    Args:
+        row (dict): The product, keyed by column name.
+        product_id (int): The id used in the product link.
+        site (str): The test site name used in the product link.
+
+    Returns:
+        str: The card HTML.
+    """
+    rating = int(row['Rating']) if row['Rating'].isdigit() else 0
+    stars = '<span class="ws-icon ws-icon-star"></span>' * rating
+    description = html.escape(row['Product Description'])
+    return (
+        '<div class="col-md-4 col-xl-4 col-lg-4"><div class="card thumbnail">'
+        '<div class="product-wrapper card-body">'
+        '<img class="img-fluid card-img-top image img-responsive" alt="item" '
+        'src="/images/test-sites/e-commerce/items/cart2.png">'
+        '<div class="caption">'
+        f'<h4 class="price float-end card-title pull-right">{html.escape(row["Product Price"])}</h4>'
+        f'<h4><a href="/test-sites/e-commerce/{site}/product/{product_id}" class="title" '
+        f'title="{description}">{html.escape(row["Product Name"])}</a></h4>'
+        f'<p class="description card-text">{description}</p></div>'
+        f'<div class="ratings"><p class="review-count float-end">{row["Reviews"]} reviews</p>'
+        f'<p data-rating="{rating}">{stars}</p></div>'
+        '</div></div></div>\n'
+    )
+
+
+def render_cards(rows, site, offset=0):
+    return ''.join(render_card(row, first_product_id + offset + i, site) for i, row in enumerate(rows))
+
+
+def render_page(site, cards, pagination=''):
+    """
+    Render a full listing page around a block of cards.
+
+    Args:
+        site (str): The test site name used in the links.
+        cards (str): The card HTML.
+        pagination (str): Pagination markup placed after the cards.
+
+    Returns:
+        str: The page HTML.
+    """
+    base = f'/test-sites/e-commerce/{site}'
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Web Scraper Test Sites</title>
+<link rel="stylesheet" href="/css/app.css"></head>
+<body><header class="navbar fixed-top navbar-expand-lg navbar-dark"><div class="container">
+<a href="/" class="navbar-brand">Web Scraper</a></div></header>
+<div class="wrapper"><div class="container test-site"><div class="row">
+<div class="col-lg-3 sidebar"><ul class="nav flex-column" id="side-menu">
+<li class="nav-item"><a href="{base}" class="nav-link">Home</a></li>
+<li class="nav-item"><a href="{base}/computers" class="category-link nav-link">Computers</a>
+<ul class="nav nav-second-level">
+<li class="nav-item"><a href="{base}/computers/laptops" class="subcategory-link nav-link active">Laptops</a></li>
+<li class="nav-item"><a href="{base}/computers/tablets" class="subcategory-link nav-link">Tablets</a></li>
+</ul></li>
+<li class="nav-item"><a href="{base}/phones" class="category-link nav-link">Phones</a></li>
+</ul></div>
+<div class="col-lg-9"><h1 class="page-header">Computers / Laptops</h1>
+<div class="row ecomerce-items ecomerce-items-ajax">
+{cards}</div>
+{pagination}</div>
+</div></div></div>
+<footer class="page-footer"><div class="container">{'<p>Web Scraper test sites</p>' * 50}</div></footer>
+</body></html>
+"""
+
+
+def link_pagination(site, page, pages):
+    base = f'/test-sites/e-commerce/{site}/computers/laptops'
+    items = ''.join(
+        f'<li class="page-item{" active" if number == page else ""}">'
+        f'<a class="page-link" href="{base}?page={number}">{number}</a></li>'
+        for number in range(1, pages + 1)
+    )
+    return f'<ul class="pagination">{items}</ul>'
+
+
+def button_pagination(pages):
+    buttons = ''.join(
+        f'<button class="btn btn-default page-link{" active" if number == 1 else ""}" data-id="{number}">{number}</button>'
+        for number in range(1, pages + 1)
+    )
+    return f'<div class="pagination">{buttons}</div>'
+
+
+def chunks(rows):
+    return [rows[i:i + page_size] for i in range(0, len(rows), page_size)]
+
+
+def build_fixtures(directory=fixtures_dir):
+    """
+    Render every fixture set into a directory.
+
+    Args:
+        directory (str): Where to write the 'static', 'paginated' and 'ajax' folders.
+
+    Returns:
+        dict: The number of pages and products of each set.
+    """
+    summary = {}
+
+    rows = read_rows(sources['static'])
+    os.makedirs(os.path.join(directory, 'static'), exist_ok=True)
+    with open(os.path.join(directory, 'static', 'laptops.html'), 'w', encoding='utf-8') as f:
+        f.write(render_page('allinone', render_cards(rows, 'allinone')))
+    summary['static'] = {'pages': 1, 'rows': len(rows)}
+
+    rows = read_rows(sources['paginated'])
+    pages = chunks(rows)
+    os.makedirs(os.path.join(directory, 'paginated'), exist_ok=True)
+    for number, page_rows in enumerate(pages, start=1):
+        cards = render_cards(page_rows, 'static', (number - 1) * page_size)
+        with open(os.path.join(directory, 'paginated', f'page_{number}.html'), 'w', encoding='utf-8') as f:
+            f.write(render_page('static', cards, link_pagination('static', number, len(pages))))
+    summary['paginated'] = {'pages': len(pages), 'rows': len(rows)}
+
+    rows = read_rows(sources['ajax'])
+    pages = chunks(rows)
+    os.makedirs(os.path.join(directory, 'ajax'), exist_ok=True)
+    with open(os.path.join(directory, 'ajax', 'laptops.html'), 'w', encoding='utf-8') as f:
+        f.write(render_page('ajax', render_cards(pages[0], 'ajax'), button_pagination(len(pages))))
+    for number, page_rows in enumerate(pages, start=1):
+        with open(os.path.join(directory, 'ajax', f'page_{number}.html'), 'w', encoding='utf-8') as f:
+            f.write(render_cards(page_rows, 'ajax', (number - 1) * page_size))
+    summary['ajax'] = {'pages': len(pages), 'rows': len(rows)}
+
+    return summary
+
+
+if __name__ == '__main__':
+    for name, counts in build_fixtures().items():
+        print(f'{name}: {counts["pages"]} pages, {counts["rows"]} products')
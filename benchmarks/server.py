@@ -0,0 +1,150 @@
+"""
+A local stand-in for webscraper.io that serves the benchmark fixtures.
+
+FixtureServer answers the laptop listing URLs of the three test sites from
+the files written by fixtures.py:
+
+- /test-sites/e-commerce/allinone/computers/laptops: static/laptops.html
+- /test-sites/e-commerce/static/computers/laptops?page=N: paginated/page_N.html
+- /test-sites/e-commerce/ajax/computers/laptops: ajax/laptops.html, or the
+  card fragment ajax/page_N.html when requested with X-Requested-With
+
+Pages past the last fixture are served as a listing without products, which
+is how the scrapers detect the end of a category.
+
+The XHR reply of the live AJAX site has not been recorded, so the card
+fragment stands in for it; it is one of the two reply formats the replay in
+webscrape/ajax.py accepts, the other being a JSON product list.
+
+Every reply carries an ETag, the hash of its body, and a Last-Modified date,
+the modification time of its fixture file, and a conditional request whose
+validators still match is answered 304 Not Modified, as webscraper.io does.
+This is what the HTTP cache in webscrape/cache.py revalidates against.
+"""
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from fixtures import fixtures_dir, render_page
+
+site_paths = {
+    'static': '/test-sites/e-commerce/allinone/computers/laptops',
+    'paginated': '/test-sites/e-commerce/static/computers/laptops',
+    'ajax': '/test-sites/e-commerce/ajax/computers/laptops',
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this, keep-alive
+    # requests stall on Nagle's algorithm and delayed ACKs.
+    disable_nagle_algorithm = True
+    directory = fixtures_dir
+    started = time.time()  # Last-Modified of the pages rendered past the last fixture
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        page = parse_qs(parts.query).get('page', ['1'])[0]
+        xhr = self.headers.get('X-Requested-With') == 'XMLHttpRequest'
+        if parts.path == site_paths['static']:
+            body, modified = self._read('static', 'laptops.html')
+        elif parts.path == site_paths['paginated']:
+            body, modified = self._read('paginated', f'page_{page}.html', render_page('static', ''))
+        elif parts.path == site_paths['ajax'] and xhr:
+            body, modified = self._read('ajax', f'page_{page}.html', '')
+        elif parts.path == site_paths['ajax']:
+            body, modified = self._read('ajax', 'laptops.html')
+        else:
+            self.send_error(404)
+            return
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        if self._not_modified(etag, modified):
+            self.send_response(304)
+            self._send_validators(etag, modified)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self._send_validators(etag, modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_modified(self, etag, modified):
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110, 13.2.2).
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in (tag.strip() for tag in if_none_match.split(',')) or if_none_match.strip() == '*'
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is None:
+            return False
+        try:
+            return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def _send_validators(self, etag, modified):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(modified, usegmt=True))
+        self.send_header('Vary', 'X-Requested-With')
+
+    def _read(self, folder, name, missing=None):
+        # Returns the body and the time it last changed, for Last-Modified.
+        path = os.path.join(self.directory, folder, name)
+        if not os.path.exists(path) and missing is not None:
+            return missing.encode('utf-8'), self.started
+        with open(path, 'rb') as f:
+            return f.read(), os.path.getmtime(path)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """
+    Serve the fixtures on a free local port from a background thread.
+
+    Use it as a context manager; base_url is set while the server runs.
+
+    Args:
+        directory (str, optional): The fixtures directory. Defaults to benchmarks/fixtures.
+    """
+
+    def __init__(self, directory=fixtures_dir):
+        handler = type('Handler', (FixtureHandler,), {'directory': directory, 'started': time.time()})
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+        self.base_url = f'http://127.0.0.1:{self._server.server_port}'
+
+    def url(self, fixture):
+        """
+        Return the listing URL of a fixture set on this server.
+
+        Args:
+            fixture (str): 'static', 'paginated' or 'ajax'.
+
+        Returns:
+            str: The absolute URL.
+        """
+        return self.base_url + site_paths[fixture]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
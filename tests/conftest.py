@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+benchmarks_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+sys.path.insert(0, benchmarks_dir)
+
+from fixtures import build_fixtures, fixtures_dir  # noqa: E402
+from server import FixtureServer  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def fixture_server():
+    """
+    The benchmark fixture server, standing in for webscraper.io on a local port.
+    """
+    if not os.path.isdir(os.path.join(fixtures_dir, 'paginated')):
+        build_fixtures()
+    with FixtureServer() as server:
+        yield server
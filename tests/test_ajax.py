@@ -0,0 +1,87 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from webscrape import browser
+from webscrape.pagination import page_url
+from webscrape.session import create_session
+from webscrape.sites import create_site
+
+
+class StubDriver:
+    """
+    Stands in for headless Chrome: each page's source is the fixture server's XHR fragment for it.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.url = None
+        self.page = None
+
+    def get(self, url):
+        self.url = url
+        self.page = 1
+
+    @property
+    def page_source(self):
+        response = self.session.get(page_url(self.url, self.page), headers={'X-Requested-With': 'XMLHttpRequest'})
+        return f'<html><body><div class="col-lg-9">{response.text}</div></body></html>'
+
+
+class StubPool:
+    size = 1
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.checked_out = False
+
+    @contextmanager
+    def driver(self):
+        self.checked_out = True
+        try:
+            yield self._driver
+        finally:
+            self.checked_out = False
+
+
+@pytest.fixture
+def site(fixture_server, tmp_path, monkeypatch):
+    site = create_site('website3', str(tmp_path), url=fixture_server.url('ajax'), replay_xhr=False, max_pages=25,
+                       use_cache=False)
+    driver = StubDriver(create_session())
+    site._driver_pool = StubPool(driver)
+    # The fixture pages end at page 20, past which no button is found.
+    monkeypatch.setattr(site, 'find_page_button', lambda driver, page: page if page <= 20 else None)
+    monkeypatch.setattr(browser, 'wait_for_cards', lambda driver, timeout=None: None)
+    yield site
+    site.logger.close()
+
+
+def test_walked_pages_are_streamed_and_their_trees_released(site, monkeypatch):
+    trees = []
+    parse = site.parse
+    monkeypatch.setattr(site, 'parse', lambda html: trees.append(parse(html)) or trees[-1])
+    first_page_taken = threading.Event()
+    clicks = []
+
+    def click_and_wait(driver, button, timeout=None):
+        # The walk may only leave page 1 once its products have reached the caller.
+        clicks.append(first_page_taken.wait(5))
+        driver.page = button
+
+    monkeypatch.setattr(browser, 'click_and_wait', click_and_wait)
+
+    pages = site.iter_data_from_pages(site.url, max_pages=25, workers=1)
+    first = next(pages)
+    assert len(trees) == 1 and trees[0].decomposed
+    first_page_taken.set()
+    rest = list(pages)
+
+    assert all(clicks)
+    assert len(first) == 6 and sum(len(page) for page in rest) == 114
+    assert [page[0].product_id for page in [first] + rest] == sorted((page[0].product_id for page in [first] + rest),
+                                                                    key=int)
+    # Every page's tree was released once its products were extracted, and the driver went back to the pool.
+    assert len(trees) == 20 and all(tree.decomposed for tree in trees)
+    assert not site.driver_pool.checked_out
@@ -0,0 +1,37 @@
+import os
+
+from webscrape.cache import ResponseCache
+from webscrape.pagination import page_url
+from webscrape.session import create_session
+
+
+def test_revalidates_with_a_conditional_get(fixture_server, tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    session = create_session()
+    url = fixture_server.url('static')
+
+    first = cache.get(url, session)
+    assert first.status_code == 200 and first.from_cache is False
+    second = cache.get(url, session)
+    assert second.status_code == 200 and second.from_cache is True
+    assert second.text == first.text
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'bytes': len(first.content)}
+
+
+def test_evicts_the_least_recently_used_entry(fixture_server, tmp_path):
+    session = create_session()
+    urls = [page_url(fixture_server.url('paginated'), page) for page in (1, 2, 3)]
+    sizes = [len(session.get(url).content) for url in urls]
+    # Room for all but one of the three pages.
+    cache = ResponseCache(str(tmp_path), max_bytes=sum(sizes) - 1)
+
+    cache.get(urls[0], session)
+    cache.get(urls[1], session)
+    assert cache.get(urls[0], session).from_cache  # page 1 is now more recently used than page 2
+    cache.get(urls[2], session)
+
+    assert cache.lookup(urls[1]) is None
+    assert cache.lookup(urls[0]) is not None and cache.lookup(urls[2]) is not None
+    assert cache.stats()['bytes'] == sizes[0] + sizes[2]
+    assert len(os.listdir(tmp_path)) == 4
@@ -0,0 +1,63 @@
+import json
+
+from webscrape.checkpoint import PageCheckpoint
+from webscrape.records import ProductRecord
+
+url = 'https://webscraper.io/test-sites/e-commerce/static/computers/laptops'
+
+
+def products(page):
+    return [ProductRecord(name=f'Laptop {page}', price='$295.99', url=f'{url}/product/{page}')]
+
+
+def write_checkpoint(path, pages):
+    checkpoint = PageCheckpoint(str(path))
+    checkpoint.start(url, '2024-11-02 10:15:00')
+    for page in pages:
+        checkpoint.add_page(page, products(page))
+    checkpoint.close()
+
+
+def test_load_reads_the_recorded_pages(tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    write_checkpoint(path, [1, 2, 4])
+    checkpoint = PageCheckpoint(str(path))
+    assert checkpoint.load(url)
+    assert checkpoint.run_ts == '2024-11-02 10:15:00'
+    assert checkpoint.pages == {page: products(page) for page in (1, 2, 4)}
+    assert checkpoint.next_page() == 3
+    assert checkpoint.last_page is None
+    checkpoint.close()
+
+
+def test_load_ignores_a_torn_last_line(tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    write_checkpoint(path, [1, 2])
+    with open(path, 'a') as f:
+        f.write('{"page": 3, "records": [{"Product Na')
+    checkpoint = PageCheckpoint(str(path))
+    assert checkpoint.load(url)
+    assert sorted(checkpoint.pages) == [1, 2]
+    # The next page is written after the last complete line, not after the torn one.
+    checkpoint.add_page(3, products(3))
+    checkpoint.set_last_page(3)
+    checkpoint.close()
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line.get('page') for line in lines[1:]] == [1, 2, 3, None]
+
+    checkpoint = PageCheckpoint(str(path))
+    assert checkpoint.load(url)
+    assert sorted(checkpoint.pages) == [1, 2, 3]
+    assert checkpoint.last_page == 3
+    checkpoint.clear()
+    assert not path.exists()
+
+
+def test_load_rejects_another_listing(tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    write_checkpoint(path, [1])
+    assert not PageCheckpoint(str(path)).load(f'{url}?sort=price')
+    assert not PageCheckpoint(str(tmp_path / 'missing.jsonl')).load(url)
+    path.write_text('{"url": ')
+    assert not PageCheckpoint(str(path)).load(url)
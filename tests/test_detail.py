@@ -0,0 +1,30 @@
+from webscrape.detail import DetailEnricher
+from webscrape.extract import extract_products
+from webscrape.logger import WARNING
+from webscrape.parse import parse_listing
+from webscrape.session import create_session
+
+
+def test_each_product_page_is_fetched_once(fixture_server):
+    session = create_session()
+    requested = []
+    session.hooks['response'].append(lambda response, *args, **kwargs: requested.append(response.url))
+    html = session.get(fixture_server.url('static')).text
+    requested.clear()
+    # The same products seen on two listings are separate records with the same keys.
+    first = extract_products([parse_listing(html)], fixture_server.base_url)
+    second = extract_products([parse_listing(html)], fixture_server.base_url)
+    messages = []
+
+    enricher = DetailEnricher(max_workers=4, session=session, log=lambda message, level=None: messages.append(level))
+    try:
+        enricher.enrich(first[:10])
+        enricher.enrich(second[:20] + first[:5])
+    finally:
+        enricher.close()
+
+    assert sorted(requested) == sorted(product.url for product in first[:20])
+    assert enricher.stats() == {'fetched': 20, 'reused': 15, 'failed': 35}
+    # The fixture server has no product pages, so every merge fails and the listing values are kept.
+    assert messages == [WARNING] * 20
+    assert all(product.full_name == '' and product.name for product in first + second)
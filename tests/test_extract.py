@@ -0,0 +1,25 @@
+from bs4 import BeautifulSoup
+
+from webscrape.extract import extract_products
+from webscrape.logger import DEBUG
+from webscrape.records import ProductRecord
+
+card = ('<div class="col-lg-9"><div class="product-wrapper card-body"><div class="caption">'
+        '<h4 class="price">$295.99</h4><h4><a href="/test-sites/e-commerce/allinone/product/545" class="title">'
+        'Asus VivoBook</a></h4><p class="description">Asus VivoBook X441NA</p></div>'
+        '<div class="ratings"><p class="review-count">14 reviews</p><p data-rating="3"></p></div></div></div>')
+
+
+def test_debug_lines_are_only_formatted_when_enabled(monkeypatch):
+    formatted = []
+    monkeypatch.setattr(ProductRecord, '__repr__', lambda self: formatted.append(self.name) or self.name)
+    messages = []
+    log = lambda message, level=None: messages.append((message, level))
+    box = BeautifulSoup(card, 'lxml')
+
+    products = extract_products([box], 'https://webscraper.io', log)
+    assert (products[0].product_id, products[0].rating, products[0].reviews) == ('545', '3', '14')
+    assert messages == [] and formatted == []
+
+    extract_products([box], 'https://webscraper.io', log, log_debug=True)
+    assert messages == [('Product: Asus VivoBook', DEBUG)]
@@ -0,0 +1,55 @@
+from webscrape.frontier import BloomFilter, URLFrontier
+
+root = 'https://webscraper.io/test-sites/e-commerce/allinone'
+
+
+def test_bloom_filter_round_trip(tmp_path):
+    bloom = BloomFilter(capacity=100)
+    assert bloom.add('a')
+    assert not bloom.add('a')
+    assert 'a' in bloom and 'b' not in bloom
+    bloom.count = 1
+    bloom.save(str(tmp_path / 'urls.bloom'))
+    loaded = BloomFilter.load(str(tmp_path / 'urls.bloom'))
+    assert 'a' in loaded and loaded.count == 1
+    assert BloomFilter.load(str(tmp_path / 'missing.bloom')) is None
+
+
+def test_urls_are_queued_once():
+    frontier = URLFrontier()
+    assert frontier.add_many([(root, 'root'), (root, 'root'), (f'{root}/computers', 'category')]) == \
+        [root, f'{root}/computers']
+    assert not frontier.add(root, 'root')
+    frontier.pop(2)
+    frontier.done(root)
+    # A URL that has been fetched is still known.
+    assert not frontier.add(root, 'root')
+    assert frontier.stats()['done'] == 1
+
+
+def test_listing_pages_are_popped_before_products():
+    frontier = URLFrontier()
+    frontier.add_many([(f'{root}/product/545', 'product'), (f'{root}/computers/laptops', 'subcategory'),
+                       (f'{root}/product/546', 'product'), (f'{root}/computers', 'category')])
+    assert frontier.pop(3) == [(f'{root}/computers', 'category'), (f'{root}/computers/laptops', 'subcategory'),
+                               (f'{root}/product/545', 'product')]
+    assert frontier.pop(3) == [(f'{root}/product/546', 'product')]
+    assert frontier.pop(3) == []
+
+
+def test_reopened_frontier_requeues_unfinished_and_failed_urls(tmp_path):
+    path = str(tmp_path / 'frontier.sqlite')
+    frontier = URLFrontier(path)
+    frontier.add_many([(root, 'root'), (f'{root}/computers', 'category'), (f'{root}/phones', 'category')])
+    frontier.pop(3)
+    frontier.done(root)
+    frontier.done(f'{root}/phones', failed=True)
+    assert frontier.stats()['failed'] == 1
+    frontier.close()
+
+    frontier = URLFrontier(path)
+    assert len(frontier) == 2
+    assert sorted(url for url, kind in frontier.pop(5)) == [f'{root}/computers', f'{root}/phones']
+    assert not frontier.add(root, 'root')
+    frontier.clear()
+    assert not (tmp_path / 'frontier.sqlite').exists()
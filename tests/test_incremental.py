@@ -0,0 +1,39 @@
+from webscrape.extract import extract_products
+from webscrape.incremental import ADDED, CHANGED, REMOVED, IncrementalState
+from webscrape.pagination import page_url
+from webscrape.parse import parse_listing
+from webscrape.session import create_session
+
+
+def products(html):
+    return extract_products([parse_listing(html)], 'https://webscraper.io')
+
+
+def test_unchanged_pages_are_carried_over_and_only_deltas_reported(fixture_server, tmp_path):
+    session = create_session()
+    first, second, third = (session.get(page_url(fixture_server.url('paginated'), page)).text for page in (1, 2, 3))
+    path = str(tmp_path / 'incremental_state.json')
+
+    state = IncrementalState(path)
+    assert not state.page_unchanged('page1', first)
+    state.update_page('page1', first, products(first))
+    state.update_page('page2', second, products(second))
+    assert state.delta() == [(ADDED, product) for product in products(first) + products(second)]
+    state.save()
+
+    # Next run: page 1 is identical, page 2 has a new price and page 3's products replace page 2's last.
+    repriced = second.replace('$364.46', '$359.99')
+    state = IncrementalState(path)
+    assert state.page_unchanged('page1', first)
+    assert [p.product_id for p in state.page_products('page1')] == [p.product_id for p in products(first)]
+    assert not state.page_unchanged('page2', repriced)
+    page2 = products(repriced)
+    state.update_page('page2', repriced, page2[:-1] + products(third)[:1])
+
+    changes = state.delta()
+    assert [(change, product.price) for change, product in changes if change == CHANGED] == [(CHANGED, '$359.99')]
+    assert [(change, product.product_id) for change, product in changes if change != CHANGED] == [
+        (ADDED, products(third)[0].product_id),
+        (REMOVED, page2[-1].product_id),
+    ]
+    assert len(state.snapshot()) == 12
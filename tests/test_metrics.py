@@ -0,0 +1,36 @@
+from webscrape.metrics import RunMetrics
+from webscrape.session import create_session, pool_stats
+
+
+def test_unwatch_removes_only_its_own_hook():
+    session = create_session()
+    first = RunMetrics('website1')
+    second = RunMetrics('website2')
+    first.watch(session)
+    first.watch(session)
+    second.watch(session)
+    assert len(session.hooks['response']) == 2
+    first.unwatch(session)
+    assert session.hooks['response'] == [second._count_response]
+    second.unwatch(session)
+    assert session.hooks['response'] == []
+
+
+def test_pool_stats_since_reports_the_difference():
+    session = create_session()
+    start = {'requests': 80, 'connections': 3, 'handshakes_avoided': 77, 'reuse_ratio': 77 / 80}
+    # A fresh session has no pools, so the delta is clamped at zero rather than going negative.
+    assert pool_stats(session, since=start) == {'requests': 0, 'connections': 0, 'handshakes_avoided': 0,
+                                                'reuse_ratio': 0.0}
+
+
+def test_start_clears_the_previous_run():
+    metrics = RunMetrics('website2')
+    metrics.start()
+    metrics.add(rows=117, requests=20)
+    metrics.record('fetch', 1.5)
+    metrics.finish('success')
+    metrics.start()
+    assert metrics.counters == {'pages': 0, 'rows': 0, 'bytes': 0, 'requests': 0, 'retries': 0}
+    assert metrics.stages == {}
+    assert metrics.summary()['status'] is None
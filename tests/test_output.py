@@ -0,0 +1,60 @@
+import csv
+
+import pytest
+
+from webscrape.extract import extract_products
+from webscrape.output import StreamingCSVWriter
+from webscrape.pagination import page_url
+from webscrape.parse import parse_listing
+from webscrape.session import create_session
+
+columns = ['Product ID', 'Product Name', 'Product Price']
+
+
+@pytest.fixture(scope='module')
+def pages(fixture_server):
+    session = create_session()
+    return [extract_products([parse_listing(session.get(page_url(fixture_server.url('paginated'), page)).text)])
+            for page in (1, 2)]
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def test_rows_go_to_the_part_file_until_close(pages, tmp_path):
+    target = tmp_path / 'data.csv'
+    part = tmp_path / 'data.csv.part'
+    with StreamingCSVWriter(str(target), columns) as writer:
+        writer.write_rows(pages[0])
+        # Each page is flushed to the part file as it is written; the target does not exist yet.
+        assert not target.exists()
+        assert len(read_csv(part)) == 1 + len(pages[0])
+        writer.write_rows(pages[1])
+    assert not part.exists()
+    rows = read_csv(target)
+    assert rows[0] == columns
+    assert rows[1:] == [list(product.values(columns)) for page in pages for product in page]
+    assert writer.rows == 12
+
+
+def test_a_failed_run_keeps_the_part_file_and_the_previous_target(pages, tmp_path):
+    target = tmp_path / 'data.csv'
+    target.write_text('previous\n')
+    with pytest.raises(RuntimeError):
+        with StreamingCSVWriter(str(target), columns) as writer:
+            writer.write_rows(pages[0])
+            raise RuntimeError('Page 2 could not be fetched')
+    assert target.read_text() == 'previous\n'
+    assert len(read_csv(tmp_path / 'data.csv.part')) == 1 + len(pages[0])
+
+
+def test_close_replaces_the_target(pages, tmp_path):
+    target = tmp_path / 'data.csv'
+    target.write_text('previous\n')
+    writer = StreamingCSVWriter(str(target), columns)
+    writer.write_rows(pages[1])
+    writer.close()
+    assert len(read_csv(target)) == 1 + len(pages[1])
+    assert list(tmp_path.iterdir()) == [target]
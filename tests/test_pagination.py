@@ -0,0 +1,82 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from fixtures import fixtures_dir
+
+from webscrape.extract import card_class, extract_products
+from webscrape.pagination import fetch_pages, iter_pages
+from webscrape.parse import parse_listing
+from webscrape.session import create_session
+
+
+def parse(response):
+    box = parse_listing(response.text)
+    if box is None or box.find('div', class_=card_class) is None:
+        return None
+    return extract_products([box])
+
+
+def serve_pages(pages, status):
+    """
+    Serve paginated fixture pages 1 to pages, and answer every later page with status.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = int(parse_qs(urlsplit(self.path).query).get('page', ['1'])[0])
+            if page > pages:
+                self.send_error(status)
+                return
+            with open(os.path.join(fixtures_dir, 'paginated', f'page_{page}.html'), 'rb') as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_stops_at_the_first_empty_page(fixture_server):
+    messages = []
+    pages = fetch_pages(fixture_server.url('paginated'), parse, max_pages=25, max_workers=8,
+                        session=create_session(), log=messages.append)
+    assert len(pages) == 20
+    assert sum(len(page) for page in pages) == 117
+    # Pages come back in page order, whatever order they finished in.
+    assert [page[0].product_id for page in pages] == sorted((page[0].product_id for page in pages), key=int)
+    assert messages[-1] == 'Stopping at page 21: no products found'
+
+
+def test_stops_at_a_404():
+    server = serve_pages(3, 404)
+    try:
+        messages = []
+        pages = fetch_pages(f'http://127.0.0.1:{server.server_port}/laptops', parse, max_pages=10,
+                            session=create_session(), log=messages.append)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert len(pages) == 3
+    assert messages[-1] == 'Stopping at page 4: status code 404'
+
+
+def test_raises_on_a_server_error_instead_of_truncating():
+    server = serve_pages(3, 500)
+    try:
+        pages = iter_pages(f'http://127.0.0.1:{server.server_port}/laptops', parse, max_pages=10,
+                           session=create_session())
+        assert len(next(pages)) == 6
+        with pytest.raises(RuntimeError, match='Page 4 .* status code 500'):
+            list(pages)
+    finally:
+        server.shutdown()
+        server.server_close()
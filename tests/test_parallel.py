@@ -0,0 +1,43 @@
+import pytest
+
+from webscrape.extract import extract_products
+from webscrape.logger import DEBUG, WARNING
+from webscrape.pagination import page_url
+from webscrape.parallel import ParsePool
+from webscrape.parse import parse_listing
+from webscrape.session import create_session
+
+
+@pytest.fixture(scope='module')
+def pages(fixture_server):
+    session = create_session()
+    return [session.get(page_url(fixture_server.url('paginated'), page)).text for page in (1, 2, 3, 21)]
+
+
+def test_workers_return_the_records_of_in_process_extraction(pages):
+    pool = ParsePool(workers=2, base_url='https://webscraper.io')
+    try:
+        results = [future.result() for future in [pool.listing(html) for html in pages]]
+    finally:
+        pool.close()
+    # Page 21 is past the end of the listing and holds no cards.
+    assert results[-1] is None
+    for html, (records, messages) in zip(pages[:-1], results[:-1]):
+        expected = extract_products([parse_listing(html)], 'https://webscraper.io')
+        assert [record.as_dict() for record in records] == [record.as_dict() for record in expected]
+        assert list(messages) == []
+
+
+def test_worker_messages_come_back_at_their_level(pages):
+    html = pages[0].replace('$295.99', '', 1)
+    pool = ParsePool(workers=1, base_url='https://webscraper.io', log_level=DEBUG)
+    warnings = ParsePool(workers=1, base_url='https://webscraper.io', log_level=WARNING)
+    try:
+        records, messages = pool.listing(html).result()
+        _, warning_messages = warnings.listing(html).result()
+    finally:
+        pool.close()
+        warnings.close()
+    assert messages[0] == ('Missing Product Price for product: Asus VivoBook...', WARNING)
+    assert messages[1:] == [(f'Product: {record}', DEBUG) for record in records]
+    assert list(warning_messages) == [messages[0]]
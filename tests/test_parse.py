@@ -0,0 +1,33 @@
+import pytest
+
+from webscrape.extract import extract_products
+from webscrape.pagination import page_url
+from webscrape.parse import parse_listing, parsers
+from webscrape.session import create_session
+
+
+@pytest.fixture(scope='module')
+def pages(fixture_server):
+    session = create_session()
+    listings = [fixture_server.url('static'), fixture_server.url('ajax')]
+    listings += [page_url(fixture_server.url('paginated'), page) for page in (1, 20)]
+    return [session.get(url).content for url in listings]
+
+
+@pytest.mark.parametrize('backend', sorted(set(parsers) - {'full'}))
+def test_restricted_parse_extracts_the_same_products_as_a_full_parse(pages, backend):
+    for html in pages:
+        expected = extract_products([parse_listing(html, 'full')], 'https://webscraper.io')
+        assert expected
+        products = extract_products([parse_listing(html, backend)], 'https://webscraper.io')
+        assert [product.as_dict() for product in products] == [product.as_dict() for product in expected]
+
+
+def test_a_page_without_a_container_parses_to_none():
+    for backend in parsers:
+        assert parse_listing('<html><body><div class="sidebar"></div></body></html>', backend) is None
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match='Unknown parse backend'):
+        parse_listing('<html></html>', 'html5lib')
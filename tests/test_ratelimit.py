@@ -0,0 +1,70 @@
+import pytest
+
+from webscrape.ratelimit import HostLimiter, RateLimiter, warmup_samples
+
+
+def settle(limiter, latency, count):
+    for _ in range(count):
+        limiter.acquire()
+        limiter.release(latency)
+
+
+def test_concurrency_grows_after_a_window_of_successes():
+    limiter = HostLimiter(None, max_concurrency=8)
+    assert limiter.concurrency == 4
+    settle(limiter, 0.1, 4)
+    assert limiter.concurrency == 5
+    settle(limiter, 0.1, 100)
+    assert limiter.concurrency == 8
+
+
+def test_errors_halve_concurrency():
+    limiter = HostLimiter(None, max_concurrency=8)
+    limiter.acquire()
+    limiter.release(failed=True)
+    assert limiter.concurrency == 2
+    limiter.acquire()
+    limiter.release(throttled=True)
+    limiter.acquire()
+    limiter.release(failed=True)
+    assert limiter.concurrency == 1
+
+
+def test_no_response_is_slow_during_warmup():
+    limiter = HostLimiter(None, max_concurrency=8)
+    settle(limiter, 0.01, 1)
+    settle(limiter, 5.0, warmup_samples - 1)
+    assert limiter.concurrency == 5
+
+
+def test_baseline_follows_the_host():
+    limiter = HostLimiter(None, max_concurrency=8)
+    # One unusually fast reply does not make the host's normal speed look slow.
+    settle(limiter, 0.001, 1)
+    settle(limiter, 1.0, 30)
+    assert limiter.baseline > 0.9
+    assert limiter.concurrency == 8
+    # A reply far slower than the baseline counts as congestion.
+    settle(limiter, 10.0, 1)
+    assert limiter.concurrency == 4
+
+
+def test_untimed_replies_leave_the_baseline_alone():
+    limiter = HostLimiter(None, max_concurrency=8)
+    settle(limiter, 0.2, 10)
+    baseline = limiter.baseline
+    settle(limiter, None, 10)
+    assert limiter.baseline == baseline
+    assert limiter.stats()['baseline'] == baseline
+
+
+def test_an_error_outside_requests_frees_the_slot():
+    limiter = RateLimiter(rate=None, max_concurrency=1, max_retries=0)
+
+    def broken_cache():
+        raise OSError('No space left on device')
+
+    for _ in range(3):
+        with pytest.raises(OSError):
+            limiter.call('http://127.0.0.1/laptops', broken_cache)
+    assert limiter.host('http://127.0.0.1/laptops').in_flight == 0
@@ -0,0 +1,23 @@
+from webscrape.session import get_session, reset_session
+from webscrape.sites import create_site
+
+
+def test_sessions_are_shared_per_pool_size():
+    reset_session()
+    try:
+        small = get_session(pool_maxsize=4)
+        assert get_session(pool_maxsize=4) is small
+        large = get_session(pool_maxsize=16)
+        assert large is not small
+        assert large.get_adapter('https://webscraper.io')._pool_maxsize == 16
+    finally:
+        reset_session()
+
+
+def test_ajax_site_session_honours_pool_size(tmp_path):
+    reset_session()
+    try:
+        site = create_site('website3', str(tmp_path), max_workers=4, pool_size=24)
+        assert site.session().get_adapter('https://webscraper.io')._pool_maxsize == 24
+    finally:
+        reset_session()
@@ -0,0 +1,45 @@
+import os
+
+from webscrape.extract import extract_products
+from webscrape.parse import parse_listing
+from webscrape.session import create_session
+from webscrape.store import SnapshotStore
+
+# The static fixtures were rendered from this run, which predates the Product ID column.
+history = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'website1', 'data', 'data_2024-10-28 16:52:43.csv')
+
+
+def test_imported_rows_take_the_id_of_the_stored_product(fixture_server, tmp_path):
+    html = create_session().get(fixture_server.url('static')).text
+    products = extract_products([parse_listing(html)], fixture_server.base_url)
+    store = SnapshotStore(str(tmp_path / 'snapshots.sqlite'))
+    try:
+        run_id = store.start_run('website1', '2026-10-17 09:00:00')
+        store.upsert(run_id, '2026-10-17 09:00:00', products)
+        store.finish_run(run_id)
+
+        assert store.import_csv(history, 'website1') == 117
+        assert store.price_history(products[0].product_id) == [('2024-10-28 16:52:43', 295.99),
+                                                               ('2026-10-17 09:00:00', 295.99)]
+        # Two Acer Aspire 3 laptops share a name and description, so neither id can be told apart; their
+        # rows fall back to one name and description key. Every other row takes its product's id.
+        assert [run[2:] for run in store.runs()] == [('2024-10-28 16:52:43', 'complete', 116),
+                                                     ('2026-10-17 09:00:00', 'complete', 117)]
+        imported = [row[0] for row in store.conn.execute(
+            "SELECT product_id FROM snapshots WHERE run_ts = '2024-10-28 16:52:43'")]
+        fallback = [product_id for product_id in imported if not product_id.isdigit()]
+        assert len(fallback) == 1 and fallback[0].startswith('Acer Aspire 3...|')
+    finally:
+        store.close()
+
+
+def test_rows_without_a_stored_product_fall_back_to_name_and_description(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots.sqlite'))
+    try:
+        store.import_csv(history, 'website1')
+        (product_id,) = store.conn.execute(
+            "SELECT product_id FROM snapshots WHERE name = 'Asus VivoBook...' AND price = 295.99").fetchone()
+    finally:
+        store.close()
+    assert product_id.startswith('Asus VivoBook...|Asus VivoBook X441NA')
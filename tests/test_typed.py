@@ -0,0 +1,32 @@
+import pandas as pd
+
+from webscrape.typed import to_typed, typed_value
+
+
+def test_to_typed_converts_the_numeric_columns():
+    df = pd.DataFrame({
+        'Product Name': ['Asus VivoBook', 'Lenovo'],
+        'Product Price': ['$1,295.99', 'N/A'],
+        'Rating': ['4', ''],
+        'Reviews': ['12', 'many'],
+    })
+    typed = to_typed(df)
+    assert list(typed.columns) == list(df.columns)
+    assert str(typed['Product Name'].dtype) == 'string'
+    assert typed['Product Price'].dtype == 'float64'
+    assert str(typed['Rating'].dtype) == 'Int8'
+    assert str(typed['Reviews'].dtype) == 'Int32'
+    assert typed['Product Price'][0] == 1295.99
+    assert pd.isna(typed['Product Price'][1])
+    assert typed['Rating'][0] == 4 and typed['Rating'][1] is pd.NA
+    assert typed['Reviews'][0] == 12 and typed['Reviews'][1] is pd.NA
+    # The input is left as text.
+    assert df['Product Price'][0] == '$1,295.99'
+
+
+def test_typed_value_matches_to_typed():
+    assert typed_value('Product Price', '$1,295.99') == 1295.99
+    assert typed_value('Rating', '4') == 4
+    assert typed_value('Reviews', 'many') is None
+    assert typed_value('Product Price', '') is None
+    assert typed_value('Product Name', 'Asus VivoBook') == 'Asus VivoBook'
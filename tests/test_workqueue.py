@@ -0,0 +1,131 @@
+import time
+
+import pytest
+
+from webscrape.distributed import Worker
+from webscrape.records import ProductRecord
+from webscrape.store import ABORTED, COMPLETE, SnapshotStore
+from webscrape.workqueue import DONE, FAILED, QUEUED, RUNNING, SQLiteWorkQueue, Task, open_queue
+
+url = 'https://webscraper.io/test-sites/e-commerce/static/computers/laptops'
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / 'queue.sqlite'))
+    yield queue
+    queue.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'store.sqlite'))
+    yield store
+    store.close()
+
+
+def queue_job(queue, tasks=1):
+    job_id = queue.create_job('website2', {})
+    queue.put([Task(job_id, 'Computers/Laptops', url, page, page) for page in range(1, tasks + 1)])
+    return job_id
+
+
+class LogOnlySite:
+    # Worker.finish_job() only logs through the job's adapter.
+    def log(self, message, level=None):
+        pass
+
+
+def test_open_queue_reads_the_scheme(tmp_path):
+    queue = open_queue(f'sqlite://{tmp_path}/queue.sqlite')
+    assert isinstance(queue, SQLiteWorkQueue)
+    queue.close()
+    with pytest.raises(ValueError):
+        open_queue('redis://localhost/0')
+
+
+def test_claim_is_exclusive(queue):
+    job_id = queue_job(queue, tasks=2)
+    # A second connection to the same file stands in for another worker process.
+    other = SQLiteWorkQueue(queue.path)
+    try:
+        first = queue.claim('worker-1', lease=60)
+        second = other.claim('worker-2', lease=60)
+        assert first.task_id != second.task_id
+        assert queue.claim('worker-1', lease=60) is None
+        assert other.claim('worker-2', lease=60) is None
+        assert queue.counts(job_id)[RUNNING] == 2
+    finally:
+        other.close()
+
+
+def test_expired_lease_is_reclaimed(queue):
+    job_id = queue_job(queue)
+    lost = queue.claim('worker-1', lease=0.01)
+    time.sleep(0.05)
+    task = queue.claim('worker-2', lease=60)
+    assert task.task_id == lost.task_id
+    assert task.worker == 'worker-2'
+    assert task.attempts == 2
+    # The first worker no longer holds the task, so its late results are refused.
+    assert not queue.extend(lost, 60)
+    assert not queue.complete(lost, 10)
+    assert queue.complete(task, 10)
+    assert queue.counts(job_id) == {QUEUED: 0, RUNNING: 0, DONE: 1, FAILED: 0}
+
+
+def test_task_is_given_up_after_max_attempts(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / 'queue.sqlite'), max_attempts=2)
+    job_id = queue_job(queue)
+    assert queue.fail(queue.claim('worker-1', lease=60), 'timed out')
+    assert queue.counts(job_id)[QUEUED] == 1
+    assert queue.fail(queue.claim('worker-1', lease=60), 'timed out')
+    assert queue.counts(job_id)[FAILED] == 1
+    assert queue.claim('worker-1', lease=60) is None
+    queue.close()
+
+
+def test_retried_task_stores_each_product_once(queue, store):
+    job_id = queue_job(queue)
+    run_ts = '2024-11-02 10:15:00'
+    run_id = store.start_run('website2', run_ts)
+    products = [ProductRecord(name=f'Laptop {n}', price='$295.99', url=f'{url}/product/{n}') for n in (1, 2, 3)]
+
+    lost = queue.claim('worker-1', lease=0.01)
+    store.upsert(run_id, run_ts, products)
+    time.sleep(0.05)
+    retry = queue.claim('worker-2', lease=60)
+    assert retry.task_id == lost.task_id
+    products[0].price = '$289.99'
+    store.upsert(run_id, run_ts, products)
+    assert queue.complete(retry, len(products))
+
+    rows = store.conn.execute('SELECT product_id, price FROM snapshots WHERE run_id = ? ORDER BY product_id',
+                              (run_id,)).fetchall()
+    assert rows == [('1', 289.99), ('2', 295.99), ('3', 295.99)]
+
+
+@pytest.mark.parametrize('failed, status', [(False, COMPLETE), (True, ABORTED)])
+def test_last_task_finishes_the_run(queue, store, failed, status):
+    job_id = queue_job(queue, tasks=2)
+    run_id = store.start_run('website2', '2024-11-02 10:15:00')
+    worker = Worker(queue, worker_id='worker-1')
+    worker.jobs[job_id] = ({'run_id': run_id}, LogOnlySite(), store)
+
+    assert queue.complete(queue.claim('worker-1', lease=60), 5)
+    worker.finish_job(job_id)
+    assert store.runs()[0][3] == 'running'
+    assert queue.job(job_id)['status'] == RUNNING
+
+    last = queue.claim('worker-1', lease=60)
+    if failed:
+        queue.fail(last, 'status code 500')
+        queue.fail(queue.claim('worker-1', lease=60), 'status code 500')
+        queue.fail(queue.claim('worker-1', lease=60), 'status code 500')
+    else:
+        queue.complete(last, 5)
+    worker.finish_job(job_id)
+    assert store.runs()[0][3] == status
+    assert queue.job(job_id)['status'] == status
+    # Only one worker finishes a job.
+    assert not queue.finish_job(job_id, COMPLETE)
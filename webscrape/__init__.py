@@ -0,0 +1,10 @@
+"""
+Scrapers for the webscraper.io e-commerce test sites.
+
+The site adapters in webscrape.sites hold everything a run does, and the
+``webscrape`` command in webscrape.cli runs them; the scripts under
+website1/, website2/ and website3/ are thin wrappers that only set the
+options. Importing the package has no side effects: nothing is logged,
+no file is opened and neither Selenium nor pandas is imported until a run
+needs them.
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from webscrape.cli import main
+
+sys.exit(main())
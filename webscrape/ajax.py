@@ -0,0 +1,211 @@
+"""
+Browser-free replay of the AJAX listing requests.
+
+The AJAX test site renders its product grid from XHR calls made when a
+pagination button is clicked. replay_pages() issues those calls directly
+over HTTP with the ``X-Requested-With: XMLHttpRequest`` header, so the pages
+can be fetched concurrently without a browser. Responses are accepted either
+as JSON product lists or as HTML fragments, which are handed to the regular
+card extractor; JSON products are formatted the way the cards show them. When
+the replay yields nothing, including when the endpoint serves the same page
+whatever page number it is asked for, callers fall back to Selenium.
+"""
+import json
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from webscrape.pagination import fetch_pages
+from webscrape.parse import release
+from webscrape.records import ProductRecord
+from webscrape.session import fetch, get_session
+
+xhr_headers = {
+    'X-Requested-With': 'XMLHttpRequest',
+    'Accept': 'application/json, text/javascript, text/html, */*; q=0.01',
+}
+
+# Attributes the pagination markup may use to name the endpoint it calls.
+_endpoint_attributes = ('data-url', 'data-href', 'data-source', 'data-endpoint')
+
+# JSON keys that may hold each output column, in order of preference.
+_json_fields = {
+    'Product Name': ('title', 'name'),
+    'Product Price': ('price',),
+    'Product Description': ('description',),
+    'Rating': ('rating', 'stars'),
+    'Reviews': ('review_count', 'reviews', 'reviewCount'),
+    'Product ID': ('id', 'product_id'),
+    'Product URL': ('url', 'link', 'href'),
+}
+
+
+def discover_endpoint(html, url):
+    """
+    Find the URL the page's pagination requests products from.
+
+    The pagination container and its buttons are checked for a data
+    attribute naming the endpoint. Without one, the listing URL itself is
+    used, which is where the test site serves its XHR responses.
+
+    Args:
+        html (str): The HTML of the first listing page.
+        url (str): The URL of the listing page.
+
+    Returns:
+        str: The absolute endpoint URL, without a page number.
+    """
+    soup = BeautifulSoup(html, 'lxml')
+    for element in soup.select('.pagination, .pagination [data-id], .pagination button'):
+        for attribute in _endpoint_attributes:
+            if element.get(attribute):
+                return urljoin(url, element[attribute]).split('?')[0]
+    return url
+
+
+def _format_price(value):
+    # Cards show prices as '$1299.00', with two decimals.
+    if isinstance(value, str):
+        value = value.strip().lstrip('$')
+    try:
+        return f'${float(value):.2f}'
+    except ValueError:
+        return f'${value}'
+
+
+def product_from_json(item, base_url=''):
+    """
+    Convert one product object from an XHR response into a product record.
+
+    The values are formatted as the card extractor reads them from the page:
+    the price with two decimals, the review count as digits, an empty
+    rating when the product has none and an absolute product URL.
+
+    Args:
+        item (dict): A product as returned by the endpoint.
+        base_url (str): The URL of the response, used to make the product link absolute.
+
+    Returns:
+        ProductRecord: The product.
+    """
+    product = {}
+    for column, keys in _json_fields.items():
+        value = next((item[key] for key in keys if item.get(key) is not None), '')
+        if column == 'Product Price' and value != '':
+            value = _format_price(value)
+        elif column == 'Reviews':
+            value = ''.join(filter(str.isdigit, str(value)))
+        elif column == 'Product URL' and value != '':
+            value = urljoin(base_url, str(value).strip())
+        product[column] = str(value).strip()
+    return ProductRecord.from_dict(product)
+
+
+def parse_xhr_response(response, extract_html):
+    """
+    Extract the products from one replayed XHR response.
+
+    Args:
+        response (requests.Response): The response for one page.
+        extract_html (callable): Called with a BeautifulSoup element holding
+            product cards and returns the product records in it.
+
+    Returns:
+        list or None: The product records, or None when the page holds none.
+    """
+    return parse_xhr_text(response.text, extract_html, response.url)
+
+
+def _extract_fragment(html, extract_html):
+    soup = BeautifulSoup(html, 'lxml')
+    try:
+        return extract_html(soup)
+    finally:
+        release(soup)
+
+
+def parse_xhr_text(text, extract_html, base_url=''):
+    """
+    Extract the products from the body of one replayed XHR response.
+
+    The tree of an HTML fragment is released once extract_html() has returned.
+
+    Args:
+        text (str): The response body: JSON, or an HTML fragment.
+        extract_html (callable): See parse_xhr_response().
+        base_url (str): The URL of the response, used to make JSON product links absolute.
+
+    Returns:
+        list or None: The product records, or None when the page holds none.
+    """
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        payload = None
+    if payload is None:
+        products = _extract_fragment(text, extract_html)
+    elif isinstance(payload, list):
+        products = [product_from_json(item, base_url) for item in payload if isinstance(item, dict)]
+    elif isinstance(payload, dict):
+        items = payload.get('products') or payload.get('items') or payload.get('data')
+        fragments = [value for value in payload.values() if isinstance(value, str) and 'product-wrapper' in value]
+        if isinstance(items, list):
+            products = [product_from_json(item, base_url) for item in items if isinstance(item, dict)]
+        elif fragments:
+            products = _extract_fragment(''.join(fragments), extract_html)
+        else:
+            products = []
+    else:
+        products = []
+    return products or None
+
+
+def replay_pages(url, extract_html, max_pages=20, max_workers=8, session=None, limiter=None, threaded_parse=None,
+                 log=None):
+    """
+    Fetch every page of an AJAX listing by replaying its XHR requests.
+
+    Args:
+        url (str): The URL of the AJAX listing page.
+        extract_html (callable): Called with a BeautifulSoup element holding
+            product cards and returns the product records in it.
+        max_pages (int): The highest page number to request.
+        max_workers (int): The maximum number of pages fetched at once.
+        session (requests.Session, optional): The session to fetch with.
+            Defaults to the shared session.
+        limiter (webscrape.ratelimit.RateLimiter, optional): Per-host rate
+            limits and retries applied to every request.
+        threaded_parse (callable, optional): Used instead of extract_html:
+            called in the fetch threads with each response, such as to hand it
+            to a process pool, and returns its records or None.
+        log (callable, optional): Called with progress messages.
+
+    Returns:
+        list: The product records of all pages, in page order. Empty when the
+        replay found no products, or when a page repeats the one before it
+        because the endpoint ignores the page number; the caller should then
+        fall back to a browser.
+    """
+    session = session or get_session(pool_maxsize=max_workers)
+    log = log or (lambda message: None)
+    response = fetch(url, session=session, limiter=limiter)
+    if response.status_code != 200:
+        log(f'Failed to connect to URL {url} - Status Code: {response.status_code}')
+        return []
+    endpoint = discover_endpoint(response.text, url)
+    log(f'Replaying XHR requests against {endpoint}')
+    if threaded_parse is None:
+        pages = fetch_pages(endpoint, lambda page: parse_xhr_response(page, extract_html),
+                            max_pages=max_pages, max_workers=max_workers, session=session,
+                            headers=xhr_headers, limiter=limiter, log=log)
+    else:
+        pages = fetch_pages(endpoint, threaded_parse, max_pages=max_pages, max_workers=max_workers,
+                            session=session, headers=xhr_headers, limiter=limiter, threaded_parse=True, log=log)
+    products = []
+    for page, records in enumerate(pages, start=1):
+        if page > 1 and records == pages[page - 2]:
+            # The endpoint ignored the page number, so the later pages were never replayed.
+            log(f'Page {page} repeats page {page - 1}: the endpoint does not paginate; abandoning the replay')
+            return []
+        products.extend(records)
+    return products
@@ -0,0 +1,284 @@
+"""
+Reusable headless Chrome drivers and event-driven page waits.
+
+Starting Chrome costs seconds, so DriverPool keeps drivers alive between
+scrapes and hands them out one caller at a time. The wait helpers replace
+fixed sleeps: they return as soon as the old product cards go stale and the
+new ones are on the page, so pagination takes only as long as rendering does.
+"""
+import atexit
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+wait_timeout = 10  # seconds
+driver_memory = 512 * 1024 * 1024  # rough resident size of one headless Chrome
+card_locator = (By.CLASS_NAME, 'product-wrapper')
+
+
+class DriverPool:
+    """
+    A bounded pool of long-lived headless Chrome drivers.
+
+    Drivers are started on demand, up to size, and returned to the pool
+    after use instead of being quit. A driver that raised a WebDriverException
+    while checked out is quit and replaced on the next request.
+
+    Args:
+        size (int): The maximum number of drivers alive at once.
+        driver_path (str, optional): The chromedriver executable. Defaults to
+            the one Selenium Manager finds.
+        headless (bool): Run Chrome without a window. Defaults to True.
+    """
+
+    def __init__(self, size=1, driver_path=None, headless=True):
+        self.size = size
+        self.driver_path = driver_path
+        self.headless = headless
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._drivers = []
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _create(self):
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument('--headless=new')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        service = Service(self.driver_path) if self.driver_path else Service()
+        return webdriver.Chrome(service=service, options=options)
+
+    def acquire(self):
+        """
+        Take a driver from the pool, starting one if the pool is not full.
+
+        Blocks until a driver is free when all size drivers are in use.
+
+        Returns:
+            selenium.webdriver.Chrome: A running driver.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            start_new = self._created < self.size
+            if start_new:
+                self._created += 1
+        if not start_new:
+            return self._idle.get()
+        try:
+            driver = self._create()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    def release(self, driver, broken=False):
+        """
+        Return a driver to the pool, or quit it if it is broken.
+
+        Args:
+            driver (selenium.webdriver.Chrome): The driver to return.
+            broken (bool): Quit the driver instead of reusing it.
+        """
+        if not broken:
+            self._idle.put(driver)
+            return
+        with self._lock:
+            self._created -= 1
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def driver(self):
+        """
+        Check a driver out of the pool for the duration of a with block.
+
+        Yields:
+            selenium.webdriver.Chrome: A running driver.
+        """
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def close(self):
+        """
+        Quit every driver started by the pool.
+        """
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+            self._created = 0
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+def wait_for_cards(driver, timeout=wait_timeout):
+    """
+    Wait until product cards are present on the page.
+
+    Args:
+        driver (selenium.webdriver.Chrome): The driver showing the page.
+        timeout (float): Seconds to wait before raising TimeoutException.
+
+    Returns:
+        list: The product card elements.
+    """
+    return WebDriverWait(driver, timeout).until(EC.presence_of_all_elements_located(card_locator))
+
+
+def _replaced(element, old_text):
+    # The page either swaps the card element out (it goes stale) or rewrites
+    # it in place (its text changes); both mean new content has arrived.
+    def condition(driver):
+        try:
+            return element.text != old_text
+        except StaleElementReferenceException:
+            return True
+    return condition
+
+
+def click_and_wait(driver, button, timeout=wait_timeout):
+    """
+    Click a pagination button and wait for the product cards to be replaced.
+
+    Args:
+        driver (selenium.webdriver.Chrome): The driver showing the page.
+        button (WebElement): The button to click.
+        timeout (float): Seconds to wait before raising TimeoutException.
+
+    Returns:
+        list: The new product card elements.
+    """
+    old_card = driver.find_element(*card_locator)
+    old_text = old_card.text
+    driver.execute_script("arguments[0].click();", button)
+    WebDriverWait(driver, timeout).until(_replaced(old_card, old_text))
+    return wait_for_cards(driver, timeout)
+
+
+def available_memory():
+    """
+    Return the memory available for new processes, in bytes.
+
+    Returns:
+        int or None: MemAvailable from /proc/meminfo, the free physical pages
+        reported by sysconf, or None if neither can be read.
+    """
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def max_drivers(requested, memory_per_driver=driver_memory):
+    """
+    Cap a requested number of drivers by the memory available.
+
+    Args:
+        requested (int): The number of drivers wanted.
+        memory_per_driver (int): The memory budget of one driver, in bytes.
+
+    Returns:
+        int: The number of drivers to start, at least 1.
+    """
+    memory = available_memory()
+    if memory is None:
+        return max(requested, 1)
+    return max(min(requested, memory // memory_per_driver), 1)
+
+
+def page_buttons(driver):
+    """
+    Return the numbered pagination buttons on the page.
+
+    Args:
+        driver (selenium.webdriver.Chrome): The driver showing the listing.
+
+    Returns:
+        dict: Page numbers mapped to their inactive button elements.
+    """
+    buttons = {}
+    for button in driver.find_elements(By.CSS_SELECTOR, '.pagination button.page-link:not(.active)'):
+        text = button.text.strip()
+        if text.isdigit():
+            buttons[int(text)] = button
+    return buttons
+
+
+def active_page(driver):
+    """
+    Return the number of the page currently shown.
+
+    Args:
+        driver (selenium.webdriver.Chrome): The driver showing the listing.
+
+    Returns:
+        int: The active page number, or 1 when there is no pagination.
+    """
+    for element in driver.find_elements(By.CSS_SELECTOR, '.pagination .active'):
+        text = element.text.strip()
+        if text.isdigit():
+            return int(text)
+    return 1
+
+
+def go_to_page(driver, page, timeout=wait_timeout):
+    """
+    Jump to a page by clicking the furthest visible button not past it.
+
+    Pagination bars often show only a window of page numbers, so this keeps
+    clicking the highest numbered button up to the target until it is reached.
+
+    Args:
+        driver (selenium.webdriver.Chrome): The driver showing the listing.
+        page (int): The page number to open.
+        timeout (float): Seconds to wait for each page to render.
+
+    Returns:
+        bool: True if the page is now shown, False if it cannot be reached.
+    """
+    current = active_page(driver)
+    while current != page:
+        reachable = [number for number in page_buttons(driver) if current < number <= page]
+        if not reachable:
+            return False
+        click_and_wait(driver, page_buttons(driver)[max(reachable)], timeout)
+        current = active_page(driver)
+    return True
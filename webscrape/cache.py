@@ -0,0 +1,240 @@
+"""
+On-disk HTTP response cache with conditional GET.
+
+Polling the same listings over and over mostly downloads pages that have
+not changed. ResponseCache keeps each response body on disk together with
+its ETag and Last-Modified validators, revalidates with If-None-Match and
+If-Modified-Since, and answers from disk when the server replies 304 Not
+Modified. Entries are evicted least recently used first once the cache
+grows past its size limit, and dropped once they are older than max_age.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+max_bytes = 200 * 1024 * 1024
+max_age = 7 * 24 * 60 * 60  # seconds
+
+# Headers describing the transfer rather than the stored (decoded) body.
+_transfer_headers = ('content-encoding', 'content-length', 'transfer-encoding', 'connection')
+
+
+class ResponseCache:
+    """
+    Cache response bodies on disk and revalidate them with conditional GETs.
+
+    Each URL is stored as two files named after the SHA-256 of the URL: a
+    ``.body`` file with the decoded content and a ``.json`` file with the
+    validators and headers. The body file's modification time records when
+    the entry was last used and drives LRU eviction; the metadata file's
+    modification time records when the entry was last validated and drives
+    age-based eviction.
+
+    Args:
+        directory (str): The directory to store entries in. Created on the
+            first write.
+        max_bytes (int): The total body size to keep before evicting.
+        max_age (float): Seconds after which an entry is discarded.
+    """
+
+    def __init__(self, directory, max_bytes=max_bytes, max_age=max_age):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.body', base + '.json'
+
+    def lookup(self, url):
+        """
+        Return the stored metadata and body for a URL.
+
+        Entries older than max_age are removed and reported as missing.
+
+        Args:
+            url (str): The URL to look up.
+
+        Returns:
+            tuple or None: (metadata, body) if the URL is cached, otherwise None.
+        """
+        body_path, meta_path = self._paths(url)
+        try:
+            if time.time() - os.path.getmtime(meta_path) > self.max_age:
+                self._remove(body_path, meta_path)
+                return None
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def store(self, url, response):
+        """
+        Store a 200 response if it carries an ETag or Last-Modified validator.
+
+        Responses without validators cannot be revalidated and are not stored.
+
+        Args:
+            url (str): The URL the response was fetched from.
+            response (requests.Response): The response to store.
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        body_path, meta_path = self._paths(url)
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': response.encoding,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in _transfer_headers},
+        }
+        previous = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+        self._write(body_path, response.content)
+        self._write(meta_path, json.dumps(meta).encode('utf-8'))
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(response.content) - previous
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def get(self, url, session, **kwargs):
+        """
+        Fetch a URL, revalidating a cached copy when one exists.
+
+        A 304 reply is answered from disk and refreshes the entry's age; a
+        200 reply replaces the entry. Any other reply is returned unchanged.
+
+        Args:
+            url (str): The URL to fetch.
+            session (requests.Session): The session to fetch with.
+            **kwargs: Extra arguments passed to session.get().
+
+        Returns:
+            requests.Response: The server's response, or a response rebuilt
+            from the cache with ``from_cache`` set to True.
+        """
+        cached = self.lookup(url)
+        headers = dict(kwargs.pop('headers', None) or {})
+        if cached:
+            meta, body = cached
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        response = session.get(url, headers=headers, **kwargs)
+        if response.status_code == 304 and cached:
+            self.hits += 1
+            body_path, meta_path = self._paths(url)
+            # Revalidated: reset the entry's age and mark it recently used.
+            os.utime(meta_path)
+            os.utime(body_path)
+            return self._rebuild(url, meta, body)
+        self.misses += 1
+        if response.status_code == 200:
+            self.store(url, response)
+        response.from_cache = False
+        return response
+
+    def evict(self):
+        """
+        Remove expired entries, then least recently used entries until the
+        cache is back under max_bytes.
+        """
+        now = time.time()
+        entries = []
+        for name in self._listdir():
+            if not name.endswith('.body'):
+                continue
+            body_path = os.path.join(self.directory, name)
+            meta_path = body_path[:-len('.body')] + '.json'
+            try:
+                size = os.path.getsize(body_path)
+                used = os.path.getmtime(body_path)
+                validated = os.path.getmtime(meta_path)
+            except OSError:
+                continue
+            if now - validated > self.max_age:
+                self._remove(body_path, meta_path)
+            else:
+                entries.append((used, size, body_path, meta_path))
+        total = sum(entry[1] for entry in entries)
+        for used, size, body_path, meta_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(body_path, meta_path)
+            total -= size
+        with self._lock:
+            self._size = total
+
+    def stats(self):
+        """
+        Return the number of revalidated hits, misses and the bytes on disk.
+
+        Returns:
+            dict: The cache hit and miss counts and the stored body size.
+        """
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            size = self._size
+        return {'hits': self.hits, 'misses': self.misses, 'bytes': size}
+
+    def _rebuild(self, url, meta, body):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = body
+        response.encoding = meta.get('encoding')
+        response.headers = CaseInsensitiveDict(meta.get('headers') or {})
+        response.from_cache = True
+        return response
+
+    def _scan_size(self):
+        total = 0
+        for name in self._listdir():
+            if name.endswith('.body'):
+                try:
+                    total += os.path.getsize(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        return total
+
+    def _listdir(self):
+        try:
+            return os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+    def _write(self, path, data):
+        # Write to a temporary file first so readers never see a partial entry.
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _remove(self, *paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,163 @@
+"""
+Page checkpoints for long paginated runs.
+
+A paginated listing walked in a browser takes several seconds a page, and a
+crashed driver or a timed-out wait late in the walk used to cost every page
+before it. PageCheckpoint records each page as soon as its products have
+been extracted, so a resumed run only fetches the pages that are missing
+and rewrites the output from the recorded ones.
+
+The checkpoint is a JSON-lines file: a header line
+``{"url": ..., "run_ts": ...}`` naming the listing and the run, then one
+line ``{"page": n, "records": [...]}`` per finished page, with each record
+stored as a dictionary keyed by output column names (a catalogue crawl
+records the page URL in place of n), and a line
+``{"last_page": n}`` once the end of the listing has been seen. Lines are only ever
+appended and each is synced to disk before the next page is recorded, so a
+run that is killed loses at most the page being written; a torn last line is
+ignored when the file is read back. The file is deleted once a run has
+reached the last page.
+"""
+import json
+import os
+import threading
+
+from webscrape.records import ProductRecord
+
+
+class PageCheckpoint:
+    """
+    The pages of one run that have been extracted, kept in an append-only file.
+
+    Args:
+        path (str): The checkpoint file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.url = None
+        self.run_ts = None
+        self.pages = {}
+        self.last_page = None
+        self.finished = False
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self, url):
+        """
+        Read the checkpoint left by an unfinished run of a listing.
+
+        Args:
+            url (str): The listing URL of this run.
+
+        Returns:
+            bool: True if a checkpoint for url was found. Its pages are then in
+            ``pages``, its run timestamp in ``run_ts`` and the last page of the
+            listing, if it was seen, in ``last_page``. New pages are appended to it.
+        """
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'rb') as f:
+            # Only lines ending in a newline were written completely.
+            lines = f.read().split(b'\n')[:-1]
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return False
+        if header.get('url') != url:
+            return False
+        end = len(lines[0]) + 1
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            if 'last_page' in entry:
+                self.last_page = entry['last_page']
+            else:
+                self.pages[entry['page']] = [ProductRecord.from_dict(record) for record in entry['records']]
+            end += len(line) + 1
+        self.url = url
+        self.run_ts = header.get('run_ts')
+        self._file = open(self.path, 'a', encoding='utf-8')
+        # New pages go after the last complete line, not after a torn one.
+        self._file.truncate(end)
+        return True
+
+    def exists(self):
+        """
+        Return True if a checkpoint file is present, whichever listing it belongs to.
+        """
+        return os.path.exists(self.path)
+
+    def start(self, url, run_ts):
+        """
+        Begin a new checkpoint, replacing any earlier one.
+
+        Args:
+            url (str): The listing URL of this run.
+            run_ts (str): The run timestamp, as in the data file names.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.url = url
+        self.run_ts = run_ts
+        self.pages = {}
+        self.last_page = None
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._append({'url': url, 'run_ts': run_ts})
+
+    def _append(self, entry):
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def add_page(self, page, records):
+        """
+        Record the products of a finished page. Safe to call from several threads.
+
+        Args:
+            page (int or str): The 1-based page number, or the page URL in a catalogue crawl.
+            records (list): The ProductRecord objects extracted from the page.
+        """
+        with self._lock:
+            self.pages[page] = records
+            self._append({'page': page, 'records': [record.as_dict() for record in records]})
+
+    def set_last_page(self, page):
+        """
+        Record the last page of the listing, once a walk has run out of pages.
+        """
+        with self._lock:
+            self.last_page = page
+            self._append({'last_page': page})
+
+    def next_page(self):
+        """
+        Return the first page number that has not been recorded.
+        """
+        page = 1
+        while page in self.pages:
+            page += 1
+        return page
+
+    def finish(self):
+        """
+        Mark the run as having reached the last page, so clear() may delete the checkpoint.
+        """
+        self.finished = True
+
+    def close(self):
+        """
+        Close the file and keep it for a resumed run.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clear(self):
+        """
+        Close the file and delete it, once a run has finished.
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
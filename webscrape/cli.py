@@ -0,0 +1,91 @@
+"""
+Command-line entry point.
+
+    webscrape website1
+    webscrape website2 --format both --home-dir runs/website2
+    webscrape paginated --url https://example.com/laptops --max-pages 50
+
+The first argument names one of the three test sites, which come with their
+URLs, or an adapter kind ('static', 'paginated' or 'ajax') used with --url.
+Options left out keep the adapter's defaults.
+"""
+import argparse
+import sys
+
+from webscrape.logger import DEBUG, INFO, WARNING, ERROR
+from webscrape.parse import parsers
+from webscrape.sites import adapters, create_site, sites
+
+log_levels = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='webscrape', description='Scrape product listings from the e-commerce test sites.')
+    parser.add_argument('site', choices=list(sites) + list(adapters),
+                        help='a test site, or an adapter kind used with --url')
+    parser.add_argument('--url', help='the listing URL to scrape')
+    parser.add_argument('--root-url', help='the e-commerce root crawled with --crawl-all')
+    parser.add_argument('--home-dir', default='.',
+                        help='folder for the log file and the data, cache and metrics folders (default: .)')
+    parser.add_argument('--format', dest='output_format', choices=['csv', 'parquet', 'both'])
+    parser.add_argument('--parse-backend', choices=sorted(parsers))
+    parser.add_argument('--parse-workers', type=int,
+                        help='processes that parse pages in parallel (default: 0, parse in the main process)')
+    parser.add_argument('--log-level', choices=list(log_levels))
+    parser.add_argument('--sqlite', dest='sqlite_store', action='store_const', const=True,
+                        help='also upsert the run into data/snapshots.sqlite for price history')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_const', const=False,
+                        help='always download instead of revalidating against the HTTP cache')
+    parser.add_argument('--max-pages', type=int)
+    parser.add_argument('--max-workers', type=int, help='pages fetched at the same time')
+    parser.add_argument('--rate', type=float, help='requests per second per host (default: 10)')
+    parser.add_argument('--max-retries', type=int, help='retries after a failed request or a 429/5xx reply')
+    parser.add_argument('--enrich', dest='enrich_details', action='store_const', const=True,
+                        help='follow each product link for the full name, variants and specs')
+    parser.add_argument('--detail-workers', type=int, help='product pages fetched at the same time with --enrich')
+    parser.add_argument('--resume', action='store_const', const=True,
+                        help='continue the last run that stopped before the last page, or the last unfinished --crawl-all crawl')
+    parser.add_argument('--crawl-all', action='store_const', const=True,
+                        help='crawl every category under the root URL (static and paginated sites)')
+    parser.add_argument('--incremental', action='store_const', const=True,
+                        help='only parse changed pages and write a delta file (static and paginated sites)')
+    parser.add_argument('--no-snapshot', dest='write_snapshot', action='store_const', const=False,
+                        help='in incremental mode, write only the delta file')
+    parser.add_argument('--no-replay', dest='replay_xhr', action='store_const', const=False,
+                        help='go straight to Selenium instead of replaying the AJAX requests (ajax sites)')
+    parser.add_argument('--shard-workers', type=int, help='headless drivers walking pages in parallel (ajax sites)')
+    parser.add_argument('--driver-path', help='the chromedriver executable (ajax sites)')
+    return parser
+
+
+def main(argv=None):
+    """
+    Run a scraper from command-line arguments.
+
+    Args:
+        argv (list, optional): The arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: 0 if any products were written, 1 otherwise, including when the
+        run failed part-way.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    options = {key: value for key, value in vars(args).items()
+               if value is not None and key not in ('site', 'home_dir')}
+    if 'log_level' in options:
+        options['log_level'] = log_levels[options['log_level']]
+    try:
+        site = create_site(args.site, args.home_dir, **options)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        rows = site.run()
+    except Exception as e:
+        print(f'webscrape: {str(e)}; see {site.log_file}', file=sys.stderr)
+        return 1
+    return 0 if rows else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
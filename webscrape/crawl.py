@@ -0,0 +1,238 @@
+"""
+asyncio crawl engine for a whole e-commerce category tree.
+
+Starting from the e-commerce root, the engine reads the sidebar menu to
+discover every category and subcategory, follows the pagination links of
+each subcategory listing, and hands every listing page to an extractor.
+Pages are fetched concurrently over the shared session, with a separate
+concurrency limit for each host. Which page is fetched next, and whether a
+link has been seen before, is up to a URLFrontier; given a file, it lets an
+interrupted crawl carry on where it stopped.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+from webscrape.frontier import URLFrontier
+from webscrape.logger import ERROR
+from webscrape.parse import release
+from webscrape.session import fetch, get_session
+
+per_host_limit = 4  # pages fetched at the same time from one host
+max_workers = 16  # threads available for blocking fetches
+
+
+def category_path(root_url, url):
+    """
+    Return the category path of a URL relative to the crawl root.
+
+    Args:
+        root_url (str): The e-commerce root URL.
+        url (str): A URL under the root.
+
+    Returns:
+        str: The path below the root without the query string, for example
+        'computers/laptops'.
+    """
+    root = urlsplit(root_url).path.rstrip('/')
+    path = urlsplit(url).path
+    return path[len(root):].strip('/') if path.startswith(root) else path.strip('/')
+
+
+def discover_links(soup, page_url, root_url):
+    """
+    Find the category, subcategory and pagination links on a page.
+
+    Only links that stay under the crawl root are returned.
+
+    Args:
+        soup (BeautifulSoup): The parsed page.
+        page_url (str): The URL of the page, used to resolve relative links.
+        root_url (str): The e-commerce root URL.
+
+    Returns:
+        list: (url, kind) tuples, where kind is 'category', 'subcategory'
+        or 'page'.
+    """
+    links = []
+    selectors = (
+        ('category', 'a.category-link'),
+        ('subcategory', 'a.subcategory-link'),
+        ('page', 'ul.pagination a.page-link'),
+    )
+    for kind, selector in selectors:
+        for link in soup.select(selector):
+            href = link.get('href')
+            if not href:
+                continue
+            absolute = urljoin(page_url, href).split('#')[0]
+            if absolute.endswith('?page=1'):
+                # The first page is the listing itself.
+                absolute = absolute[:-len('?page=1')]
+            if absolute.startswith(root_url.rstrip('/') + '/'):
+                links.append((absolute, kind))
+    return links
+
+
+async def crawl_catalogue(root_url, extract, per_host_limit=per_host_limit,
+                          max_workers=max_workers, session=None, cache=None, limiter=None, frontier=None,
+                          parse_pool=None, on_page=None, log=None):
+    """
+    Crawl every category listing under root_url concurrently.
+
+    Blocking fetches run on a thread pool and are throttled by one
+    asyncio.Semaphore per host. Discovered links go into the frontier, and
+    up to max_workers of them are fetched at a time, categories and listing
+    pages first. Category pages are only used to discover subcategories;
+    subcategory listings and their pagination pages are passed to extract().
+    Nothing blocking runs in the event loop: pages are parsed on the fetch
+    threads, or in parse_pool, and on_page is called on a thread of its own,
+    one page at a time, so fetches carry on while a page is parsed or written.
+
+    A page that cannot be fetched or parsed is logged as an error and marked
+    failed in the frontier, and the crawl goes on; the caller can tell from
+    frontier.stats() whether any page failed. An error from on_page, such as
+    a failed write, stops the crawl and is raised, leaving the pages in flight
+    queued in the frontier.
+
+    Args:
+        root_url (str): The e-commerce root URL.
+        extract (callable): Called with the 'col-lg-9' element of each listing
+            page and returns the records found on it.
+        per_host_limit (int): The maximum number of concurrent fetches per host.
+        max_workers (int): The number of fetch threads.
+        session (requests.Session, optional): The session to fetch with.
+            Defaults to the shared session.
+        cache (webscrape.cache.ResponseCache, optional): A response cache
+            to revalidate pages against.
+        limiter (webscrape.ratelimit.RateLimiter, optional): Per-host rate
+            limits and retries applied to every fetch, on top of per_host_limit.
+        frontier (webscrape.frontier.URLFrontier, optional): The queue and
+            seen-set of the crawl. Defaults to an in-memory frontier. A
+            frontier reopened from the file of an unfinished crawl resumes
+            it: pages already fetched are not fetched again.
+        parse_pool (webscrape.parallel.ParsePool, optional): Worker processes
+            that parse each page, find its links and extract its products,
+            in place of parsing in the event loop and calling extract().
+        on_page (callable, optional): Called with (url, records) as soon as
+            each listing page has been extracted. The records are then not
+            kept by the engine. Calls are made from one writer thread, never
+            two at once.
+        log (callable, optional): Called with progress messages, and with
+            the level as a second argument for errors and for messages from
+            parse_pool workers.
+
+    Returns:
+        list: (url, records) tuples for every listing page fetched, in the
+        order they were taken from the frontier. When on_page is given, the
+        number of records takes the place of the records.
+    """
+    session = session or get_session(pool_maxsize=per_host_limit)
+    log = log or (lambda message, level=None: None)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    writer = ThreadPoolExecutor(max_workers=1)
+    frontier = URLFrontier() if frontier is None else frontier
+    host_limits = {}
+    order = []
+    results = {}
+    pending = set()
+
+    def parse(text, url, listing):
+        soup = BeautifulSoup(text, 'lxml')
+        try:
+            links = discover_links(soup, url, root_url)
+            records = None
+            if listing:
+                box = soup.find('div', class_='col-lg-9')
+                records = extract(box) if box else []
+            return links, records
+        finally:
+            release(soup)
+
+    async def visit(url, kind):
+        host = urlsplit(url).netloc
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(per_host_limit)
+        async with host_limits[host]:
+            try:
+                response = await loop.run_in_executor(
+                    executor, lambda: fetch(url, session=session, cache=cache, limiter=limiter))
+            except Exception as e:
+                log(f'Error while fetching URL {url}: {str(e)}', ERROR)
+                frontier.done(url, failed=True)
+                return
+        if response.status_code != 200:
+            log(f'Failed to connect to URL {url} - Status Code: {response.status_code}', ERROR)
+            frontier.done(url, failed=True)
+            return
+        listing = kind in ('subcategory', 'page')
+        try:
+            if parse_pool is None:
+                links, records = await loop.run_in_executor(executor, parse, response.text, url, listing)
+            else:
+                links, records, messages = await asyncio.wrap_future(
+                    parse_pool.crawl_page(response.content, url, root_url, listing))
+                for message, level in messages:
+                    log(message, level)
+        except Exception as e:
+            log(f'Error while parsing URL {url}: {str(e)}', ERROR)
+            frontier.done(url, failed=True)
+            return
+        # Pagination links only matter on listing pages.
+        frontier.add_many((link, link_kind) for link, link_kind in links
+                          if link_kind != 'page' or listing)
+        if listing:
+            log(f'Scraped {len(records)} records from {url}')
+            if on_page is not None:
+                await loop.run_in_executor(writer, on_page, url, records)
+                records = len(records)
+            results[url] = records
+        frontier.done(url)
+
+    def dispatch():
+        for url, kind in frontier.pop(max_workers - len(pending)):
+            order.append(url)
+            pending.add(asyncio.ensure_future(visit(url, kind)))
+
+    if frontier.add(root_url, 'root'):
+        log(f'Starting catalogue crawl from URL: {root_url}')
+    else:
+        log(f'Resuming catalogue crawl from URL: {root_url} ({frontier.stats()})')
+    dispatch()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            for task in done:
+                # visit() handles failed pages itself; anything else, such as a
+                # failed write in on_page, ends the crawl.
+                task.result()
+            dispatch()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+        executor.shutdown(wait=False)
+        # A page being written when the crawl stops is finished before the caller closes its output.
+        writer.shutdown()
+    log(f'Catalogue crawl finished: {len(results)} listing pages; frontier {frontier.stats()}')
+    return [(url, results[url]) for url in order if url in results]
+
+
+def crawl(root_url, extract, **kwargs):
+    """
+    Run crawl_catalogue() to completion from synchronous code.
+
+    Args:
+        root_url (str): The e-commerce root URL.
+        extract (callable): Called with the 'col-lg-9' element of each listing page.
+        **kwargs: Extra arguments passed to crawl_catalogue().
+
+    Returns:
+        list: (url, records) tuples for every listing page fetched.
+    """
+    return asyncio.run(crawl_catalogue(root_url, extract, **kwargs))
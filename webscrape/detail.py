@@ -0,0 +1,219 @@
+"""
+Product detail pages: full names, variants and specs.
+
+Listing cards truncate long names ("Asus VivoBook...") and carry no specs
+beyond the description. DetailEnricher follows each card's ``a.title`` link
+and merges what the product page adds into the record. Following every link
+multiplies the requests of a crawl by the number of products, so detail
+pages are fetched concurrently on a bounded pool, through the same rate
+limiter and HTTP cache as the listing pages, and each product id is fetched
+at most once per run however many listings it appears on.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from webscrape.logger import DEBUG, WARNING
+from webscrape.parse import default_backend, parse_listing, release
+from webscrape.session import fetch, get_session
+
+detail_columns = ['Full Name', 'Variants', 'Specs']
+max_workers = 16
+
+# Separators used to flatten variants and specs into single CSV cells.
+variant_separator = '; '
+spec_separator = '; '
+
+
+def _no_log(message, level=None):
+    pass
+
+
+def _text(element):
+    return element.get_text(' ', strip=True) if element is not None else ''
+
+
+def detail_variants(box):
+    """
+    Return the variants offered on a product page.
+
+    Variants are the swatch buttons (such as the HDD sizes of a laptop) and
+    the options of any select box in the caption. A variant's price is taken
+    from its 'data-price' attribute when the page provides one.
+
+    Args:
+        box (BeautifulSoup): The product page container.
+
+    Returns:
+        list: Strings such as '128' or '256: $315.99', in page order.
+    """
+    variants = []
+    choices = box.find_all('button', class_='swatch') + [option for option in box.select('select option')
+                                                         if option.get('value')]
+    for choice in choices:
+        label = _text(choice) or choice.get('value', '')
+        price = choice.get('data-price')
+        variants.append(f'{label}: {price}' if price else label)
+    return variants
+
+
+def detail_specs(box, description):
+    """
+    Return the specs listed on a product page.
+
+    The product description reads like 'Name, 14", Celeron N3450, 4GB, ...':
+    every comma-separated part after the name is a spec. Rows of a spec
+    table, when the page has one, are added as 'label: value'.
+
+    Args:
+        box (BeautifulSoup): The product page container.
+        description (str): The full product description.
+
+    Returns:
+        list: The specs, in page order.
+    """
+    specs = [part.strip() for part in description.split(',')[1:] if part.strip()]
+    for row in box.select('table tr'):
+        cells = row.find_all(['th', 'td'])
+        if len(cells) == 2:
+            specs.append(f'{_text(cells[0])}: {_text(cells[1])}')
+    return specs
+
+
+def parse_detail(box):
+    """
+    Extract the full name, variants and specs from a product page container.
+
+    Args:
+        box (BeautifulSoup): The 'col-lg-9' div element of a product page.
+
+    Returns:
+        dict: The 'Full Name', 'Variants' and 'Specs' values, as strings.
+    """
+    caption = box.find('div', class_='caption') or box
+    title = caption.find(class_='title') or next(
+        (h4 for h4 in caption.find_all('h4') if 'price' not in h4.get('class', [])), None)
+    description = _text(caption.find('p', class_='description'))
+    return {
+        'Full Name': _text(title),
+        'Variants': variant_separator.join(detail_variants(caption)),
+        'Specs': spec_separator.join(detail_specs(box, description)),
+    }
+
+
+class DetailEnricher:
+    """
+    Fetch product detail pages concurrently and merge them into records.
+
+    Args:
+        max_workers (int): Detail pages fetched at the same time.
+        session (requests.Session, optional): The session to fetch with.
+            Defaults to the shared session.
+        cache (webscrape.cache.ResponseCache, optional): A response cache
+            to revalidate detail pages against.
+        limiter (webscrape.ratelimit.RateLimiter, optional): Per-host rate
+            limits and retries applied to every detail request.
+        parse_backend (str): The backend that builds the page container.
+        log (callable, optional): Called with (message, level).
+        log_debug (bool): Also log the details of every product page at DEBUG level.
+    """
+
+    def __init__(self, max_workers=max_workers, session=None, cache=None, limiter=None,
+                 parse_backend=default_backend, log=None, log_debug=False):
+        self.session = session or get_session()
+        self.cache = cache
+        self.limiter = limiter
+        self.parse_backend = parse_backend
+        self.log = log or _no_log
+        self.log_debug = log_debug
+        self.fetched = 0
+        self.reused = 0
+        self.failed = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._details = {}
+        self._lock = threading.Lock()
+
+    def fetch_detail(self, url):
+        """
+        Fetch and parse one product page.
+
+        Returns:
+            dict or None: The detail values, or None if the page could not be
+            fetched or holds no product.
+        """
+        response = fetch(url, session=self.session, cache=self.cache, limiter=self.limiter)
+        if response.status_code != 200:
+            self.log(f'Failed to fetch product page {url} - Status Code: {response.status_code}', WARNING)
+            return None
+        box = parse_listing(response.text, self.parse_backend)
+        if box is None:
+            self.log(f'No product found on product page {url}', WARNING)
+            return None
+        details = parse_detail(box)
+        release(box)
+        if self.log_debug:
+            self.log(f'Product details from {url}: {details}', DEBUG)
+        return details
+
+    def _submit(self, product):
+        key = product.key()
+        with self._lock:
+            future = self._details.get(key)
+            if future is None:
+                future = self._details[key] = self._executor.submit(self.fetch_detail, product.url)
+                self.fetched += 1
+            else:
+                self.reused += 1
+        return future
+
+    def enrich(self, products):
+        """
+        Merge the detail pages of products into their records.
+
+        All product pages not seen yet in this run are requested at once and
+        fetched max_workers at a time; products already seen reuse the first
+        fetch, even while it is still in flight. A product whose page fails
+        keeps its listing values and empty detail columns. Products that
+        already have a full name, such as those restored from a checkpoint,
+        are left as they are.
+
+        Args:
+            products (list): ProductRecord objects with a product URL.
+
+        Returns:
+            int: The number of products enriched.
+        """
+        pending = [(product, self._submit(product)) for product in products if product.url and not product.full_name]
+        enriched = 0
+        for product, future in pending:
+            try:
+                details = future.result()
+            except Exception as e:
+                self.log(f'Error while fetching product page {product.url}: {str(e)}', WARNING)
+                details = None
+            if details is None:
+                with self._lock:
+                    self.failed += 1
+                continue
+            product.full_name = details['Full Name'] or product.name
+            product.variants = details['Variants']
+            product.specs = details['Specs']
+            enriched += 1
+        return enriched
+
+    def stats(self):
+        """
+        Return the product pages fetched, the fetches reused and the failed merges.
+        """
+        with self._lock:
+            return {'fetched': self.fetched, 'reused': self.reused, 'failed': self.failed}
+
+    def close(self):
+        """
+        Stop the pool, cancelling detail fetches that have not started.
+        """
+        # Executor.shutdown(cancel_futures=True) needs Python 3.9; cancelling a
+        # future that is running or done does nothing.
+        with self._lock:
+            for future in self._details.values():
+                future.cancel()
+        self._executor.shutdown()
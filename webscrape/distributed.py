@@ -0,0 +1,464 @@
+"""
+Distributed snapshots: a coordinator and workers on several machines.
+
+A catalogue-wide snapshot fetched by one process takes as long as all of
+its pages put together. In a distributed run the coordinator walks the
+category tree once, splits every subcategory listing into ranges of
+pages_per_task pages, and puts one task per range on a shared work queue
+(see webscrape/workqueue.py). Workers on any number of machines claim the
+tasks, scrape their pages with the site adapter's usual fetch, parse and
+extract steps, and upsert the products into one shared SnapshotStore under
+the run the coordinator started. Rows are keyed by (product_id, run_id), so
+a task that is scraped twice, because its worker was presumed dead, stores
+its products only once.
+
+The page count of a listing is read from its pagination links, which may
+stop short of the last page. The last range of each listing is therefore a
+tail: a worker that finds its last page full queues the next range. The
+worker that finishes the last task of a job marks the run in the store
+complete, or aborted if some task was given up.
+
+Only listing sites are distributed, static and paginated; an AJAX walk
+depends on the state of one browser and stays a single-process run.
+
+    webscrape-distributed coordinate website2 --queue sqlite:///shared/queue.sqlite \\
+        --store /shared/snapshots.sqlite --pages-per-task 5
+    webscrape-distributed work --queue sqlite:///shared/queue.sqlite --home-dir /tmp/worker
+    webscrape-distributed status --queue sqlite:///shared/queue.sqlite --job 1
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from bs4 import BeautifulSoup
+
+from webscrape.cli import log_levels
+from webscrape.crawl import category_path, discover_links
+from webscrape.logger import ERROR, INFO, WARNING
+from webscrape.parse import parsers, release
+from webscrape.sites import ListingSite, PaginatedSite, create_site, sites
+from webscrape.store import ABORTED, COMPLETE, SnapshotStore
+from webscrape.workqueue import FAILED, RUNNING, Task, open_queue
+
+pages_per_task = 5
+lease = 120  # seconds a claimed task belongs to its worker without a heartbeat
+poll_interval = 5  # seconds between looks at an empty queue
+
+
+def page_count(links):
+    """
+    Return the highest page number among pagination links, or 1 if there are none.
+
+    Args:
+        links (list): (url, kind) tuples from discover_links().
+    """
+    pages = [1]
+    for url, kind in links:
+        if kind == 'page':
+            numbers = parse_qs(urlsplit(url).query).get('page', [])
+            pages.extend(int(number) for number in numbers if number.isdigit())
+    return max(pages)
+
+
+def split_listing(job_id, category, url, pages, per_task, paginated=True):
+    """
+    Split the pages of a listing into tasks of at most per_task pages.
+
+    Args:
+        job_id (int): The job the tasks belong to.
+        category (str): The category path of the listing.
+        url (str): The listing URL.
+        pages (int): The number of pages known to the coordinator.
+        per_task (int): Pages per task.
+        paginated (bool): Whether the listing has numbered pages. A
+            listing without them is a single task and never a tail.
+
+    Returns:
+        list: Task objects in page order; the last is the tail of a paginated listing.
+    """
+    if not paginated:
+        return [Task(job_id, category, url, 1, 1)]
+    tasks = []
+    for first_page in range(1, pages + 1, per_task):
+        last_page = min(first_page + per_task - 1, pages)
+        tasks.append(Task(job_id, category, url, first_page, last_page))
+    tasks[-1].last_page = tasks[-1].first_page + per_task - 1
+    tasks[-1].tail = True
+    return tasks
+
+
+class Coordinator:
+    """
+    Plan a distributed run: discover the listings and queue their page ranges.
+
+    Args:
+        queue (webscrape.workqueue.WorkQueue): The shared work queue.
+        site (str): A test site name, or 'static' or 'paginated' with url and root_url options.
+        home_dir (str): The folder for the coordinator's log file and cache.
+        store_file (str, optional): The shared snapshot database the workers
+            write to. Defaults to data/snapshots.sqlite in home_dir, which
+            only suits workers on this machine.
+        pages_per_task (int): Pages in each task.
+        **options: Adapter settings, passed on to every worker.
+
+    Raises:
+        ValueError: If the site is not a listing site or has no root URL.
+    """
+
+    def __init__(self, queue, site, home_dir='.', store_file=None, pages_per_task=pages_per_task, **options):
+        self.queue = queue
+        self.site_name = site
+        self.options = options
+        self.site = create_site(site, home_dir, **options)
+        if not isinstance(self.site, ListingSite):
+            raise ValueError(f'{site} cannot be distributed; only static and paginated sites can')
+        if not self.site.root_url:
+            raise ValueError(f'{site} needs a root_url to discover its categories from')
+        self.root_url = self.site.root_url
+        self.store_file = os.path.abspath(store_file or self.site.store_file)
+        self.pages_per_task = pages_per_task
+
+    def log(self, message, level=INFO):
+        self.site.log(message, level)
+
+    def fetch_links(self, url):
+        """
+        Fetch a page and return the category, subcategory and pagination links on it.
+        """
+        response = self.site.fetch_page(url)
+        if response is None:
+            return []
+        soup = BeautifulSoup(response.text, 'lxml')
+        links = discover_links(soup, url, self.root_url)
+        release(soup)
+        return links
+
+    def discover(self):
+        """
+        Walk the category tree and return every subcategory listing.
+
+        The root, the category pages and the first page of each listing are
+        fetched max_workers at a time, a level of the tree after another.
+
+        Returns:
+            list: (category, url, pages) tuples, where pages is the number of
+            pages the listing's pagination links reach.
+        """
+        with ThreadPoolExecutor(max_workers=self.site.max_workers) as executor:
+            categories = [url for url, kind in self.fetch_links(self.root_url) if kind == 'category']
+            listings = []
+            for links in executor.map(self.fetch_links, dict.fromkeys(categories)):
+                listings.extend(url for url, kind in links if kind == 'subcategory')
+            listings = list(dict.fromkeys(listings))
+            counts = executor.map(lambda url: page_count(self.fetch_links(url)), listings)
+            return [(category_path(self.root_url, url), url, pages) for url, pages in zip(listings, counts)]
+
+    def plan(self):
+        """
+        Start the run in the snapshot store and queue a task for every page range.
+
+        Returns:
+            int or None: The job id, or None if no listing was found.
+        """
+        self.site.logger.start()
+        try:
+            self.log(f'Discovering listings under {self.root_url}')
+            listings = self.discover()
+            if not listings:
+                self.log(f'No listings found under {self.root_url}', ERROR)
+                return None
+            store = SnapshotStore(self.store_file)
+            run_id = store.start_run(self.site.name, self.site.time_str)
+            store.close()
+            settings = {
+                'options': self.options,
+                'store_file': self.store_file,
+                'run_id': run_id,
+                'run_ts': self.site.time_str,
+                'pages_per_task': self.pages_per_task,
+            }
+            job_id = self.queue.create_job(self.site_name, settings)
+            paginated = isinstance(self.site, PaginatedSite)
+            tasks = [task for category, url, pages in listings
+                     for task in split_listing(job_id, category, url, min(pages, getattr(self.site, 'max_pages', 1)),
+                                               self.pages_per_task, paginated)]
+            self.queue.put(tasks)
+            self.log(f'Job {job_id}: {len(tasks)} tasks over {len(listings)} listings queued for run '
+                     f'{self.site.time_str} in {self.store_file}')
+            return job_id
+        finally:
+            self.site.logger.close()
+
+    def wait(self, job_id, poll_interval=poll_interval, timeout=None):
+        """
+        Wait for the workers to finish a job.
+
+        Args:
+            job_id (int): The job id from plan().
+            poll_interval (float): Seconds between looks at the queue.
+            timeout (float, optional): Seconds to wait at most.
+
+        Returns:
+            str: The job status: 'complete', 'aborted', or 'running' if the
+            timeout ran out first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.queue.job(job_id)['status']
+            if status != RUNNING or (deadline is not None and time.monotonic() >= deadline):
+                return status
+            time.sleep(poll_interval)
+
+
+class Worker:
+    """
+    Claim tasks from the shared queue and scrape them until the queue is empty.
+
+    Each job is scraped with an adapter built from the settings the
+    coordinator stored with it, so a worker only needs the queue. A thread
+    extends the lease of the task in hand every third of the lease.
+
+    Args:
+        queue (webscrape.workqueue.WorkQueue): The shared work queue.
+        home_dir (str): The folder for this worker's log file, cache and metrics.
+        worker_id (str, optional): The name the worker claims tasks under.
+            Defaults to the host name and process id.
+        lease (float): Seconds a claimed task belongs to this worker between heartbeats.
+        poll_interval (float): Seconds between claims while the queue is empty.
+        wait (bool): Keep polling once no task is left, for jobs queued later.
+    """
+
+    def __init__(self, queue, home_dir='.', worker_id=None, lease=lease, poll_interval=poll_interval, wait=False):
+        self.queue = queue
+        self.home_dir = home_dir
+        self.worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.wait = wait
+        self.jobs = {}
+        self.tasks_done = 0
+        self.tasks_failed = 0
+
+    def open_job(self, job_id):
+        """
+        Return the job's settings, adapter and snapshot store, opening them on first use.
+        """
+        if job_id not in self.jobs:
+            job = self.queue.job(job_id)
+            settings = job['settings']
+            site = create_site(job['site'], self.home_dir, **settings['options'])
+            site.logger.start()
+            site.metrics.start()
+            site.metrics.watch(site.session())
+            site.log(f'Worker {self.worker_id} joined job {job_id}, run {settings["run_ts"]}')
+            self.jobs[job_id] = (settings, site, SnapshotStore(settings['store_file']))
+        return self.jobs[job_id]
+
+    def heartbeat(self, task, stop, site):
+        while not stop.wait(self.lease / 3):
+            if not self.queue.extend(task, self.lease):
+                site.log(f'Lost the lease on {task}; another worker may be scraping it', WARNING)
+                return
+
+    def run_task(self, task):
+        """
+        Scrape a task's pages and upsert their products into the job's run.
+
+        Returns:
+            int: The number of products stored.
+
+        Raises:
+            RuntimeError: If a page of the range could not be fetched.
+        """
+        settings, site, store = self.open_job(task.job_id)
+        site.log(f'{self.worker_id} scraping {task} (try {task.attempts})')
+        pages = site.iter_page_range(task.url, task.first_page, task.last_page)
+        rows = 0
+        scraped = 0
+        for products in pages:
+            for product in products:
+                product.category = task.category
+            site.enrich(products)
+            rows += store.upsert(settings['run_id'], settings['run_ts'], products)
+            scraped += 1
+        if task.tail and scraped == task.last_page - task.first_page + 1 and task.last_page < site.max_pages:
+            per_task = settings['pages_per_task']
+            self.queue.put([Task(task.job_id, task.category, task.url, task.last_page + 1,
+                                 task.last_page + per_task, tail=True)])
+            site.log(f'{task.url} goes on past page {task.last_page}; queued pages {task.last_page + 1} to '
+                     f'{task.last_page + per_task}')
+        site.metrics.add(rows=rows)
+        return rows
+
+    def finish_job(self, job_id):
+        """
+        Mark the job's run finished in the store if no task of it is left.
+        """
+        settings, site, store = self.jobs[job_id]
+        counts = self.queue.counts(job_id)
+        status = ABORTED if counts[FAILED] else COMPLETE
+        if self.queue.finish_job(job_id, status):
+            store.finish_run(settings['run_id'], status)
+            site.log(f'Job {job_id} finished as {status}: {counts}', INFO if status == COMPLETE else ERROR)
+
+    def work(self, task):
+        settings, site, store = self.open_job(task.job_id)
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self.heartbeat, args=(task, stop, site), daemon=True)
+        heartbeat.start()
+        try:
+            rows = self.run_task(task)
+        except Exception as e:
+            site.log(f'Error while scraping {task}: {str(e)}', ERROR)
+            self.queue.fail(task, e)
+            self.tasks_failed += 1
+        else:
+            if self.queue.complete(task, rows):
+                site.log(f'{task} done: {rows} products')
+            else:
+                site.log(f'{task} done after its lease ran out: {rows} products', WARNING)
+            self.tasks_done += 1
+        finally:
+            stop.set()
+            heartbeat.join()
+        self.finish_job(task.job_id)
+
+    def run(self):
+        """
+        Work through the queue until no task is queued or running.
+
+        Returns:
+            int: The number of tasks this worker finished.
+        """
+        try:
+            while True:
+                task = self.queue.claim(self.worker_id, self.lease)
+                if task is not None:
+                    self.work(task)
+                    continue
+                # Tasks given up on an expired lease can leave the last job unfinished.
+                for job_id in self.jobs:
+                    self.finish_job(job_id)
+                if not self.wait and not self.queue.pending():
+                    return self.tasks_done
+                time.sleep(self.poll_interval)
+        finally:
+            self.close()
+
+    def close(self):
+        for settings, site, store in self.jobs.values():
+            site.log(f'Worker {self.worker_id}: {self.tasks_done} tasks done, {self.tasks_failed} failed')
+            if site.enricher is not None:
+                site.enricher.close()
+            site.close_parse_pool()
+            site.metrics.unwatch(site.session())
+            site.save_metrics('success' if site.metrics.counters['rows'] else 'failure')
+            site.logger.close()
+            store.close()
+        self.jobs = {}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='webscrape-distributed',
+                                     description='Run a snapshot across several machines sharing a work queue.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinate = commands.add_parser('coordinate', help='discover the listings and queue their page ranges')
+    coordinate.add_argument('site', choices=[name for name, (adapter, _) in sites.items()
+                                             if issubclass(adapter, ListingSite)] + ['static', 'paginated'],
+                            help='a listing test site, or an adapter kind used with --url and --root-url')
+    coordinate.add_argument('--url', help='a listing URL of the site (adapter kinds only)')
+    coordinate.add_argument('--root-url', help='the e-commerce root the categories are discovered from')
+    coordinate.add_argument('--store', help='the snapshot database shared by the workers '
+                                            '(default: data/snapshots.sqlite under --home-dir)')
+    coordinate.add_argument('--pages-per-task', type=int, default=pages_per_task,
+                            help=f'listing pages in each task (default: {pages_per_task})')
+    coordinate.add_argument('--wait', action='store_true', help='wait until the workers have finished the job')
+    coordinate.add_argument('--timeout', type=float, help='with --wait, seconds to wait at most')
+    coordinate.add_argument('--parse-backend', choices=sorted(parsers))
+    coordinate.add_argument('--log-level', choices=list(log_levels))
+    coordinate.add_argument('--no-cache', dest='use_cache', action='store_const', const=False,
+                            help='always download instead of revalidating against the HTTP cache')
+    coordinate.add_argument('--max-pages', type=int, help='the highest page number a worker fetches (paginated sites)')
+    coordinate.add_argument('--max-workers', type=int, help='pages each worker fetches at the same time')
+    coordinate.add_argument('--rate', type=float, help='requests per second per host, for each worker (default: 10)')
+    coordinate.add_argument('--max-retries', type=int, help='retries after a failed request or a 429/5xx reply')
+    coordinate.add_argument('--enrich', dest='enrich_details', action='store_const', const=True,
+                            help='follow each product link for the full name, variants and specs')
+    coordinate.add_argument('--detail-workers', type=int, help='product pages fetched at the same time with --enrich')
+    coordinate.add_argument('--parse-workers', type=int, help='processes parsing pages on each worker')
+
+    work = commands.add_parser('work', help='claim and scrape tasks until the queue is empty')
+    work.add_argument('--worker-id', help='the name tasks are claimed under (default: host name and process id)')
+    work.add_argument('--lease', type=float, default=lease,
+                      help=f'seconds a task stays claimed without a heartbeat (default: {lease})')
+    work.add_argument('--poll-interval', type=float, default=poll_interval,
+                      help=f'seconds between claims while the queue is empty (default: {poll_interval})')
+    work.add_argument('--wait', action='store_true', help='keep polling for new jobs once the queue is empty')
+
+    status = commands.add_parser('status', help='show the tasks of a job in each state')
+    status.add_argument('--job', type=int, required=True)
+
+    for command in (coordinate, work, status):
+        command.add_argument('--queue', required=True,
+                             help='the shared work queue, such as sqlite:///shared/queue.sqlite')
+    for command in (coordinate, work):
+        command.add_argument('--home-dir', default='.',
+                             help='folder for the log file and the data, cache and metrics folders (default: .)')
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the coordinator, a worker or a status query from command-line arguments.
+
+    Returns:
+        int: 0 on success; 1 if the coordinator queued nothing or its job did
+        not complete, or the worker failed a task.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    queue = open_queue(args.queue)
+    try:
+        if args.command == 'status':
+            job = queue.job(args.job)
+            if job is None:
+                parser.error(f'no job {args.job} in {args.queue}')
+            print(f'Job {args.job} ({job["site"]}, run {job["settings"]["run_ts"]}): {job["status"]}')
+            for state, count in queue.counts(args.job).items():
+                print(f'  {state}: {count}')
+            return 0
+        if args.command == 'work':
+            worker = Worker(queue, args.home_dir, worker_id=args.worker_id, lease=args.lease,
+                            poll_interval=args.poll_interval, wait=args.wait)
+            worker.run()
+            return 1 if worker.tasks_failed else 0
+        options = {key: value for key, value in vars(args).items() if value is not None and key not in
+                   ('command', 'site', 'queue', 'home_dir', 'store', 'pages_per_task', 'wait', 'timeout')}
+        if 'log_level' in options:
+            options['log_level'] = log_levels[options['log_level']]
+        try:
+            coordinator = Coordinator(queue, args.site, args.home_dir, store_file=args.store,
+                                      pages_per_task=args.pages_per_task, **options)
+        except ValueError as e:
+            parser.error(str(e))
+        job_id = coordinator.plan()
+        if job_id is None:
+            return 1
+        print(f'Queued job {job_id}')
+        if args.wait:
+            status = coordinator.wait(job_id, timeout=args.timeout)
+            print(f'Job {job_id}: {status}')
+            return 0 if status == COMPLETE else 1
+        return 0
+    finally:
+        queue.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
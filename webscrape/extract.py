@@ -0,0 +1,104 @@
+"""
+Product card extraction shared by every site.
+
+All three test sites render a product as a 'product-wrapper' card with the
+same title link, price, description, rating and review count, so one
+single-pass extractor serves them all. The functions take an optional log
+callable instead of writing to a log file, so worker processes can import
+and run them without touching any scraper's log.
+"""
+from urllib.parse import urljoin
+
+from webscrape.logger import DEBUG, WARNING
+from webscrape.records import ProductRecord
+
+card_class = 'product-wrapper'
+
+# Columns that are logged as missing when a card has no value for them.
+checked_columns = ['Product Name', 'Product Price', 'Product Description', 'Rating', 'Reviews',
+                   'Product ID', 'Product URL']
+
+
+def _no_log(message, level=None):
+    pass
+
+
+def card_rating(card):
+    """
+    Return the star rating of a product card.
+
+    The 'data-rating' attribute is used when the card has one; otherwise the
+    star icons inside the ratings block are counted.
+
+    Args:
+        card (BeautifulSoup): A 'product-wrapper' div element.
+
+    Returns:
+        str: The rating as a digit string, or an empty string if the card
+        shows no rating.
+    """
+    rating = card.find('p', {'data-rating': True})
+    if rating is not None:
+        return rating.get('data-rating')
+    ratings = card.find('div', class_='ratings')
+    if ratings is not None:
+        return str(len(ratings.find_all('span', class_='ws-icon-star')))
+    return ''
+
+
+def extract_product(card, base_url='', log=None, log_debug=False):
+    """
+    Extract a single product record from a product card.
+
+    Every field is looked up inside the card it belongs to. A field missing
+    from the card is stored as an empty string and logged instead of
+    shifting the remaining products out of line.
+
+    Args:
+        card (BeautifulSoup): A 'product-wrapper' div element for one product.
+        base_url (str): The URL of the page, used to make the product link absolute.
+        log (callable, optional): Called with (message, level).
+        log_debug (bool): Also log every product at DEBUG level. Off by
+            default, so the message is not even formatted unless DEBUG lines
+            are written.
+
+    Returns:
+        ProductRecord: The product, including its URL and id from the title link.
+    """
+    log = log or _no_log
+    name = card.find('a', class_='title')
+    price = card.find('h4', class_='price')
+    description = card.find('p', class_='description')
+    review = card.find('p', class_='review-count')
+
+    product = ProductRecord(
+        name=name.text.strip() if name else '',
+        price=price.text.strip() if price else '',
+        description=description.text.strip() if description else '',
+        rating=card_rating(card),
+        reviews=''.join(filter(str.isdigit, review.text.strip())) if review else '',
+        url=urljoin(base_url, name['href']) if name and name.get('href') else '',
+    )
+    for column in checked_columns:
+        if product.get(column) == '':
+            log(f'Missing {column} for product: {product.name}', WARNING)
+    if log_debug:
+        log(f'Product: {product}', DEBUG)
+    return product
+
+
+def extract_products(boxes, base_url='', log=None, log_debug=False):
+    """
+    Extract every product from parsed listing pages in a single pass.
+
+    Args:
+        boxes (list): BeautifulSoup elements holding product cards, one per page.
+        base_url (str): The URL of the listing, used to make product links absolute.
+        log (callable, optional): Called with (message, level).
+        log_debug (bool): Also log every product at DEBUG level; see extract_product().
+
+    Returns:
+        list: ProductRecord objects, one per card, in page order.
+    """
+    return [extract_product(card, base_url, log, log_debug)
+            for box in boxes for card in box.find_all('div', class_=card_class)]
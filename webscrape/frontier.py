@@ -0,0 +1,268 @@
+"""
+Persistent URL frontier for large crawls.
+
+URLFrontier decides which URL a crawl fetches next and remembers every URL
+it has seen, without keeping the URLs in memory:
+
+- the seen-set is a Bloom filter (about 1.2 bytes per URL at a 1% false
+  positive rate) in front of an exact set in SQLite. A URL the filter has
+  never seen is new for certain; only a possible hit is checked on disk;
+- the queue lives in the same SQLite table and is popped by priority, so
+  category and listing pages are fetched before product detail pages;
+- the filter is saved next to the database, and URLs that were in flight
+  or had failed when a crawl stopped go back to the queue when it is opened
+  again, so a restarted crawl carries on, retrying the failures, instead of
+  re-enqueueing everything.
+"""
+import hashlib
+import math
+import os
+import sqlite3
+import struct
+import tempfile
+
+# Lower values are fetched first.
+priorities = {
+    'root': 0,
+    'category': 1,
+    'subcategory': 2,
+    'page': 3,
+    'product': 9,
+}
+default_priority = 5
+
+QUEUED = 0
+IN_PROGRESS = 1
+DONE = 2
+FAILED = 3
+
+_schema = """
+CREATE TABLE IF NOT EXISTS urls (
+    seq INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS urls_queue ON urls (state, priority, seq);
+"""
+
+_bloom_header = struct.Struct('<QQQ')
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter over strings.
+
+    The filter cannot tell how many distinct items it holds, so ``count``
+    is kept by the owner and saved with the bits.
+
+    Args:
+        capacity (int): The number of items the filter is sized for. More
+            items still work, at a higher false positive rate.
+        error_rate (float): The false positive rate at capacity.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        # Optimal sizing: m = -n ln p / (ln 2)^2 bits and k = m / n ln 2 hashes.
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = struct.unpack('<QQ', digest)
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hashes)]
+
+    def add(self, item):
+        """
+        Add an item.
+
+        Returns:
+            bool: True if the item was certainly not in the filter before,
+            False if it may have been.
+        """
+        bits = self.bits
+        new = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                new = True
+        return new
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def save(self, path):
+        """
+        Write the filter to a file atomically.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_bloom_header.pack(self.size, self.hashes, self.count))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a filter written by save().
+
+        Returns:
+            BloomFilter or None: The filter, or None if the file is missing or damaged.
+        """
+        try:
+            with open(path, 'rb') as f:
+                size, hashes, count = _bloom_header.unpack(f.read(_bloom_header.size))
+                bits = bytearray(f.read())
+        except (OSError, struct.error):
+            return None
+        if len(bits) != (size + 7) // 8:
+            return None
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hashes, bloom.count, bloom.bits = size, hashes, count, bits
+        return bloom
+
+
+class URLFrontier:
+    """
+    A deduplicating priority queue of URLs, optionally kept on disk.
+
+    Args:
+        path (str, optional): The SQLite file. Without one the frontier
+            lives in memory and is lost when the crawl ends.
+        capacity (int): The URL count the Bloom filter is sized for.
+        error_rate (float): The Bloom filter's false positive rate at capacity.
+    """
+
+    def __init__(self, path=None, capacity=1_000_000, error_rate=0.01):
+        self.path = path
+        self.bloom_path = path + '.bloom' if path else None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path or ':memory:')
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_schema)
+        with self.conn:
+            # URLs in flight when the last crawl stopped were never finished,
+            # and failed ones are worth another try.
+            self.conn.execute('UPDATE urls SET state = ? WHERE state IN (?, ?)', (QUEUED, IN_PROGRESS, FAILED))
+        known = self.conn.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+        self.bloom = BloomFilter.load(self.bloom_path) if self.bloom_path else None
+        if self.bloom is None or self.bloom.count != known:
+            self.bloom = BloomFilter(max(capacity, known * 2), error_rate)
+            for (url,) in self.conn.execute('SELECT url FROM urls'):
+                self.bloom.add(url)
+            self.bloom.count = known
+        self.exact_lookups = 0
+
+    def _is_new(self, url):
+        # Adding first costs one hash pass instead of two; the bits of a
+        # URL already seen are all set, so adding it again changes nothing.
+        if self.bloom.add(url):
+            return True
+        self.exact_lookups += 1
+        return self.conn.execute('SELECT 1 FROM urls WHERE url = ?', (url,)).fetchone() is None
+
+    def add_many(self, links):
+        """
+        Queue the URLs not seen before, in one transaction.
+
+        Args:
+            links (iterable): (url, kind) tuples. The kind sets the priority; see ``priorities``.
+
+        Returns:
+            list: The URLs that were new, in the order given.
+        """
+        added = {}
+        for url, kind in links:
+            if url in added or not self._is_new(url):
+                continue
+            added[url] = (url, kind, priorities.get(kind, default_priority))
+        if added:
+            with self.conn:
+                self.conn.executemany('INSERT INTO urls (url, kind, priority) VALUES (?, ?, ?)', added.values())
+            self.bloom.count += len(added)
+        return list(added)
+
+    def add(self, url, kind):
+        """
+        Queue a URL if it has not been seen before.
+
+        Returns:
+            bool: True if the URL was new.
+        """
+        return bool(self.add_many([(url, kind)]))
+
+    def pop(self, count=1):
+        """
+        Take the highest-priority queued URLs and mark them in progress.
+
+        Args:
+            count (int): The most URLs to take.
+
+        Returns:
+            list: (url, kind) tuples, listing pages before detail pages and
+            in the order they were found within a priority.
+        """
+        if count <= 0:
+            return []
+        with self.conn:
+            rows = self.conn.execute('SELECT seq, url, kind FROM urls WHERE state = ? ORDER BY priority, seq LIMIT ?',
+                                     (QUEUED, count)).fetchall()
+            self.conn.executemany('UPDATE urls SET state = ? WHERE seq = ?', [(IN_PROGRESS, seq) for seq, _, _ in rows])
+        return [(url, kind) for _, url, kind in rows]
+
+    def done(self, url, failed=False):
+        """
+        Mark a URL as finished, successfully or not.
+        """
+        with self.conn:
+            self.conn.execute('UPDATE urls SET state = ? WHERE url = ?', (FAILED if failed else DONE, url))
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM urls WHERE state IN (?, ?)',
+                                 (QUEUED, IN_PROGRESS)).fetchone()[0]
+
+    def stats(self):
+        """
+        Return the URL count in each state and the exact lookups made.
+        """
+        counts = dict(self.conn.execute('SELECT state, COUNT(*) FROM urls GROUP BY state').fetchall())
+        return {
+            'queued': counts.get(QUEUED, 0) + counts.get(IN_PROGRESS, 0),
+            'done': counts.get(DONE, 0),
+            'failed': counts.get(FAILED, 0),
+            'exact_lookups': self.exact_lookups,
+            'bloom_bytes': len(self.bloom.bits),
+        }
+
+    def save(self):
+        """
+        Save the Bloom filter next to the database, so the next open does not rebuild it.
+        """
+        if self.bloom_path:
+            self.bloom.save(self.bloom_path)
+
+    def close(self):
+        """
+        Save the Bloom filter and close the database.
+        """
+        self.save()
+        self.conn.close()
+
+    def clear(self):
+        """
+        Close the frontier and delete its files, once a crawl has finished.
+        """
+        self.conn.close()
+        if self.path:
+            for path in (self.path, self.path + '-wal', self.path + '-shm', self.bloom_path):
+                if os.path.exists(path):
+                    os.remove(path)
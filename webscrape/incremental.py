@@ -0,0 +1,166 @@
+"""
+Incremental scraping state: content hashes from the previous run.
+
+IncrementalState remembers a hash of every listing page and of every product
+seen on it. A page whose hash has not changed since the last run does not
+need to be parsed again: its products are carried over from the saved state.
+Comparing the products of this run with the previous one gives the delta of
+added, removed and changed products.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from webscrape.records import ProductRecord
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+
+def content_hash(data):
+    """
+    Return a stable hex digest of page content or a product record.
+
+    Args:
+        data (bytes, str or ProductRecord): Raw page content, or a product record.
+
+    Returns:
+        str: The SHA-256 hex digest.
+    """
+    if isinstance(data, ProductRecord):
+        data = data.as_dict()
+    if isinstance(data, dict):
+        data = json.dumps(data, sort_keys=True)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def product_key(product):
+    """
+    Return the key that identifies a product between runs.
+
+    The id from the product link is used; cards without a link fall back to
+    the name and full description together.
+
+    Args:
+        product (ProductRecord): A product record.
+
+    Returns:
+        str: The product key.
+    """
+    return product.key()
+
+
+class IncrementalState:
+    """
+    Page and product hashes from the previous run, and the ones seen in this run.
+
+    The state file is JSON of the form
+    ``{"pages": {url: {"hash": ..., "products": {key: record}}}}``, with each
+    record stored as a dictionary keyed by output column names.
+
+    Args:
+        path (str): The state file. A missing file means a first run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.previous = {}
+        self.current = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.previous = json.load(f).get('pages', {})
+            for page in self.previous.values():
+                records = (ProductRecord.from_dict(product) for product in page['products'].values())
+                page['products'] = {product_key(record): record for record in records}
+
+    def page_unchanged(self, url, content):
+        """
+        Check a page against the previous run, carrying it over if unchanged.
+
+        When the hash matches, the page's products from the previous run are
+        recorded for this run as well, so the caller can skip parsing it.
+
+        Args:
+            url (str): The URL of the page.
+            content (bytes or str): The raw page content.
+
+        Returns:
+            bool: True if the page is identical to the previous run.
+        """
+        previous = self.previous.get(url)
+        if previous is None or previous['hash'] != content_hash(content):
+            return False
+        self.current[url] = previous
+        return True
+
+    def page_products(self, url):
+        """
+        Return the products recorded for a page in this run.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            list: The product records, in page order.
+        """
+        return list(self.current.get(url, {}).get('products', {}).values())
+
+    def update_page(self, url, content, products):
+        """
+        Record the hash and freshly extracted products of a changed page.
+
+        Args:
+            url (str): The URL of the page.
+            content (bytes or str): The raw page content.
+            products (list): The product records extracted from the page.
+        """
+        self.current[url] = {
+            'hash': content_hash(content),
+            'products': {product_key(product): product for product in products},
+        }
+
+    def snapshot(self):
+        """
+        Return every product seen in this run, parsed or carried over.
+
+        Returns:
+            list: The product records, in page order.
+        """
+        return [product for page in self.current.values() for product in page['products'].values()]
+
+    def delta(self):
+        """
+        Compare this run's products with the previous run's.
+
+        Returns:
+            list: (change, product) tuples, where change is 'added',
+            'removed' or 'changed'. Removed products carry their last known
+            record.
+        """
+        before = {key: product for page in self.previous.values() for key, product in page['products'].items()}
+        after = {key: product for page in self.current.values() for key, product in page['products'].items()}
+        changes = []
+        for key, product in after.items():
+            if key not in before:
+                changes.append((ADDED, product))
+            elif content_hash(before[key]) != content_hash(product):
+                changes.append((CHANGED, product))
+        for key, product in before.items():
+            if key not in after:
+                changes.append((REMOVED, product))
+        return changes
+
+    def save(self):
+        """
+        Write this run's state, replacing the previous state file atomically.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'pages': self.current}, f, default=ProductRecord.as_dict)
+        os.replace(tmp_path, self.path)
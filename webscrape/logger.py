@@ -0,0 +1,155 @@
+"""
+Buffered, queue-backed file logger.
+
+Opening the log file, appending one line and closing it again for every
+message turns logging into hundreds of syscalls per page. BufferedLogger
+keeps the file open, accepts messages into a bounded in-memory queue and
+writes them from a background thread in batches, flushing the file at a
+fixed interval. Each line is stamped with the time the message was logged.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+time_format = '%Y-%m-%d %H:%M:%S'
+batch_size = 1000  # most lines written in one call
+
+# Control markers passed through the queue alongside messages.
+_flush = object()
+_stop = object()
+
+
+class BufferedLogger:
+    """
+    Write log lines to a file from a background thread.
+
+    Messages below the logger's level are dropped without being queued.
+    Per-product DEBUG lines are only formatted when the level lets them
+    through (see log_debug in webscrape/extract.py), so they cost nothing
+    unless they are switched on. When
+    the queue is full, log() blocks until the writer catches up rather than
+    losing messages.
+
+    Args:
+        path (str): The log file to write to.
+        level (int): The lowest level that is written. Defaults to INFO.
+        buffer_size (int): The maximum number of queued messages.
+        flush_interval (float): Seconds between flushes of the file.
+    """
+
+    def __init__(self, path, level=INFO, buffer_size=10000, flush_interval=1.0):
+        self.path = path
+        self.level = level
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._thread = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def start(self, clear=True):
+        """
+        Open the log file and start the writer thread.
+
+        Calling start() on a running logger does nothing. Messages logged
+        before start() are kept in the queue; log() starts the logger on
+        first use if it has not been started, appending to the file rather
+        than clearing it.
+
+        Args:
+            clear (bool): Truncate the log file before writing. Defaults to True.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, 'w' if clear else 'a')
+            if clear:
+                self._file.write(f'{time.strftime(time_format)} - Log cleared\n')
+            self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def log(self, message, level=INFO):
+        """
+        Queue a message for writing.
+
+        Args:
+            message (str): The message to log.
+            level (int): The level of the message. Defaults to INFO.
+        """
+        if level < self.level:
+            return
+        if self._thread is None:
+            self.start(clear=False)
+        self._queue.put((time.time(), level, message))
+
+    def debug(self, message):
+        self.log(message, DEBUG)
+
+    def info(self, message):
+        self.log(message, INFO)
+
+    def warning(self, message):
+        self.log(message, WARNING)
+
+    def error(self, message):
+        self.log(message, ERROR)
+
+    def flush(self):
+        """
+        Block until every queued message has been written and flushed.
+        """
+        if self._thread is not None:
+            self._queue.put(_flush)
+            self._queue.join()
+
+    def close(self):
+        """
+        Write out any queued messages, stop the writer thread and close the file.
+        """
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(_stop)
+            self._thread.join()
+            self._file.close()
+            self._thread = None
+            self._file = None
+
+    def _format(self, timestamp, level, message):
+        stamp = time.strftime(time_format, time.localtime(timestamp))
+        if level == INFO:
+            return f'{stamp} - {message}\n'
+        return f'{stamp} - {logging.getLevelName(level)} - {message}\n'
+
+    def _run(self):
+        last_flush = time.monotonic()
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            # Drain whatever else is already queued into the same write.
+            while batch and len(batch) < batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [self._format(*entry) for entry in batch if isinstance(entry, tuple)]
+            if lines:
+                self._file.write(''.join(lines))
+            if _flush in batch or _stop in batch or time.monotonic() - last_flush >= self.flush_interval:
+                self._file.flush()
+                last_flush = time.monotonic()
+            running = _stop not in batch
+            for _ in batch:
+                self._queue.task_done()
@@ -0,0 +1,259 @@
+"""
+Per-stage timing and counters for a scrape run.
+
+RunMetrics times the stages of a run (fetching, parsing, each extractor,
+join, the output writers) and counts pages, rows, bytes fetched, HTTP
+requests and retries. At the end of a run the results are written as a JSON
+run summary and as a Prometheus textfile, which node_exporter's textfile
+collector can pick up, so the stage that is eating the time can be seen in
+production.
+
+Stage times are inclusive: a stage that calls another, such as extract()
+calling fetch_page(), includes the time of the inner stage.
+"""
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+counter_names = ('pages', 'rows', 'bytes', 'requests', 'retries')
+
+# Prometheus help text for each counter, as exported per run.
+_counter_help = {
+    'pages': 'Listing pages processed in the last run.',
+    'rows': 'Product rows written in the last run.',
+    'bytes': 'Response bytes fetched in the last run.',
+    'requests': 'HTTP requests made in the last run.',
+    'retries': 'Fetch attempts retried in the last run.',
+}
+
+
+class RunMetrics:
+    """
+    Stage durations and run counters for one scraper run.
+
+    All methods are thread-safe, so stages timed inside worker threads are
+    added up.
+
+    Args:
+        site (str): The scraper name, used as the 'site' label.
+    """
+
+    def __init__(self, site):
+        self.site = site
+        self.started = None
+        self.finished = None
+        self.status = None
+        self.stages = {}
+        self.counters = dict.fromkeys(counter_names, 0)
+        self._start = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Mark the start of the run, clearing the stages and counters of any earlier run.
+
+        A site adapter keeps its RunMetrics across runs, so each run starts from zero.
+        """
+        with self._lock:
+            self.stages = {}
+            self.counters = dict.fromkeys(counter_names, 0)
+        self.finished = None
+        self.status = None
+        self.started = datetime.now()
+        self._start = time.perf_counter()
+
+    def finish(self, status='success'):
+        """
+        Mark the end of the run.
+
+        Args:
+            status (str): 'success' or 'failure'.
+        """
+        self.finished = datetime.now()
+        self.status = status
+        self._duration = time.perf_counter() - self._start if self._start is not None else 0.0
+
+    def record(self, stage, seconds):
+        """
+        Add one timed call of a stage.
+
+        Args:
+            stage (str): The stage name.
+            seconds (float): How long the call took.
+        """
+        with self._lock:
+            totals = self.stages.setdefault(stage, {'seconds': 0.0, 'calls': 0})
+            totals['seconds'] += seconds
+            totals['calls'] += 1
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time the enclosed block as one call of a stage.
+
+        Args:
+            name (str): The stage name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name=None):
+        """
+        Decorate a function so each call is timed as a stage.
+
+        Args:
+            name (str, optional): The stage name. Defaults to the function name.
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or function.__name__):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def add(self, **counts):
+        """
+        Increase run counters.
+
+        Args:
+            **counts: Amounts to add, keyed by counter name: pages, rows,
+                bytes, requests or retries.
+        """
+        with self._lock:
+            for name, value in counts.items():
+                self.counters[name] += value
+
+    def watch(self, session):
+        """
+        Count the requests and response bytes of a requests session.
+
+        A response hook is added to the session; calling watch() again for
+        the same session does nothing. Remove it with unwatch() when the run ends.
+
+        Args:
+            session (requests.Session): The session to watch.
+        """
+        hooks = session.hooks.setdefault('response', [])
+        if not any(getattr(hook, '__self__', None) is self for hook in hooks):
+            hooks.append(self._count_response)
+
+    def unwatch(self, session):
+        """
+        Stop counting the requests of a session passed to watch().
+
+        The shared session outlives the run, so a run removes its hook when
+        it ends; otherwise every later run on the session would also count
+        its requests into this one.
+
+        Args:
+            session (requests.Session): The watched session.
+        """
+        hooks = session.hooks.get('response', [])
+        hooks[:] = [hook for hook in hooks if getattr(hook, '__self__', None) is not self]
+
+    def _count_response(self, response, *args, **kwargs):
+        self.add(requests=1, bytes=len(response.content))
+
+    def summary(self):
+        """
+        Return the run summary.
+
+        Returns:
+            dict: The site, start and finish times, status, duration, the
+            seconds and calls of every stage and the run counters.
+        """
+        with self._lock:
+            stages = {name: dict(totals) for name, totals in self.stages.items()}
+            counters = dict(self.counters)
+        return {
+            'site': self.site,
+            'started': self.started.isoformat(timespec='seconds') if self.started else None,
+            'finished': self.finished.isoformat(timespec='seconds') if self.finished else None,
+            'status': self.status,
+            'duration_seconds': getattr(self, '_duration', None),
+            'stages': stages,
+            'counters': counters,
+        }
+
+    def prometheus(self):
+        """
+        Return the run in the Prometheus text exposition format.
+
+        Returns:
+            str: Gauges for the run duration, status, finish time, per-stage
+            seconds and calls, and every counter, labelled with the site.
+        """
+        summary = self.summary()
+        site = _label(self.site)
+        lines = [
+            '# HELP scraper_run_duration_seconds Duration of the last run.',
+            '# TYPE scraper_run_duration_seconds gauge',
+            f'scraper_run_duration_seconds{{site="{site}"}} {summary["duration_seconds"] or 0:.6f}',
+            '# HELP scraper_run_success Whether the last run succeeded.',
+            '# TYPE scraper_run_success gauge',
+            f'scraper_run_success{{site="{site}"}} {1 if summary["status"] == "success" else 0}',
+            '# HELP scraper_run_finished_timestamp_seconds When the last run finished.',
+            '# TYPE scraper_run_finished_timestamp_seconds gauge',
+            f'scraper_run_finished_timestamp_seconds{{site="{site}"}} '
+            f'{self.finished.timestamp() if self.finished else 0:.0f}',
+            '# HELP scraper_stage_duration_seconds Time spent in each stage in the last run.',
+            '# TYPE scraper_stage_duration_seconds gauge',
+        ]
+        for name, totals in summary['stages'].items():
+            lines.append(f'scraper_stage_duration_seconds{{site="{site}",stage="{_label(name)}"}} '
+                         f'{totals["seconds"]:.6f}')
+        lines += [
+            '# HELP scraper_stage_calls Calls of each stage in the last run.',
+            '# TYPE scraper_stage_calls gauge',
+        ]
+        for name, totals in summary['stages'].items():
+            lines.append(f'scraper_stage_calls{{site="{site}",stage="{_label(name)}"}} {totals["calls"]}')
+        for name, value in summary['counters'].items():
+            lines += [
+                f'# HELP scraper_{name} {_counter_help[name]}',
+                f'# TYPE scraper_{name} gauge',
+                f'scraper_{name}{{site="{site}"}} {value}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path):
+        """
+        Write the run summary as JSON.
+
+        Args:
+            path (str): The JSON file.
+        """
+        _write_atomic(path, json.dumps(self.summary(), indent=2) + '\n')
+
+    def write_prometheus(self, path):
+        """
+        Write the run as a Prometheus textfile.
+
+        The file is replaced in one step, so a collector never reads half of it.
+
+        Args:
+            path (str): The textfile, which should end in '.prom'.
+        """
+        _write_atomic(path, self.prometheus())
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
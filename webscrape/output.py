@@ -0,0 +1,237 @@
+"""
+Streaming CSV and Parquet output.
+
+StreamingCSVWriter appends rows to a ``.part`` file next to the target as
+soon as each page's products are extracted, so memory stays flat however
+many pages a crawl covers. When the run finishes, the part file is renamed
+over the target in one atomic step; if the run crashes, the rows written so
+far are left in the part file.
+
+StreamingParquetWriter has the same interface and writes typed, compressed
+Parquet row groups, and TeeWriter sends the same rows to several writers.
+"""
+import csv
+import os
+
+from webscrape.records import ProductBatch
+from webscrape.typed import arrow_schema, to_typed
+
+
+class StreamingCSVWriter:
+    """
+    Write product records to a CSV file page by page.
+
+    Use it as a context manager: leaving the block normally publishes the
+    file with close(), and leaving it with an exception keeps the partial
+    ``.part`` file with abort().
+
+    Args:
+        filename (str): The final CSV path.
+        columns (list): The columns to write, in order. Record fields outside
+            this list are ignored.
+    """
+
+    def __init__(self, filename, columns):
+        self.filename = filename
+        self.part_filename = filename + '.part'
+        self.columns = columns
+        self.rows = 0
+        self._file = None
+        self._writer = None
+
+    def open(self):
+        """
+        Create the part file and write the header row.
+        """
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.part_filename, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        self._writer.writerow(self.columns)
+        return self
+
+    def write_rows(self, records):
+        """
+        Append records to the part file and flush them to the OS.
+
+        Args:
+            records (list): ProductRecord objects.
+
+        Returns:
+            int: The number of rows written by this call.
+        """
+        if self._writer is None:
+            self.open()
+        self._writer.writerows(record.values(self.columns) for record in records)
+        self._file.flush()
+        self.rows += len(records)
+        return len(records)
+
+    def close(self):
+        """
+        Close the part file and atomically rename it to the final filename.
+        """
+        if self._file is None:
+            self.open()
+        self._file.close()
+        self._file = None
+        self._writer = None
+        os.replace(self.part_filename, self.filename)
+
+    def abort(self):
+        """
+        Close the part file without publishing it, keeping the rows written so far.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class StreamingParquetWriter:
+    """
+    Write product records to a compressed, typed Parquet file.
+
+    Records are buffered until row_group_size rows are waiting, converted
+    with to_typed() in one vectorized pass and written as a row group. Like
+    StreamingCSVWriter, the file is built as ``.part`` and renamed into place
+    by close(). Requires pyarrow.
+
+    Args:
+        filename (str): The final Parquet path.
+        columns (list): The columns to write, in order.
+        compression (str): The Parquet codec. Defaults to 'zstd'.
+        row_group_size (int): Rows buffered before a row group is written.
+    """
+
+    def __init__(self, filename, columns, compression='zstd', row_group_size=10000):
+        self.filename = filename
+        self.part_filename = filename + '.part'
+        self.columns = columns
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._buffer = []
+        self._writer = None
+
+    def open(self):
+        """
+        Create the part file with the typed schema.
+        """
+        import pyarrow.parquet as pq
+
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(directory, exist_ok=True)
+        self._writer = pq.ParquetWriter(self.part_filename, arrow_schema(self.columns),
+                                        compression=self.compression)
+        return self
+
+    def write_rows(self, records):
+        """
+        Buffer records, writing a row group once enough are waiting.
+
+        Args:
+            records (list): ProductRecord objects.
+
+        Returns:
+            int: The number of rows accepted by this call.
+        """
+        if self._writer is None:
+            self.open()
+        self._buffer.extend(records)
+        self.rows += len(records)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+        return len(records)
+
+    def _flush(self):
+        import pyarrow as pa
+
+        if not self._buffer:
+            return
+        df = to_typed(ProductBatch(self._buffer).to_frame(self.columns))
+        table = pa.Table.from_pandas(df, schema=arrow_schema(self.columns), preserve_index=False)
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def close(self):
+        """
+        Write the remaining rows, close the file and rename it into place.
+        """
+        if self._writer is None:
+            self.open()
+        self._flush()
+        self._writer.close()
+        self._writer = None
+        os.replace(self.part_filename, self.filename)
+
+    def abort(self):
+        """
+        Write the buffered rows and close the part file without publishing it.
+        """
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class TeeWriter:
+    """
+    Send the same records to several streaming writers.
+
+    Args:
+        writers (list): Writers with open(), write_rows(), close() and abort().
+    """
+
+    def __init__(self, writers):
+        self.writers = writers
+        self.rows = 0
+
+    def open(self):
+        for writer in self.writers:
+            writer.open()
+        return self
+
+    def write_rows(self, records):
+        for writer in self.writers:
+            writer.write_rows(records)
+        self.rows += len(records)
+        return len(records)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+    def abort(self):
+        for writer in self.writers:
+            writer.abort()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
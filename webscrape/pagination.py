@@ -0,0 +1,122 @@
+"""
+Concurrent fetching of numbered listing pages.
+
+Paginated categories are addressed as ``<url>?page=N``. Fetching them one
+after another makes a crawl take the sum of every page's latency; the
+functions here fetch a bounded number of pages at a time over the shared
+session, so a category takes roughly as long as its slowest page.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from webscrape.session import fetch, get_session
+
+max_workers = 8
+
+
+def page_url(url, page):
+    """
+    Build the URL of a numbered listing page.
+
+    Args:
+        url (str): The base URL of the category.
+        page (int): The 1-based page number.
+
+    Returns:
+        str: The URL of the page.
+    """
+    separator = '&' if '?' in url else '?'
+    return f'{url}{separator}page={page}'
+
+
+def iter_pages(url, parse, max_pages=20, max_workers=max_workers, session=None, cache=None,
+               headers=None, limiter=None, threaded_parse=False, first_page=1, log=None):
+    """
+    Fetch numbered pages concurrently and yield the parsed pages in order.
+
+    Pages first_page to max_pages are submitted to a thread pool of at most
+    max_workers threads. Results are then read back in page order, and the
+    crawl stops at the end of the listing: the first page that returns a 404
+    or that parse() reports as empty. Pages after it that have not started
+    yet are cancelled and any that already finished are discarded. Each page
+    is yielded as soon as it and every page before it are ready, so callers
+    can process and drop a page while later ones are still downloading.
+
+    Any other failure, such as a 5xx reply left after the limiter's retries
+    or a connection error, raises instead of ending the listing early, so a
+    run that lost pages fails rather than writing a truncated snapshot.
+
+    Args:
+        url (str): The base URL of the category.
+        parse (callable): Called with each successful response. Returns the
+            parsed page, or None when the page holds no products.
+        max_pages (int): The highest page number to request.
+        max_workers (int): The maximum number of pages fetched at once.
+        session (requests.Session, optional): The session to fetch with.
+            Defaults to the shared session.
+        cache (webscrape.cache.ResponseCache, optional): A response cache
+            to revalidate pages against.
+        headers (dict, optional): Extra headers sent with every page request.
+        limiter (webscrape.ratelimit.RateLimiter, optional): Per-host rate
+            limits and retries applied to every page request.
+        threaded_parse (bool): Call parse() in the fetch threads as soon as
+            each page arrives, instead of in the calling thread. Meant for
+            parse functions that hand the page to a process pool and wait.
+        first_page (int): The page to start from, such as the first page
+            missing from a checkpoint.
+        log (callable, optional): Called with progress messages.
+
+    Yields:
+        The parsed pages, in page order, up to the first empty page.
+
+    Raises:
+        RuntimeError: If a page could not be fetched or returned a status
+            other than 200 or 404.
+    """
+    session = session or get_session()
+    log = log or (lambda message: None)
+
+    def fetch_page(page):
+        response = fetch(page_url(url, page), session=session, cache=cache, limiter=limiter, headers=headers)
+        if threaded_parse and response.status_code == 200:
+            return response, parse(response)
+        return response, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(fetch_page, page) for page in range(first_page, max_pages + 1)]
+        try:
+            for page, future in enumerate(futures, start=first_page):
+                try:
+                    response, parsed = future.result()
+                except Exception as e:
+                    raise RuntimeError(f'Page {page} of {url} could not be fetched: {str(e)}') from e
+                if response.status_code == 404:
+                    log(f'Stopping at page {page}: status code 404')
+                    return
+                if response.status_code != 200:
+                    raise RuntimeError(f'Page {page} of {url} returned status code {response.status_code}')
+                if not threaded_parse:
+                    parsed = parse(response)
+                if parsed is None:
+                    log(f'Stopping at page {page}: no products found')
+                    return
+                log(f'Scraped page {page} from {page_url(url, page)}')
+                yield parsed
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def fetch_pages(url, parse, **kwargs):
+    """
+    Fetch numbered pages concurrently and return the parsed pages in order.
+
+    Args:
+        url (str): The base URL of the category.
+        parse (callable): Called with each successful response. Returns the
+            parsed page, or None when the page holds no products.
+        **kwargs: Extra arguments passed to iter_pages().
+
+    Returns:
+        list: The parsed pages, in page order, up to the first empty page.
+    """
+    return list(iter_pages(url, parse, **kwargs))
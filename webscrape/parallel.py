@@ -0,0 +1,169 @@
+"""
+Process-pool parsing of fetched pages.
+
+Parsing with lxml and BeautifulSoup and walking the product cards is
+CPU-bound Python, so with fetching already concurrent it runs on one core
+and becomes the bottleneck. ParsePool hands raw page bodies to worker
+processes instead. Each worker parses the page, extracts the cards and
+returns only compact ProductRecord objects, never soup objects, together
+with the log messages it produced, which the calling process writes to its
+own log.
+
+The fetch threads submit a page as soon as it arrives and wait for its
+result, so as many pages are parsed at once as there are workers.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+
+from webscrape.crawl import discover_links
+from webscrape.extract import card_class, extract_products
+from webscrape.logger import DEBUG, INFO, WARNING
+from webscrape.parse import default_backend, parse_listing, release
+
+
+class _Messages(list):
+    """
+    A log callable that keeps messages at or above a level, to send back from a worker.
+    """
+
+    def __init__(self, level):
+        super().__init__()
+        self.level = level
+
+    def __call__(self, message, level=INFO):
+        if level >= self.level:
+            self.append((message, level))
+
+    def __bool__(self):
+        # Still a log callable while empty; extract_product() replaces a false log with a no-op.
+        return True
+
+
+def parse_listing_page(html, base_url='', backend=default_backend, log_level=WARNING):
+    """
+    Parse a listing page and extract its products, in a worker process.
+
+    Args:
+        html (str or bytes): The page body.
+        base_url (str): The URL product links are resolved against.
+        backend (str): The parse backend; see webscrape/parse.py.
+        log_level (int): The lowest level of the messages returned.
+
+    Returns:
+        tuple or None: (records, messages), or None if the page holds no
+        product cards.
+    """
+    box = parse_listing(html, backend)
+    if box is None or box.find('div', class_=card_class) is None:
+        release(box)
+        return None
+    log = _Messages(log_level)
+    records = extract_products([box], base_url, log, log_level <= DEBUG)
+    release(box)
+    return records, log
+
+
+def parse_xhr_page(text, base_url='', log_level=WARNING):
+    """
+    Extract the products of one replayed XHR response, in a worker process.
+
+    Returns:
+        tuple or None: (records, messages), or None if the response holds no products.
+    """
+    from webscrape.ajax import parse_xhr_text
+
+    log = _Messages(log_level)
+    records = parse_xhr_text(text, lambda box: extract_products([box], base_url, log, log_level <= DEBUG),
+                             base_url)
+    return (records, log) if records else None
+
+
+def parse_crawl_page(html, page_url, root_url, listing, base_url='', log_level=WARNING):
+    """
+    Find the links of a crawled page and, on listing pages, its products, in a worker process.
+
+    Args:
+        html (str or bytes): The page body.
+        page_url (str): The URL of the page.
+        root_url (str): The e-commerce root URL of the crawl.
+        listing (bool): Whether the page is a listing whose products are wanted.
+        base_url (str): The URL product links are resolved against.
+        log_level (int): The lowest level of the messages returned.
+
+    Returns:
+        tuple: (links, records, messages). links are (url, kind) tuples;
+        records is None on pages that are not listings.
+    """
+    soup = BeautifulSoup(html, 'lxml')
+    links = discover_links(soup, page_url, root_url)
+    log = _Messages(log_level)
+    records = None
+    if listing:
+        box = soup.find('div', class_='col-lg-9')
+        records = extract_products([box], base_url, log, log_level <= DEBUG) if box else []
+    release(soup)
+    return links, records, log
+
+
+class ParsePool:
+    """
+    A pool of worker processes that parse pages and extract products.
+
+    Args:
+        workers (int, optional): The number of processes. Defaults to the CPU count.
+        backend (str): The parse backend for listing pages.
+        base_url (str): The URL product links are resolved against.
+        log_level (int): The lowest level of the worker messages returned.
+    """
+
+    def __init__(self, workers=None, backend=default_backend, base_url='', log_level=WARNING):
+        self.workers = workers or os.cpu_count() or 1
+        self.backend = backend
+        self.base_url = base_url
+        self.log_level = log_level
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _submit(self, function, *args):
+        future = self.executor.submit(function, *args)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def listing(self, html):
+        """
+        Submit a listing page. The future resolves as parse_listing_page() returns.
+        """
+        return self._submit(parse_listing_page, html, self.base_url, self.backend, self.log_level)
+
+    def xhr(self, text):
+        """
+        Submit a replayed XHR response. The future resolves as parse_xhr_page() returns.
+        """
+        return self._submit(parse_xhr_page, text, self.base_url, self.log_level)
+
+    def crawl_page(self, html, page_url, root_url, listing):
+        """
+        Submit a crawled page. The future resolves as parse_crawl_page() returns.
+        """
+        return self._submit(parse_crawl_page, html, page_url, root_url, listing, self.base_url, self.log_level)
+
+    def close(self):
+        """
+        Stop the worker processes, cancelling pages that are still queued.
+        """
+        # Executor.shutdown(cancel_futures=True) needs Python 3.9.
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+        self.executor.shutdown()
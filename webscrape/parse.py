@@ -0,0 +1,110 @@
+"""
+Pluggable parsers that build only the product container of a listing page.
+
+Every listing keeps its products in ``div.col-lg-9``; the header, sidebar
+and footer around it are thrown away. The backends below trade how much of
+the document is turned into a tree:
+
+- ``full``: parse the whole document with BeautifulSoup, then find the div.
+- ``strainer``: let BeautifulSoup build only the div, using a SoupStrainer.
+- ``lxml``: parse with lxml's C tree, cut the div out with XPath and hand
+  only that fragment to BeautifulSoup.
+
+Each backend returns the same BeautifulSoup element, so the card extractors
+work unchanged whichever one is chosen.
+"""
+from bs4 import BeautifulSoup, SoupStrainer
+
+default_backend = 'strainer'
+container_class = 'col-lg-9'
+
+parsers = {}
+
+
+def register_parser(name):
+    """
+    Register a parse backend under a name.
+
+    Args:
+        name (str): The name the backend is selected by.
+
+    Returns:
+        callable: A decorator that registers the function it wraps.
+    """
+    def decorator(function):
+        parsers[name] = function
+        return function
+    return decorator
+
+
+@register_parser('full')
+def parse_full(html):
+    soup = BeautifulSoup(html, 'lxml')
+    return soup.find('div', class_=container_class)
+
+
+@register_parser('strainer')
+def parse_strained(html):
+    only_container = SoupStrainer('div', class_=container_class)
+    soup = BeautifulSoup(html, 'lxml', parse_only=only_container)
+    return soup.find('div', class_=container_class)
+
+
+@register_parser('lxml')
+def parse_lxml(html):
+    import lxml.html
+
+    if isinstance(html, str):
+        # lxml refuses str input that carries an XML encoding declaration.
+        html = html.encode('utf-8')
+    tree = lxml.html.fromstring(html)
+    nodes = tree.xpath(f'//div[contains(concat(" ", normalize-space(@class), " "), " {container_class} ")]')
+    if not nodes:
+        return None
+    fragment = lxml.html.tostring(nodes[0], encoding='unicode')
+    return BeautifulSoup(fragment, 'lxml').find('div', class_=container_class)
+
+
+def parse_listing(html, backend=default_backend):
+    """
+    Parse a listing page and return its product container.
+
+    Args:
+        html (str or bytes): The page HTML.
+        backend (str): The name of a registered backend. Defaults to 'strainer'.
+
+    Returns:
+        BeautifulSoup or None: The 'col-lg-9' div element, or None if the
+        page has none.
+
+    Raises:
+        ValueError: If the backend is not registered.
+    """
+    try:
+        parser = parsers[backend]
+    except KeyError:
+        raise ValueError(f'Unknown parse backend {backend!r}; choose from {sorted(parsers)}')
+    return parser(html)
+
+
+def release(element):
+    """
+    Destroy the tree a parsed element belongs to, once its products have been extracted.
+
+    Every node of a BeautifulSoup tree links to its parent and siblings, so a
+    tree that is merely dropped is only freed by the cyclic garbage
+    collector, and pages parsed in a loop pile up until it runs.
+    Decomposing the tree breaks the links and frees it straight away. The
+    top-level elements are decomposed one by one because decomposing the
+    BeautifulSoup object itself does not reach them.
+
+    Args:
+        element (bs4.Tag or None): A parsed page or any element in it.
+    """
+    if element is None:
+        return
+    while element.parent is not None:
+        element = element.parent
+    for child in list(element.contents):
+        child.decompose()
+    element.decompose()
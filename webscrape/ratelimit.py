@@ -0,0 +1,318 @@
+"""
+Per-host rate control and retries for HTTP fetches.
+
+RateLimiter sits between the scrapers and the session. For every host it
+keeps:
+
+- a token bucket, so requests never exceed a steady rate plus a short burst;
+- a concurrency limit that adapts to the host (additive increase,
+  multiplicative decrease): it grows by one after a full window of fast
+  successful responses, and halves on errors, throttling replies or
+  responses much slower than the host's recent latency;
+- a block window set from ``Retry-After`` on 429 and 503 replies, during
+  which no request is sent to the host at all.
+
+Failed attempts are retried with exponential backoff and full jitter instead
+of a fixed sleep, and a ``Retry-After`` delay is used when the server gives
+one. Crawls therefore run as fast as the host allows and back off as soon as
+it pushes back.
+"""
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+retry_statuses = (429, 500, 502, 503, 504)  # replies worth another attempt
+throttle_statuses = (429, 503)  # replies that also slow the host down
+latency_factor = 3.0  # a response this many times slower than the baseline counts as congestion
+latency_slack = 0.25  # seconds always allowed on top of the baseline
+latency_weight = 0.2  # weight of each new 2xx latency in the moving-average baseline
+warmup_samples = 5  # 2xx latencies averaged before any response is judged slow
+min_rate = 0.5  # requests per second the token bucket never drops below
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """
+    Return a backoff delay with full jitter.
+
+    Args:
+        attempt (int): The number of attempts already failed, from 0.
+        base (float): The delay ceiling for the first retry, in seconds.
+        cap (float): The largest delay ceiling, in seconds.
+
+    Returns:
+        float: A random delay between 0 and min(cap, base * 2 ** attempt).
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after(response):
+    """
+    Return the delay a response asks for in its Retry-After header.
+
+    Args:
+        response (requests.Response): The response.
+
+    Returns:
+        float or None: The delay in seconds, or None if the header is
+        missing or cannot be parsed.
+    """
+    value = response.headers.get('Retry-After', '').strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (int, optional): The bucket size. Defaults to the rate, at least 1.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Take one token, sleeping until one is available.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostLimiter:
+    """
+    Rate and concurrency control for one host.
+
+    Args:
+        rate (float or None): Requests per second. None sends as fast as the
+            concurrency limit allows.
+        burst (int, optional): Requests that may be sent at once before the rate applies.
+        max_concurrency (int): The most requests in flight to the host.
+        min_concurrency (int): The fewest requests in flight the limit shrinks to.
+    """
+
+    def __init__(self, rate, burst=None, max_concurrency=8, min_concurrency=1):
+        self.max_rate = rate
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = max(min_concurrency, max_concurrency // 2)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.baseline = None
+        self._samples = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Wait for a free slot, the end of any Retry-After block, and a token.
+        """
+        with self._condition:
+            while True:
+                wait = self.blocked_until - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                elif self.in_flight < self.concurrency:
+                    self.in_flight += 1
+                    break
+                else:
+                    self._condition.wait()
+        if self.bucket is not None:
+            self.bucket.acquire()
+
+    def release(self, latency=None, failed=False, throttled=False, block=None):
+        """
+        Free a slot and adapt the limits to how the request went.
+
+        Args:
+            latency (float, optional): Seconds a 2xx request took. Other
+                replies, such as a 304 or a 404, answer at a different speed
+                and are released without one.
+            failed (bool): The request raised or got a retryable status.
+            throttled (bool): The host replied 429 or 503.
+            block (float, optional): Seconds to send nothing to the host.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if block:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + block)
+            if failed or throttled or self._slow(latency):
+                self._decrease(throttled)
+            else:
+                self._successes += 1
+                if self._successes >= self.concurrency:
+                    self._increase()
+            self._condition.notify_all()
+
+    def _slow(self, latency):
+        # The baseline is a moving average, so one unusually fast reply does
+        # not make every later one look slow, and it follows the host when
+        # its normal speed changes.
+        if latency is None:
+            return False
+        slow = (self._samples >= warmup_samples and
+                latency > max(self.baseline * latency_factor, self.baseline + latency_slack))
+        self._samples += 1
+        if self.baseline is None:
+            self.baseline = latency
+        else:
+            self.baseline += latency_weight * (latency - self.baseline)
+        return slow
+
+    def _decrease(self, throttled):
+        self._successes = 0
+        self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+        if throttled and self.bucket is not None:
+            self.bucket.set_rate(max(self.bucket.rate / 2, min_rate))
+
+    def _increase(self):
+        self._successes = 0
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+        if self.bucket is not None and self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate * 1.5))
+
+    def stats(self):
+        with self._condition:
+            return {
+                'concurrency': self.concurrency,
+                'rate': self.bucket.rate if self.bucket is not None else None,
+                'baseline': self.baseline,
+            }
+
+
+class RateLimiter:
+    """
+    Per-host rate limiting, adaptive concurrency and retries.
+
+    Args:
+        rate (float or None): Requests per second per host. None disables the token bucket.
+        burst (int, optional): Requests per host that may be sent at once before the rate applies.
+        max_concurrency (int): The most requests in flight per host.
+        max_retries (int): Retries after the first attempt.
+        backoff_base (float): The backoff ceiling for the first retry, in seconds.
+        backoff_cap (float): The largest backoff ceiling, in seconds.
+        max_retry_after (float): The longest Retry-After that is waited out;
+            longer ones end the retries.
+        on_retry (callable, optional): Called with (url, attempt, delay, reason)
+            before each retry.
+    """
+
+    def __init__(self, rate=10.0, burst=None, max_concurrency=8, max_retries=3, backoff_base=1.0,
+                 backoff_cap=60.0, max_retry_after=120.0, on_retry=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.on_retry = on_retry
+        self.retries = 0
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def host(self, url):
+        """
+        Return the limiter of a URL's host, creating it on first use.
+        """
+        netloc = urlsplit(url).netloc
+        with self._lock:
+            if netloc not in self._hosts:
+                self._hosts[netloc] = HostLimiter(self.rate, self.burst, self.max_concurrency)
+            return self._hosts[netloc]
+
+    def call(self, url, request):
+        """
+        Send a request under the host's limits, retrying failed attempts.
+
+        Args:
+            url (str): The URL requested, used to pick the host.
+            request (callable): Sends the request and returns the response.
+
+        Returns:
+            requests.Response: The first response that is not retryable, or
+            the last response once the retries are used up.
+
+        Raises:
+            requests.RequestException: The last error, once the retries are used up.
+        """
+        limiter = self.host(url)
+        attempt = 0
+        while True:
+            limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = request()
+            except requests.RequestException as e:
+                limiter.release(failed=True)
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                reason = str(e)
+            except BaseException:
+                # Any other error, such as one from the response cache, is not
+                # retried, but its slot must still be freed or the host stalls.
+                limiter.release(failed=True)
+                raise
+            else:
+                latency = time.monotonic() - start
+                status = response.status_code
+                if status not in retry_statuses:
+                    limiter.release(latency if 200 <= status < 300 else None)
+                    return response
+                throttled = status in throttle_statuses
+                wait = retry_after(response) if throttled else None
+                limiter.release(latency, failed=True, throttled=throttled,
+                                block=wait if wait is not None and wait <= self.max_retry_after else None)
+                if attempt >= self.max_retries or (wait is not None and wait > self.max_retry_after):
+                    return response
+                delay = wait if wait is not None else backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                reason = f'status {status}'
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            if self.on_retry is not None:
+                self.on_retry(url, attempt, delay, reason)
+            time.sleep(delay)
+
+    def stats(self):
+        """
+        Return the retries made and the current limits of every host.
+        """
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {'retries': self.retries, 'hosts': {netloc: limiter.stats() for netloc, limiter in hosts.items()}}
@@ -0,0 +1,197 @@
+"""
+Compact product records.
+
+ProductRecord keeps one product's fields in ``__slots__`` rather than a dict,
+and ProductBatch hands a list of records to pandas as row tuples, without
+building an intermediate dict of lists. Records also carry the product URL
+and the numeric id taken from the card's ``a.title`` link, which identify a
+product across runs more reliably than its truncated name. The full name,
+variants and specs stay empty unless the product page has been fetched; see
+webscrape/detail.py.
+"""
+import re
+
+# Output column names mapped to record attributes, in output order.
+column_fields = {
+    'Category': 'category',
+    'Product ID': 'product_id',
+    'Product Name': 'name',
+    'Product Price': 'price',
+    'Product Description': 'description',
+    'Rating': 'rating',
+    'Reviews': 'reviews',
+    'Product URL': 'url',
+    'Full Name': 'full_name',
+    'Variants': 'variants',
+    'Specs': 'specs',
+}
+
+_product_id = re.compile(r'/product/(\d+)')
+
+
+def product_id_from_url(url):
+    """
+    Return the numeric product id in a product URL.
+
+    Args:
+        url (str): A product URL such as '/test-sites/e-commerce/allinone/product/545'.
+
+    Returns:
+        str: The id, or an empty string if the URL has none.
+    """
+    match = _product_id.search(url or '')
+    return match.group(1) if match else ''
+
+
+class ProductRecord:
+    """
+    One product, with its fields held in slots.
+
+    Args:
+        name (str): The product name as shown on the card.
+        price (str): The price text, such as '$295.99'.
+        description (str): The product description.
+        rating (str): The rating as a digit string.
+        reviews (str): The review count as a digit string.
+        url (str): The product page URL.
+        product_id (str): The product id. Taken from url when not given.
+        category (str): The category path the product was listed under.
+        full_name (str): The untruncated name from the product page.
+        variants (str): The variants offered on the product page.
+        specs (str): The specs listed on the product page.
+    """
+
+    __slots__ = ('category', 'product_id', 'name', 'price', 'description', 'rating', 'reviews', 'url',
+                 'full_name', 'variants', 'specs')
+
+    def __init__(self, name='', price='', description='', rating='', reviews='', url='',
+                 product_id='', category='', full_name='', variants='', specs=''):
+        self.name = name
+        self.price = price
+        self.description = description
+        self.rating = rating
+        self.reviews = reviews
+        self.url = url
+        self.product_id = product_id or product_id_from_url(url)
+        self.category = category
+        self.full_name = full_name
+        self.variants = variants
+        self.specs = specs
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a record from a dictionary keyed by output column names.
+
+        Args:
+            data (dict): The column values.
+
+        Returns:
+            ProductRecord: The record.
+        """
+        return cls(**{field: data.get(column, '') for column, field in column_fields.items()})
+
+    def as_dict(self):
+        """
+        Return the record as a dictionary keyed by output column names.
+
+        Returns:
+            dict: The column values.
+        """
+        return {column: getattr(self, field) for column, field in column_fields.items()}
+
+    def get(self, column, default=''):
+        """
+        Return the value of an output column.
+
+        Args:
+            column (str): The output column name, such as 'Product Name'.
+            default: Returned for unknown columns.
+
+        Returns:
+            str: The value.
+        """
+        field = column_fields.get(column)
+        return getattr(self, field) if field else default
+
+    def values(self, columns):
+        """
+        Return the values of the given output columns as a tuple.
+
+        Args:
+            columns (list): Output column names, in order.
+
+        Returns:
+            tuple: The values, in the same order.
+        """
+        return tuple(self.get(column) for column in columns)
+
+    def key(self):
+        """
+        Return the key that identifies this product between runs.
+
+        Returns:
+            str: The product id, or the name and description when the card
+            had no product link.
+        """
+        return self.product_id or f'{self.name}|{self.description}'
+
+    def __eq__(self, other):
+        if not isinstance(other, ProductRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Pickled as the constructor arguments alone, so records sent back
+        # from parse worker processes stay small.
+        return (ProductRecord, (self.name, self.price, self.description, self.rating, self.reviews, self.url,
+                                self.product_id, self.category, self.full_name, self.variants, self.specs))
+
+    def __repr__(self):
+        return f'ProductRecord({self.as_dict()!r})'
+
+
+class ProductBatch:
+    """
+    An ordered collection of product records that converts to a DataFrame.
+
+    Args:
+        records (iterable, optional): The initial records.
+    """
+
+    __slots__ = ('records',)
+
+    def __init__(self, records=()):
+        self.records = list(records)
+
+    def append(self, record):
+        self.records.append(record)
+
+    def extend(self, records):
+        self.records.extend(records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def to_frame(self, columns):
+        """
+        Build a pandas DataFrame of the given columns, one row per record.
+
+        Rows are passed to pandas as tuples, so no per-column lists or
+        per-record dicts are built along the way.
+
+        Args:
+            columns (list): Output column names, in order.
+
+        Returns:
+            pandas.DataFrame: The records as rows.
+        """
+        import pandas as pd
+
+        return pd.DataFrame.from_records((record.values(columns) for record in self.records),
+                                         columns=columns, nrows=len(self.records))
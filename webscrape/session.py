@@ -0,0 +1,154 @@
+"""
+Pooled, keep-alive HTTP sessions shared by the scrapers.
+
+Every page fetched through a bare requests.get() opens a new TCP connection
+and pays for a new TLS handshake. The functions in this module hand out a
+requests.Session whose connection pools are reused across calls, so repeated
+requests to the same host travel over connections that are already open.
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+pool_connections = 10  # number of hosts to keep a pool for
+pool_maxsize = 10  # connections kept open per host
+timeout = 30  # seconds
+default_headers = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+_sessions = {}
+_session_lock = threading.Lock()
+
+
+def create_session(pool_connections=pool_connections, pool_maxsize=pool_maxsize, headers=None):
+    """
+    Create a requests session with connection pooling and compression enabled.
+
+    Args:
+        pool_connections (int): The number of per-host pools to keep.
+        pool_maxsize (int): The number of connections kept open per host.
+        headers (dict, optional): Extra headers sent with every request.
+
+    Returns:
+        requests.Session: A new session with a pooled adapter mounted for
+        both http and https.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(default_headers)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def get_session(pool_connections=pool_connections, pool_maxsize=pool_maxsize):
+    """
+    Return the shared session for a pool size, creating it on first use.
+
+    Callers asking for the same pool settings share one session and its
+    open connections. A caller asking for a larger pool gets a session of
+    its own instead of one sized for whoever asked first.
+
+    Args:
+        pool_connections (int): The number of per-host pools to keep.
+        pool_maxsize (int): The number of connections kept open per host.
+
+    Returns:
+        requests.Session: The process-wide session for these settings.
+    """
+    key = (pool_connections, pool_maxsize)
+    with _session_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = create_session(pool_connections, pool_maxsize)
+        return session
+
+
+def reset_session():
+    """
+    Close the shared sessions and their pooled connections.
+
+    The next call to get_session() creates a fresh session.
+    """
+    with _session_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def fetch(url, session=None, cache=None, limiter=None, **kwargs):
+    """
+    Fetch a URL over a pooled connection.
+
+    Args:
+        url (str): The URL to fetch.
+        session (requests.Session, optional): The session to use. Defaults to
+            the shared session with the default pool size.
+        cache (webscrape.cache.ResponseCache, optional): A response cache to
+            revalidate against. Without one every call downloads the page.
+        limiter (webscrape.ratelimit.RateLimiter, optional): Per-host rate
+            and concurrency limits. With one, failed attempts and throttling
+            replies are retried with backoff.
+        **kwargs: Extra arguments passed to session.get().
+
+    Returns:
+        requests.Response: The response for the URL.
+    """
+    session = session or get_session()
+    kwargs.setdefault('timeout', timeout)
+
+    def request():
+        if cache is not None:
+            return cache.get(url, session, **kwargs)
+        return session.get(url, **kwargs)
+
+    if limiter is not None:
+        return limiter.call(url, request)
+    return request()
+
+
+def pool_stats(session=None, since=None):
+    """
+    Summarise how well the session's connection pools are being reused.
+
+    The counts come from the urllib3 pools mounted on the session: every
+    request that did not need a new connection is a handshake avoided. The
+    pools belong to the session, not to a run, so a run that shares its
+    session passes the stats taken when it started as ``since`` to report
+    only its own requests.
+
+    Args:
+        session (requests.Session, optional): The session to inspect.
+            Defaults to the shared session with the default pool size.
+        since (dict, optional): Stats from an earlier pool_stats() call on
+            the same session, to subtract from the current counts.
+
+    Returns:
+        dict: The number of requests, connections opened, handshakes avoided
+        and the connection reuse ratio.
+    """
+    session = session or get_session()
+    total_requests = 0
+    total_connections = 0
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            total_requests += pool.num_requests
+            total_connections += pool.num_connections
+    if since is not None:
+        # Pools dropped from the manager take their counts with them, so a delta is never negative.
+        total_requests = max(total_requests - since['requests'], 0)
+        total_connections = max(total_connections - since['connections'], 0)
+    handshakes_avoided = max(total_requests - total_connections, 0)
+    return {
+        'requests': total_requests,
+        'connections': total_connections,
+        'handshakes_avoided': handshakes_avoided,
+        'reuse_ratio': handshakes_avoided / total_requests if total_requests else 0.0,
+    }
@@ -0,0 +1,1219 @@
+"""
+Site adapters: one class per kind of product listing.
+
+- StaticSite: every product of a category on one page (the allinone site).
+- PaginatedSite: products spread over '?page=N' listing pages (the static site).
+- AjaxSite: pages loaded by XHR calls behind pagination buttons (the ajax
+  site), replayed over HTTP with a headless-browser fallback.
+
+An adapter holds the settings of one run and does nothing when it is
+created: the log file is opened, the run timestamp taken and the output
+paths fixed only when run() is called. Selenium is imported only when the
+browser fallback is actually needed, and pandas only when a DataFrame is
+built, so short runs and worker processes start quickly.
+
+The ``sites`` mapping names the three test sites; create_site() builds the
+adapter for one of them.
+"""
+import inspect
+import os
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from webscrape import extract
+from webscrape.ajax import replay_pages
+from webscrape.cache import ResponseCache
+from webscrape.checkpoint import PageCheckpoint
+from webscrape.crawl import category_path, crawl
+from webscrape.detail import DetailEnricher, detail_columns
+from webscrape.frontier import URLFrontier
+from webscrape.incremental import IncrementalState
+from webscrape.logger import BufferedLogger, DEBUG, INFO, WARNING, ERROR
+from webscrape.metrics import RunMetrics
+from webscrape.output import StreamingCSVWriter, StreamingParquetWriter, TeeWriter
+from webscrape.pagination import fetch_pages, iter_pages
+from webscrape.parallel import ParsePool
+from webscrape.parse import default_backend, parse_listing, release
+from webscrape.ratelimit import RateLimiter
+from webscrape.records import ProductBatch
+from webscrape.session import fetch, get_session, pool_stats
+from webscrape.store import StreamingSQLiteWriter
+
+time_format = '%Y-%m-%d %H:%M:%S'
+columns = ['Product Name', 'Product Price', 'Product Description', 'Rating', 'Reviews', 'Product ID', 'Product URL']
+
+
+class Site:
+    """
+    Settings and shared steps of a scraper run.
+
+    Subclasses implement iter_products(), which yields the products of the
+    listing page by page. Those that set ``checkpoints`` record every page in
+    data/checkpoint.jsonl as it is extracted, so that a run stopped part-way
+    can be resumed; see webscrape/checkpoint.py.
+
+    Args:
+        home_dir (str): The folder holding the log file and the data, cache
+            and metrics folders.
+        url (str): The listing URL to scrape.
+        name (str, optional): The site name used in metrics. Defaults to the
+            class attribute.
+        log_name (str, optional): The log file name inside home_dir.
+        log_level (int): The lowest level that is logged. Set to DEBUG to log
+            every extracted product.
+        output_format (str): 'csv', 'parquet' (typed, zstd-compressed; needs
+            pyarrow) or 'both'.
+        parse_backend (str): 'full', 'strainer' or 'lxml'; see webscrape/parse.py.
+        use_cache (bool): Revalidate pages against the on-disk HTTP cache.
+        max_workers (int): Pages fetched at the same time.
+        pool_size (int): Keep-alive connections per host.
+        max_retries (int): Retries after a failed request or a 429/5xx reply.
+        retry_delay (float): The backoff ceiling for the first retry, in
+            seconds; it doubles on every further retry and the actual delay
+            is drawn at random below it. A Retry-After header takes precedence.
+        rate (float or None): Requests per second per host. None only applies
+            the adaptive concurrency limit.
+        burst (int, optional): Requests per host sent at once before the rate applies.
+        enrich_details (bool): Follow each product link and add the full name,
+            variants and specs from the product page.
+        detail_workers (int): Product pages fetched at the same time.
+        sqlite_store (bool): Also upsert every run into data/snapshots.sqlite,
+            which keeps the price history of every product; see webscrape/store.py.
+        parse_workers (int): Processes that parse fetched pages and extract
+            their products in parallel; see webscrape/parallel.py. 0 parses in
+            this process.
+    """
+
+    name = 'site'
+    log_name = 'web_scrap_log.txt'
+    columns = columns
+    checkpoints = False
+    resume = False
+
+    def __init__(self, home_dir, url, name=None, log_name=None, log_level=INFO, output_format='csv',
+                 parse_backend=default_backend, use_cache=True, max_workers=8, pool_size=10,
+                 max_retries=3, retry_delay=1, rate=10.0, burst=20, enrich_details=False, detail_workers=16,
+                 sqlite_store=False, parse_workers=0):
+        self.home_dir = home_dir
+        self.url = url
+        self.name = name or self.name
+        self.log_name = log_name or self.log_name
+        self.log_level = log_level
+        self.output_format = output_format
+        self.parse_backend = parse_backend
+        self.use_cache = use_cache
+        self.max_workers = max_workers
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.rate = rate
+        self.burst = burst
+        self.enrich_details = enrich_details
+        self.detail_workers = detail_workers
+        self.sqlite_store = sqlite_store
+        self.parse_workers = parse_workers
+        if enrich_details:
+            self.columns = self.columns + detail_columns
+        self.log_file = os.path.join(home_dir, self.log_name)
+        self.cache_dir = os.path.join(home_dir, 'cache')
+        self.data_dir = os.path.join(home_dir, 'data')
+        self.metrics_dir = os.path.join(home_dir, 'metrics')
+        self.store_file = os.path.join(self.data_dir, 'snapshots.sqlite')
+        self.checkpoint_file = os.path.join(self.data_dir, 'checkpoint.jsonl')
+        self.logger = BufferedLogger(self.log_file, level=log_level)
+        self.metrics = RunMetrics(self.name)
+        self.http_cache = ResponseCache(self.cache_dir) if use_cache else None
+        self.limiter = RateLimiter(rate=rate, burst=burst, max_concurrency=max(self.concurrency(), 1),
+                                   max_retries=max_retries, backoff_base=retry_delay, on_retry=self.on_retry)
+        self.enricher = None
+        self.checkpoint = None
+        self.resumed = False
+        self._parse_pool = None
+        self.set_run_time(datetime.now())
+
+    def set_run_time(self, now):
+        """
+        Fix the timestamp used in this run's file names.
+
+        Args:
+            now (datetime): The start of the run.
+        """
+        self.time_str = now.strftime(time_format)
+        self.filename = os.path.join(self.data_dir, f'data_{self.time_str}.csv')
+        self.parquet_filename = os.path.splitext(self.filename)[0] + '.parquet'
+        self.metrics_file = os.path.join(self.metrics_dir, f'run_{self.time_str}.json')
+        self.prometheus_file = os.path.join(self.metrics_dir, f'{self.name}.prom')
+
+    def log(self, message, level=INFO):
+        """
+        Log a message through the buffered background logger.
+
+        Args:
+            message (str): The message to be logged.
+            level (int, optional): The level of the message.
+        """
+        self.logger.log(message, level)
+
+    def concurrency(self):
+        """
+        Return the most requests this site sends to one host at a time.
+        """
+        return max(self.max_workers, self.detail_workers if self.enrich_details else 0)
+
+    def session(self):
+        """
+        Return the shared pooled session, sized for this site's concurrency.
+        """
+        return get_session(pool_maxsize=max(self.pool_size, self.concurrency()))
+
+    def parse_pool(self):
+        """
+        Return the pool of parse worker processes, started on first use.
+        """
+        if self._parse_pool is None:
+            self._parse_pool = ParsePool(self.parse_workers, self.parse_backend, self.url, self.log_level)
+            self.log(f'Started {self._parse_pool.workers} parse worker processes')
+        return self._parse_pool
+
+    def close_parse_pool(self):
+        """
+        Stop the parse worker processes, if they were started.
+        """
+        if self._parse_pool is not None:
+            self._parse_pool.close()
+            self._parse_pool = None
+
+    def log_messages(self, messages):
+        """
+        Log the (message, level) tuples sent back by a parse worker.
+        """
+        for message, level in messages:
+            self.log(message, level)
+
+    def on_retry(self, url, attempt, delay, reason):
+        """
+        Log and count a retry made by the rate limiter.
+        """
+        self.log(f'Retrying {url} in {delay:.1f} seconds after {reason} (retry {attempt} of {self.max_retries})',
+                 WARNING)
+        self.metrics.add(retries=1)
+
+    def fetch_page(self, url):
+        """
+        Fetch a URL through the rate limiter, which retries failed attempts.
+
+        Args:
+            url (str): The URL to fetch data from.
+
+        Returns:
+            requests.Response or None: The successful response, or None if
+            all attempts fail.
+        """
+        with self.metrics.stage('fetch_page'):
+            self.log(f'Starting data fetch from URL: {url}')
+            try:
+                response = fetch(url, session=self.session(), cache=self.http_cache, limiter=self.limiter)
+            except Exception as e:
+                self.log(f'All attempts to fetch URL {url} failed after {self.max_retries} retries: {str(e)}', ERROR)
+                return None
+            if response.status_code != 200:
+                self.log(f'Failed to connect to URL {url} - Status Code: {response.status_code}', ERROR)
+                return None
+            self.log(f'Successfully connected to URL: {url}')
+            return response
+
+    def parse(self, html):
+        """
+        Parse a listing page and return its product container.
+
+        Args:
+            html (str): The page HTML.
+
+        Returns:
+            BeautifulSoup or None: The 'col-lg-9' div element, or None if the
+            page has none.
+        """
+        with self.metrics.stage('parse'):
+            return parse_listing(html, self.parse_backend)
+
+    def extract_products(self, boxes):
+        """
+        Extract every product from parsed listing pages in a single pass.
+
+        Args:
+            boxes (list): BeautifulSoup elements holding product cards, one per page.
+
+        Returns:
+            list: ProductRecord objects, one per card, in page order.
+        """
+        with self.metrics.stage('extract_products'):
+            self.log('Extracting products from div elements')
+            products = extract.extract_products(boxes, self.url, self.log, self.logger.level <= DEBUG)
+            self.log(f'Extracted {len(products)} products')
+            return products
+
+    def extract_page(self, box):
+        """
+        Extract the products of one parsed page, then release the page's tree.
+
+        Pages go through this one at a time, so however many pages a run
+        fetches, only the tree of the page being extracted is held in memory.
+
+        Args:
+            box (BeautifulSoup): The product container of the page.
+
+        Returns:
+            list: ProductRecord objects, one per card.
+        """
+        try:
+            return self.extract_products([box])
+        finally:
+            release(box)
+
+    def iter_products(self):
+        """
+        Yield the products of the listing, one list per page.
+        """
+        raise NotImplementedError
+
+    def enrich(self, products):
+        """
+        Add the full name, variants and specs from each product's page, when enrich_details is set.
+
+        Args:
+            products (list): ProductRecord objects, updated in place.
+
+        Returns:
+            list: The same products.
+        """
+        if not self.enrich_details or not products:
+            return products
+        with self.metrics.stage('enrich'):
+            if self.enricher is None:
+                self.enricher = DetailEnricher(self.detail_workers, session=self.session(), cache=self.http_cache,
+                                               limiter=self.limiter, parse_backend=self.parse_backend,
+                                               log=self.log, log_debug=self.logger.level <= DEBUG)
+            enriched = self.enricher.enrich(products)
+            self.log(f'Enriched {enriched} of {len(products)} products from their product pages')
+            return products
+
+    def join(self, products, columns=None):
+        """
+        Create a pandas DataFrame from product records.
+
+        Args:
+            products (list): ProductRecord objects.
+            columns (list, optional): The columns, in order. Defaults to the site's columns.
+
+        Returns:
+            pandas.DataFrame: One row per product.
+        """
+        with self.metrics.stage('join'):
+            self.log('Creating a DataFrame from extracted data')
+            df = ProductBatch(products).to_frame(columns or self.columns)
+            self.log('DataFrame created')
+            return df
+
+    def load_to_csv(self, df, filename):
+        """
+        Save a DataFrame to a CSV file.
+        """
+        with self.metrics.stage('load_to_csv'):
+            self.log(f'Saving DataFrame to CSV file: {filename}')
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+            df.to_csv(filename, index=False)
+            self.log(f'DataFrame saved to csv file: {filename}')
+
+    def load_to_parquet(self, df, filename):
+        """
+        Save a DataFrame to a typed, zstd-compressed Parquet file.
+        """
+        from webscrape.typed import write_parquet
+
+        with self.metrics.stage('load_to_parquet'):
+            self.log(f'Saving typed DataFrame to Parquet file: {filename}')
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+            write_parquet(df, filename)
+            self.log(f'DataFrame saved to Parquet file: {filename}')
+
+    def open_output(self, columns):
+        """
+        Open the streaming output for this run according to output_format.
+
+        Args:
+            columns (list): The columns to write, in order.
+
+        Returns:
+            A streaming writer: CSV, typed Parquet, or several through one
+            TeeWriter, plus the SQLite snapshot store when sqlite_store is set.
+        """
+        writers = []
+        if self.output_format in ('csv', 'both'):
+            writers.append(StreamingCSVWriter(self.filename, columns))
+        if self.output_format in ('parquet', 'both'):
+            writers.append(StreamingParquetWriter(self.parquet_filename, columns))
+        if self.sqlite_store:
+            writers.append(StreamingSQLiteWriter(self.store_file, self.name, self.time_str))
+        return writers[0] if len(writers) == 1 else TeeWriter(writers)
+
+    def open_checkpoint(self, url=None):
+        """
+        Start this run's page checkpoint, or take over the one of an unfinished run when resume is set.
+
+        A resumed run keeps the timestamp of the run it continues, so its
+        output replaces the partial files that run left behind. Whether the
+        run was resumed is kept as ``self.resumed``.
+
+        Args:
+            url (str, optional): The URL the checkpoint belongs to. Defaults to the listing URL.
+
+        Returns:
+            PageCheckpoint: The checkpoint, also kept as ``self.checkpoint``.
+        """
+        url = url or self.url
+        checkpoint = PageCheckpoint(self.checkpoint_file)
+        self.resumed = bool(self.resume and checkpoint.load(url))
+        if self.resumed:
+            self.set_run_time(datetime.strptime(checkpoint.run_ts, time_format))
+            self.log(f'Resuming run {self.time_str} from its checkpoint: {len(checkpoint.pages)} pages already scraped')
+        else:
+            if self.resume:
+                self.log(f'No checkpoint to resume for URL {url}; starting from the first page', WARNING)
+            elif checkpoint.exists():
+                self.log(f'Replacing the checkpoint of an unfinished run in {self.checkpoint_file}; '
+                         f'set resume to continue such a run instead', WARNING)
+            checkpoint.start(url, self.time_str)
+        self.checkpoint = checkpoint
+        return checkpoint
+
+    def close_checkpoint(self):
+        """
+        Delete the checkpoint if the run reached the last page, or keep it for a resumed run.
+        """
+        if self.checkpoint is None:
+            return
+        if self.checkpoint.finished:
+            self.checkpoint.clear()
+        else:
+            self.checkpoint.close()
+            self.log(f'Run stopped before the last page; {len(self.checkpoint.pages)} pages are kept in '
+                     f'{self.checkpoint_file}. Run again with resume set to continue from them', WARNING)
+        self.checkpoint = None
+
+    def write_rows(self, writer, products):
+        self.enrich(products)
+        with self.metrics.stage('write_rows'):
+            writer.write_rows(products)
+
+    def save_metrics(self, status):
+        """
+        Write the stage timings and counters of this run to the JSON summary and the Prometheus textfile.
+
+        Args:
+            status (str): 'success' or 'failure'.
+        """
+        self.metrics.finish(status)
+        self.metrics.write_json(self.metrics_file)
+        self.metrics.write_prometheus(self.prometheus_file)
+        for stage, totals in self.metrics.stages.items():
+            self.log(f'Stage {stage}: {totals["seconds"]:.3f}s over {totals["calls"]} calls')
+        self.log(f'Run counters: {self.metrics.counters}')
+        self.log(f'Run metrics saved to {self.metrics_file} and {self.prometheus_file}')
+
+    def scrape(self):
+        """
+        Stream the products of the listing to the output file.
+
+        Raises:
+            RuntimeError: If the walk stopped before the last page without
+                raising, leaving the checkpoint unfinished. The output is then
+                left in its .part file and the run fails.
+        """
+        if self.checkpoints:
+            self.open_checkpoint()
+        with self.open_output(self.columns) as writer:
+            for products in self.iter_products():
+                self.write_rows(writer, products)
+            if self.checkpoint is not None and not self.checkpoint.finished:
+                raise RuntimeError(f'The run stopped before the last page of {self.url} after {writer.rows} products')
+        self.metrics.add(rows=writer.rows)
+        if writer.rows:
+            self.log(f'{writer.rows} products streamed to {self.output_format} output: {self.filename}')
+            self.log('Data fetching and processing completed successfully')
+        else:
+            self.log(f'Failed to fetch data from URL: {self.url}', ERROR)
+
+    def run(self):
+        """
+        Run the scraper: start logging, scrape, and save the run metrics.
+
+        Returns:
+            int: The number of product rows written.
+
+        Raises:
+            Exception: Any error during the run is logged and re-raised.
+        """
+        self.set_run_time(datetime.now())
+        self.logger.start()
+        self.metrics.start()
+        session = self.session()
+        self.metrics.watch(session)
+        pool_start = pool_stats(session)
+        status = 'failure'
+        try:
+            self.scrape()
+            self.log(f'Connection pool stats: {pool_stats(session, since=pool_start)}')
+            self.log(f'Rate limiter stats: {self.limiter.stats()}')
+            if self.enricher is not None:
+                self.log(f'Product page stats: {self.enricher.stats()}')
+            if self.http_cache is not None:
+                self.log(f'HTTP cache stats: {self.http_cache.stats()}')
+            self.log('Program completed and terminated')
+            if self.metrics.counters['rows']:
+                status = 'success'
+        except Exception as e:
+            self.log(f'An error occurred: {str(e)}', ERROR)
+            self.log('Program terminated')
+            raise e
+        finally:
+            if self.enricher is not None:
+                self.enricher.close()
+                self.enricher = None
+            self.close_parse_pool()
+            self.close_checkpoint()
+            self.metrics.unwatch(session)
+            self.save_metrics(status)
+            self.logger.close()
+        return self.metrics.counters['rows']
+
+
+class ListingSite(Site):
+    """
+    A site whose listing pages are plain HTML, with whole-catalogue crawls
+    and incremental runs.
+
+    Args:
+        home_dir (str): See Site.
+        url (str): See Site.
+        root_url (str, optional): The e-commerce root crawled when crawl_all is set.
+        crawl_all (bool): Crawl every category under root_url instead of url.
+        incremental (bool): Only parse changed pages and write a delta file.
+        write_snapshot (bool): In incremental mode, also write the full output.
+        resume (bool): Continue the last run that stopped part-way from its
+            checkpoint, and with crawl_all its frontier, instead of starting over.
+        **options: Passed to Site.
+    """
+
+    def __init__(self, home_dir, url, root_url=None, crawl_all=False, incremental=False, write_snapshot=True,
+                 resume=False, **options):
+        super().__init__(home_dir, url, **options)
+        self.resume = resume
+        self.root_url = root_url
+        self.crawl_all = crawl_all
+        self.incremental = incremental
+        self.write_snapshot = write_snapshot
+        self.state_file = os.path.join(self.data_dir, 'incremental_state.json')
+        self.frontier_file = os.path.join(self.data_dir, 'frontier.sqlite')
+
+    def set_run_time(self, now):
+        super().set_run_time(now)
+        self.delta_filename = os.path.join(self.data_dir, f'delta_{self.time_str}.csv')
+
+    def extract_incremental(self, url, state):
+        """
+        Extract the listing's products, parsing only pages that have changed.
+
+        Returns:
+            list or None: The products, or None if the listing could not be fetched.
+        """
+        raise NotImplementedError
+
+    def iter_page_range(self, url, first_page=1, last_page=None):
+        """
+        Yield the products of pages first_page to last_page of a listing, one list per page.
+
+        This is the unit of work of a distributed run; see webscrape/distributed.py.
+        A listing that ends before last_page is yielded up to its end.
+
+        Raises:
+            RuntimeError: If a page of the range could not be fetched.
+        """
+        raise NotImplementedError
+
+    def extract_catalogue(self, root_url, writer):
+        """
+        Crawl every category listing under the e-commerce root and extract its products.
+
+        Categories and subcategories are discovered from the sidebar menu, all
+        listing pages are fetched concurrently, and every record is tagged with
+        its category path and appended to the output as soon as its page has
+        been extracted, and recorded in the run's checkpoint, keyed by page URL.
+
+        The crawl's URL frontier is kept in data/frontier.sqlite until every
+        page has been crawled. A run resumed from the checkpoint of a crawl
+        that was interrupted, or in which some pages failed, first writes the
+        pages recorded in the checkpoint, then reopens the frontier and only
+        fetches the pages that were not crawled yet, retrying the failed ones.
+        Any other run discards a frontier left behind and crawls from the root.
+
+        Args:
+            root_url (str): The e-commerce root URL to start crawling from.
+            writer (StreamingCSVWriter): The output the records are appended to.
+
+        Returns:
+            int: The number of products written.
+
+        Raises:
+            RuntimeError: If some pages could not be fetched or parsed.
+        """
+        checkpoint = self.checkpoint
+
+        def write_page(page_url, page_products):
+            category = category_path(root_url, page_url)
+            for product in page_products:
+                product.category = category
+            self.metrics.add(pages=1)
+            self.write_rows(writer, page_products)
+            if checkpoint is not None:
+                checkpoint.add_page(page_url, page_products)
+
+        if not self.resumed and os.path.exists(self.frontier_file):
+            self.log(f'Discarding the frontier of an unfinished crawl in {self.frontier_file}; '
+                     f'set resume to continue such a crawl instead', WARNING)
+            URLFrontier(self.frontier_file).clear()
+        frontier = URLFrontier(self.frontier_file)
+        if self.resumed:
+            for page_url, page_products in checkpoint.pages.items():
+                self.write_rows(writer, page_products)
+                # A page recorded just before the crawl stopped may not have been marked done.
+                frontier.add(page_url, 'page')
+                frontier.done(page_url)
+            self.log(f'{writer.rows} products of {len(checkpoint.pages)} pages restored from the checkpoint')
+        with self.metrics.stage('extract_catalogue'):
+            try:
+                # The crawl fetches over the session run() watches, max_workers pages at a time.
+                crawl(root_url, lambda box: self.extract_products([box]), per_host_limit=self.max_workers,
+                      max_workers=self.max_workers, session=self.session(), cache=self.http_cache,
+                      limiter=self.limiter, frontier=frontier,
+                      parse_pool=self.parse_pool() if self.parse_workers else None, on_page=write_page,
+                      log=self.log)
+            except BaseException:
+                frontier.close()
+                raise
+        failed = frontier.stats()['failed']
+        if failed:
+            frontier.close()
+            raise RuntimeError(f'{failed} of the crawled pages failed; run again with resume set to retry them '
+                               f'from {self.frontier_file}')
+        if checkpoint is not None:
+            checkpoint.finish()
+        frontier.clear()
+        return writer.rows
+
+    def save_incremental(self, state):
+        """
+        Write the products that changed since the previous run and save the new state.
+
+        The delta file holds one row per added, removed or changed product with a
+        'Change' column. When write_snapshot is set, the full product list of this
+        run is also written to the usual data file.
+
+        Args:
+            state (IncrementalState): The state holding this run's pages and products.
+        """
+        changes = state.delta()
+        self.log(f'{len(changes)} products added, removed or changed since the last run')
+        delta = self.join([product for _, product in changes])
+        delta.insert(0, 'Change', [change for change, _ in changes])
+        self.load_to_csv(delta, self.delta_filename)
+        if self.write_snapshot:
+            snapshot = self.join(state.snapshot())
+            if self.output_format in ('csv', 'both'):
+                self.load_to_csv(snapshot, self.filename)
+            if self.output_format in ('parquet', 'both'):
+                self.load_to_parquet(snapshot, self.parquet_filename)
+        if self.sqlite_store:
+            with self.metrics.stage('write_rows'):
+                with StreamingSQLiteWriter(self.store_file, self.name, self.time_str) as writer:
+                    writer.write_rows(state.snapshot())
+            self.log(f'Snapshot of {writer.rows} products stored in {self.store_file}')
+        state.save()
+
+    def scrape(self):
+        if self.crawl_all:
+            self.open_checkpoint(self.root_url)
+            with self.open_output(['Category'] + self.columns) as writer:
+                self.extract_catalogue(self.root_url, writer)
+            self.metrics.add(rows=writer.rows)
+            if writer.rows:
+                self.log(f'{writer.rows} products streamed to {self.output_format} output: {self.filename}')
+                self.log('Data fetching and processing completed successfully')
+            else:
+                self.log(f'Failed to fetch data from URL: {self.root_url}', ERROR)
+        elif self.incremental:
+            state = IncrementalState(self.state_file)
+            products = self.extract_incremental(self.url, state)
+            if products is not None:
+                self.save_incremental(state)
+                self.metrics.add(rows=len(state.snapshot()))
+                self.log('Data fetching and processing completed successfully')
+            else:
+                self.log(f'Failed to fetch data from URL: {self.url}', ERROR)
+        else:
+            super().scrape()
+
+
+class StaticSite(ListingSite):
+    """
+    A category whose products are all on one listing page.
+    """
+
+    name = 'static'
+
+    def extract(self, url):
+        """
+        Fetch a listing page and extract its product container.
+
+        Returns:
+            BeautifulSoup or None: The product container, or None if the page
+            could not be fetched.
+        """
+        with self.metrics.stage('extract'):
+            response = self.fetch_page(url)
+            if response is None:
+                return None
+            box = self.parse(response.text)
+            self.metrics.add(pages=1)
+            return box
+
+    def iter_products(self):
+        box = self.extract(self.url)
+        if box:
+            yield self.extract_page(box)
+
+    def extract_incremental(self, url, state):
+        """
+        Fetch the listing page and extract its products only if the page has changed.
+
+        The raw page is hashed and compared with the previous run. An unchanged
+        page is not parsed at all; its products are carried over from the state.
+        """
+        with self.metrics.stage('extract_incremental'):
+            response = self.fetch_page(url)
+            if response is None:
+                return None
+            self.metrics.add(pages=1)
+            if state.page_unchanged(url, response.content):
+                self.log(f'Page unchanged since last run, skipping parse: {url}')
+                return state.page_products(url)
+            box = self.parse(response.text)
+            products = self.enrich(self.extract_page(box)) if box else []
+            state.update_page(url, response.content, products)
+            return products
+
+    def iter_page_range(self, url, first_page=1, last_page=None):
+        # The listing is a single page.
+        box = self.extract(url)
+        if box is None:
+            raise RuntimeError(f'Listing {url} could not be fetched')
+        yield self.extract_page(box)
+
+
+class PaginatedSite(ListingSite):
+    """
+    A category spread over numbered listing pages, fetched concurrently.
+
+    Args:
+        home_dir (str): See Site.
+        url (str): The base URL of the category.
+        max_pages (int): The highest page number fetched.
+        resume (bool): Continue the last run that stopped before the last
+            page from its checkpoint, instead of starting from page 1.
+        **options: Passed to ListingSite.
+    """
+
+    name = 'paginated'
+    checkpoints = True
+
+    def __init__(self, home_dir, url, max_pages=20, resume=False, **options):
+        super().__init__(home_dir, url, resume=resume, **options)
+        self.max_pages = max_pages
+
+    def parse_page(self, response):
+        """
+        Parse a listing page and return its product container.
+
+        Returns:
+            BeautifulSoup or None: The 'col-lg-9' div element of the page, or
+            None if the page holds no product cards.
+        """
+        with self.metrics.stage('parse_page'):
+            box = parse_listing(response.text, self.parse_backend)
+            if box is None or box.find('div', class_=extract.card_class) is None:
+                return None
+            self.metrics.add(pages=1)
+            return box
+
+    def iter_data_from_pages(self, url):
+        """
+        Fetch up to max_pages pages concurrently and yield their product containers.
+
+        Pages are yielded in page order as soon as they are ready, and fetching
+        stops at the first page that is missing or holds no products.
+        """
+        self.log(f'Starting paginated fetch from URL: {url}')
+        yield from iter_pages(url, self.parse_page, max_pages=self.max_pages, max_workers=self.max_workers,
+                              session=self.session(), cache=self.http_cache,
+                              limiter=self.limiter, log=self.log)
+
+    def extract_data_from_pages(self, url):
+        """
+        Fetch every listing page and return the product containers, in page order.
+        """
+        with self.metrics.stage('extract_data_from_pages'):
+            return list(self.iter_data_from_pages(url))
+
+    def iter_page_products(self, url, first_page=1, last_page=None):
+        """
+        Fetch pages concurrently from first_page to last_page, or max_pages, and yield the products of each.
+
+        With parse_workers set, each fetch thread hands its page body to the
+        parse pool as soon as it arrives and waits for the records, so pages
+        are parsed on as many cores as there are parse workers. Pages are
+        yielded in page order, and fetching stops at the first page that is
+        missing or holds no products.
+
+        Raises:
+            RuntimeError: If a page could not be fetched; see iter_pages().
+        """
+        if self.parse_workers:
+            pool = self.parse_pool()
+
+            def parse(response):
+                parsed = pool.listing(response.content).result()
+                if parsed is None:
+                    return None
+                products, messages = parsed
+                self.log_messages(messages)
+                self.metrics.add(pages=1)
+                self.log(f'Extracted {len(products)} products')
+                return products
+        else:
+            def parse(response):
+                box = self.parse_page(response)
+                return None if box is None else self.extract_page(box)
+
+        self.log(f'Starting paginated fetch from URL: {url}')
+        last_page = min(last_page, self.max_pages) if last_page else self.max_pages
+        yield from iter_pages(url, parse, max_pages=last_page, max_workers=self.max_workers, session=self.session(),
+                              cache=self.http_cache, limiter=self.limiter, threaded_parse=bool(self.parse_workers),
+                              first_page=first_page, log=self.log)
+
+    def iter_page_range(self, url, first_page=1, last_page=None):
+        yield from self.iter_page_products(url, first_page, last_page)
+
+    def iter_products(self):
+        """
+        Yield the products of the listing page by page, recording each page in the checkpoint.
+
+        Pages already in the checkpoint of a resumed run are yielded from it
+        and fetching starts at the first page missing from it. A page is
+        recorded once the caller has asked for the next one, that is once it
+        has been written out. The checkpoint is only marked finished once the
+        end of the listing has been reached; a page that could not be fetched
+        raises and leaves it for a resumed run.
+        """
+        checkpoint = self.checkpoint
+        if checkpoint is None:
+            yield from self.iter_page_products(self.url)
+            return
+        first_page = checkpoint.next_page()
+        for page in range(1, first_page):
+            yield checkpoint.pages[page]
+        for page, products in enumerate(self.iter_page_products(self.url, first_page), start=first_page):
+            yield products
+            checkpoint.add_page(page, products)
+        checkpoint.finish()
+
+    def extract_incremental(self, url, state):
+        """
+        Fetch the listing pages and extract products only from pages that have changed.
+        """
+        def parse(response):
+            if state.page_unchanged(response.url, response.content):
+                self.log(f'Page unchanged since last run, skipping parse: {response.url}')
+                self.metrics.add(pages=1)
+                return state.page_products(response.url) or None
+            box = self.parse_page(response)
+            if box is None:
+                return None
+            products = self.enrich(self.extract_page(box))
+            state.update_page(response.url, response.content, products)
+            return products
+
+        with self.metrics.stage('extract_incremental'):
+            self.log(f'Starting incremental paginated fetch from URL: {url}')
+            pages = fetch_pages(url, parse, max_pages=self.max_pages, max_workers=self.max_workers,
+                                session=self.session(), cache=self.http_cache,
+                                limiter=self.limiter, log=self.log)
+            if not pages:
+                return None
+            return [product for page in pages for product in page]
+
+
+class AjaxSite(Site):
+    """
+    A category whose pages are loaded by XHR calls behind pagination buttons.
+
+    The XHR calls are replayed over HTTP first. When that finds nothing, the
+    pages are walked with headless Chrome, sharded across several drivers;
+    Selenium is only imported then.
+
+    Args:
+        home_dir (str): See Site.
+        url (str): The URL of the listing.
+        replay_xhr (bool): Try replaying the AJAX requests before falling back to Selenium.
+        max_pages (int): The highest page number fetched.
+        shard_workers (int): Headless drivers used to walk the pages in
+            parallel, capped by free memory.
+        driver_path (str, optional): The chromedriver executable. Selenium
+            finds one itself when not given.
+        wait_timeout (float): Seconds to wait for a page of products to render.
+        resume (bool): Continue the last browser walk that stopped before the
+            last page from its checkpoint, instead of walking every page again.
+        **options: Passed to Site.
+    """
+
+    name = 'ajax'
+    checkpoints = True
+
+    def __init__(self, home_dir, url, replay_xhr=True, max_pages=20, shard_workers=4, driver_path=None,
+                 wait_timeout=10, resume=False, **options):
+        super().__init__(home_dir, url, **options)
+        self.resume = resume
+        self.replay_xhr = replay_xhr
+        self.max_pages = max_pages
+        self.shard_workers = shard_workers
+        self.driver_path = driver_path
+        self.wait_timeout = wait_timeout
+        self._driver_pool = None
+
+    @property
+    def driver_pool(self):
+        """
+        The pool of headless Chrome drivers, created on first use.
+        """
+        if self._driver_pool is None:
+            from webscrape.browser import DriverPool, max_drivers
+
+            self._driver_pool = DriverPool(size=max_drivers(self.shard_workers), driver_path=self.driver_path)
+        return self._driver_pool
+
+    def find_page_button(self, driver, page):
+        """
+        Find the inactive pagination button labelled with a page number, or None.
+        """
+        from selenium.webdriver.common.by import By
+
+        for button in driver.find_elements(By.CSS_SELECTOR, '.pagination button.page-link:not(.active)'):
+            if button.text.strip() == str(page):
+                return button
+        return None
+
+    def scrape_page_range(self, url, first_page, last_page, on_page, done=()):
+        """
+        Scrape a contiguous range of pages with one browser from the driver pool.
+
+        The driver opens the listing, jumps to first_page and then clicks through to last_page,
+        waiting for the old product cards to be replaced after each click. Each page's products
+        are extracted and its tree released before the next click; they are recorded in the
+        checkpoint and passed to on_page(page, products). Pages in done are clicked past
+        without being parsed.
+
+        Returns:
+            bool: True if the range was walked to its end, False if an error stopped it.
+        """
+        from webscrape.browser import click_and_wait, go_to_page, wait_for_cards
+
+        with self.metrics.stage('scrape_page_range'):
+            try:
+                with self.driver_pool.driver() as driver:
+                    driver.get(url)
+                    wait_for_cards(driver, self.wait_timeout)
+                    if first_page > 1 and not go_to_page(driver, first_page, self.wait_timeout):
+                        self.log(f'Could not reach page {first_page}', ERROR)
+                        return False
+                    current_page = first_page
+                    while True:
+                        if current_page not in done:
+                            self.log(f'Waiting for AJAX content to load on page {current_page}')
+                            wait_for_cards(driver, self.wait_timeout)
+                            box = self.parse(driver.page_source)
+                            if box:
+                                products = self.extract_page(box)
+                                if self.checkpoint is not None:
+                                    self.checkpoint.add_page(current_page, products)
+                                self.metrics.add(pages=1)
+                                self.log(f'Scraped page {current_page} from {url}')
+                                on_page(current_page, products)
+                        if current_page >= last_page:
+                            break
+
+                        next_button = self.find_page_button(driver, current_page + 1)
+                        if not next_button:
+                            self.log('No more pages available')
+                            if self.checkpoint is not None:
+                                self.checkpoint.set_last_page(current_page)
+                            break
+                        try:
+                            click_and_wait(driver, next_button, self.wait_timeout)
+                        except Exception as e:
+                            self.log(f'Error navigating to next page: {str(e)}', ERROR)
+                            return False
+                        self.log(f'Clicked next button to page {current_page + 1}')
+                        current_page += 1
+            except Exception as e:
+                self.log(f'Error during extraction of pages {first_page}-{last_page}: {str(e)}', ERROR)
+                return False
+        return True
+
+    def count_pages(self, url, max_pages):
+        """
+        Open the listing and read the highest page number shown in the pagination bar.
+        """
+        from webscrape.browser import active_page, page_buttons, wait_for_cards
+
+        with self.driver_pool.driver() as driver:
+            driver.get(url)
+            wait_for_cards(driver, self.wait_timeout)
+            numbers = list(page_buttons(driver)) + [active_page(driver)]
+        return min(max(numbers), max_pages)
+
+    def iter_data_from_pages(self, url, max_pages=20, workers=1, done=None):
+        """
+        Walk the listing pages in headless Chrome and yield the products of each page as it is scraped.
+
+        With more than one worker, the page range is split into contiguous slices
+        that are walked in parallel by separate drivers. Drivers hand over records
+        only, never page trees, and pages are yielded in page order: those of the
+        first slice while it is still being walked, those of a later slice once
+        every slice before it is done. Pages in done, restored from the run being
+        resumed, are yielded in their place instead of being scraped again; a
+        slice starts at its first page missing from done, and is skipped if it
+        has none.
+
+        Args:
+            url (str): The URL of the listing.
+            max_pages (int): The highest page number walked.
+            workers (int): The number of drivers.
+            done (dict, optional): The products of pages already scraped, keyed by page number.
+
+        Yields:
+            list: The ProductRecord objects of each page, in page order.
+
+        Returns:
+            bool: As the generator's return value, False if any driver stopped
+            before the end of its slice.
+        """
+        done = done or {}
+        complete = True
+        try:
+            page_count = self.count_pages(url, max_pages) if workers > 1 else max_pages
+        except Exception as e:
+            self.log(f'Error during page extraction: {str(e)}', ERROR)
+            page_count, workers, complete = max_pages, 0, False
+        shard_size = -(-page_count // max(min(workers, page_count), 1))
+        shards = [(first, min(first + shard_size - 1, page_count))
+                  for first in range(1, page_count + 1, shard_size)]
+        # The pagination bar may only show a window of page numbers, so the last
+        # driver keeps walking until it runs out of pages.
+        shards[-1] = (shards[-1][0], max_pages)
+        restored = [deque((page, done[page]) for page in range(first, last + 1) if page in done)
+                    for first, last in shards]
+        walks = [(index, next((page for page in range(first, last + 1) if page not in done), None), last)
+                 for index, (first, last) in enumerate(shards)] if workers else []
+        walks = [(index, first, last) for index, first, last in walks if first is not None]
+        self.log(f'Scraping {page_count} pages with {len(walks)} drivers: {[walk[1:] for walk in walks]}')
+
+        buffers = [deque() for _ in shards]
+        finished = [True] * len(shards)
+        results = queue.Queue()
+
+        def walk(index, first, last):
+            walked = False
+            try:
+                walked = self.scrape_page_range(url, first, last, lambda page, products:
+                                                results.put((index, page, products)), done)
+            finally:
+                results.put((index, None, walked))
+
+        with ThreadPoolExecutor(max_workers=max(len(walks), 1)) as executor:
+            for index, first, last in walks:
+                finished[index] = False
+                while restored[index] and restored[index][0][0] < first:
+                    buffers[index].append(restored[index].popleft())
+                executor.submit(walk, index, first, last)
+            current = 0
+            while current < len(shards):
+                if finished[current]:
+                    buffers[current].extend(restored[current])
+                    restored[current].clear()
+                while buffers[current]:
+                    yield buffers[current].popleft()[1]
+                if finished[current]:
+                    current += 1
+                    continue
+                index, page, products = results.get()
+                if page is None:
+                    finished[index] = True
+                    complete = complete and products
+                    continue
+                while restored[index] and restored[index][0][0] < page:
+                    buffers[index].append(restored[index].popleft())
+                buffers[index].append((page, products))
+        return complete
+
+    def extract_data_via_xhr(self, url):
+        """
+        Extract products from the AJAX listing without a browser.
+
+        Returns:
+            list: ProductRecord objects, one per product card. Empty if the replay
+            found nothing, in which case the caller should fall back to Selenium.
+        """
+        def extract_fragment(box):
+            self.metrics.add(pages=1)
+            return self.extract_products([box])
+
+        pool = self.parse_pool() if self.parse_workers else None
+
+        def parse_in_pool(response):
+            parsed = pool.xhr(response.text).result()
+            if parsed is None:
+                return None
+            products, messages = parsed
+            self.log_messages(messages)
+            self.metrics.add(pages=1)
+            return products
+
+        with self.metrics.stage('extract_data_via_xhr'):
+            self.log(f'Replaying AJAX requests for URL: {url}')
+            try:
+                products = replay_pages(url, extract_fragment, max_pages=self.max_pages,
+                                        max_workers=self.max_workers, session=self.session(),
+                                        limiter=self.limiter,
+                                        threaded_parse=parse_in_pool if pool else None,
+                                        log=self.log)
+            except Exception as e:
+                self.log(f'Error while replaying AJAX requests: {str(e)}', WARNING)
+                return []
+            self.log(f'Replayed AJAX requests returned {len(products)} products')
+            return products
+
+    def iter_products(self):
+        """
+        Yield the products of the listing, replayed in one list or walked in Chrome page by page.
+
+        Walked pages are yielded while the walk goes on, so their rows are
+        written out before the last page has been scraped. Pages in the
+        checkpoint of a resumed run are not walked again; they are yielded from
+        the checkpoint, in page order with the pages scraped now.
+        """
+        checkpoint = self.checkpoint
+        if self.replay_xhr:
+            products = self.extract_data_via_xhr(self.url)
+            if products:
+                if checkpoint is not None:
+                    checkpoint.finish()
+                yield products
+                return
+            self.log('AJAX replay found no products, falling back to Selenium', WARNING)
+        done = dict(checkpoint.pages) if checkpoint is not None else {}
+        # A resumed walk need not look for pages past the end seen by the run it continues.
+        max_pages = min(self.max_pages, checkpoint.last_page or self.max_pages) if checkpoint else self.max_pages
+        complete = yield from self.iter_data_from_pages(self.url, max_pages=max_pages,
+                                                        workers=self.driver_pool.size, done=done)
+        if complete and checkpoint is not None:
+            checkpoint.finish()
+
+
+test_sites = 'https://webscraper.io/test-sites/e-commerce'
+
+# The three test sites: adapter class and default settings.
+sites = {
+    'website1': (StaticSite, {
+        'url': f'{test_sites}/allinone/computers/laptops',
+        'root_url': f'{test_sites}/allinone',
+        'name': 'website1',
+        'log_name': 'web_scraper_log.txt',
+    }),
+    'website2': (PaginatedSite, {
+        'url': f'{test_sites}/static/computers/laptops',
+        'root_url': f'{test_sites}/static',
+        'name': 'website2',
+    }),
+    'website3': (AjaxSite, {
+        'url': f'{test_sites}/ajax/computers/laptops',
+        'name': 'website3',
+    }),
+}
+
+adapters = {
+    'static': StaticSite,
+    'paginated': PaginatedSite,
+    'ajax': AjaxSite,
+}
+
+
+def adapter_options(adapter):
+    """
+    Return the names of the settings an adapter class accepts.
+
+    Args:
+        adapter (type): A Site subclass.
+
+    Returns:
+        set: The keyword argument names of its __init__ and those of its base classes.
+    """
+    names = set()
+    for cls in adapter.__mro__:
+        init = cls.__dict__.get('__init__')
+        if init is not None and cls is not object:
+            names.update(name for name, parameter in inspect.signature(init).parameters.items()
+                         if name not in ('self', 'home_dir') and parameter.kind is parameter.POSITIONAL_OR_KEYWORD)
+    return names
+
+
+def create_site(site, home_dir, **options):
+    """
+    Build the adapter for a named test site or an adapter kind.
+
+    Args:
+        site (str): 'website1', 'website2' or 'website3' for the test sites
+            with their default URLs, or 'static', 'paginated' or 'ajax' for an
+            adapter, which then needs a url option.
+        home_dir (str): The folder for the log file and the data, cache and metrics folders.
+        **options: Settings passed to the adapter, overriding the defaults.
+
+    Returns:
+        Site: The adapter.
+
+    Raises:
+        ValueError: If the site is unknown, an adapter is given without a
+            url, or an option is not supported by the adapter.
+    """
+    if site in sites:
+        adapter, defaults = sites[site]
+        options = dict(defaults, **options)
+    elif site in adapters:
+        adapter = adapters[site]
+        if not options.get('url'):
+            raise ValueError(f'The {site} adapter needs a url')
+    else:
+        raise ValueError(f'Unknown site {site!r}; expected one of {", ".join(list(sites) + list(adapters))}')
+    unsupported = sorted(set(options) - adapter_options(adapter))
+    if unsupported:
+        raise ValueError(f'{site} does not support: {", ".join(unsupported)}')
+    return adapter(home_dir, **options)
@@ -0,0 +1,340 @@
+"""
+SQLite snapshot store with indexed price history.
+
+Every run writes a new timestamped CSV, so following one product over time
+means loading every file. SnapshotStore keeps all runs in one SQLite
+database instead: a ``runs`` table with one row per run, and a ``snapshots``
+table with one typed row per product per run, keyed by (product_id, run_id)
+and indexed on (product_id, run_ts). A product's history is then an index
+lookup however many runs have been stored.
+
+StreamingSQLiteWriter has the interface of the other streaming writers in
+webscrape/output.py and upserts each run's rows in batched transactions.
+Existing CSV files can be loaded with SnapshotStore.import_csv().
+"""
+import csv
+import os
+import re
+import sqlite3
+
+from webscrape.records import ProductRecord, column_fields
+from webscrape.typed import typed_value
+
+batch_size = 1000
+
+RUNNING = 'running'
+COMPLETE = 'complete'
+ABORTED = 'aborted'
+
+# Snapshot columns in insert order: the record fields, with SQLite types.
+field_types = {
+    'product_id': 'TEXT NOT NULL',
+    'category': 'TEXT',
+    'name': 'TEXT',
+    'price': 'REAL',
+    'description': 'TEXT',
+    'rating': 'INTEGER',
+    'reviews': 'INTEGER',
+    'url': 'TEXT',
+    'full_name': 'TEXT',
+    'variants': 'TEXT',
+    'specs': 'TEXT',
+}
+_field_columns = {field: column for column, field in column_fields.items()}
+
+_schema = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    run_ts TEXT NOT NULL,
+    status TEXT NOT NULL,
+    rows INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_site_ts ON runs (site, run_ts);
+CREATE TABLE IF NOT EXISTS snapshots (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    run_ts TEXT NOT NULL,
+    {', '.join(f'{field} {sql_type}' for field, sql_type in field_types.items())},
+    PRIMARY KEY (product_id, run_id)
+);
+CREATE INDEX IF NOT EXISTS snapshots_product_ts ON snapshots (product_id, run_ts);
+"""
+
+_upsert = (f"INSERT INTO snapshots (run_id, run_ts, {', '.join(field_types)}) "
+           f"VALUES ({', '.join('?' * (len(field_types) + 2))}) "
+           f"ON CONFLICT (product_id, run_id) DO UPDATE SET "
+           f"{', '.join(f'{field} = excluded.{field}' for field in field_types if field != 'product_id')}")
+
+_csv_time = re.compile(r'(\d{4}-\d{2}-\d{2}[ _]\d{2}[:-]\d{2}[:-]\d{2})')
+
+
+class SnapshotStore:
+    """
+    A SQLite database of product snapshots, one set of rows per run.
+
+    Args:
+        path (str): The database file. Created, with its folder, on first use.
+        timeout (float): Seconds to wait while another process, such as
+            another worker of a distributed run, is writing.
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=timeout)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_schema)
+
+    def start_run(self, site, run_ts):
+        """
+        Record the start of a run.
+
+        A run of the same site and timestamp that did not complete, such as
+        one being resumed from its checkpoint, is reopened instead, so its
+        rows are replaced rather than stored twice.
+
+        Args:
+            site (str): The site name.
+            run_ts (str): The run timestamp, as in the data file names.
+
+        Returns:
+            int: The run id.
+        """
+        with self.conn:
+            row = self.conn.execute('SELECT run_id FROM runs WHERE site = ? AND run_ts = ? AND status != ?',
+                                    (site, run_ts, COMPLETE)).fetchone()
+            if row is not None:
+                self.conn.execute('UPDATE runs SET status = ? WHERE run_id = ?', (RUNNING, row[0]))
+                return row[0]
+            cursor = self.conn.execute('INSERT INTO runs (site, run_ts, status) VALUES (?, ?, ?)',
+                                       (site, run_ts, RUNNING))
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, status=COMPLETE):
+        """
+        Record the end of a run and the number of products stored for it.
+        """
+        with self.conn:
+            self.conn.execute('UPDATE runs SET status = ?, rows = (SELECT COUNT(*) FROM snapshots WHERE run_id = ?) '
+                              'WHERE run_id = ?', (status, run_id, run_id))
+
+    def upsert(self, run_id, run_ts, records):
+        """
+        Insert or replace the rows of one run in a single transaction.
+
+        A product seen twice in the same run, such as one listed under two
+        categories, keeps the values from its last row.
+
+        Args:
+            run_id (int): The run id from start_run().
+            run_ts (str): The run timestamp.
+            records (list): ProductRecord objects.
+
+        Returns:
+            int: The number of rows written.
+        """
+        rows = [(run_id, run_ts) + tuple(
+                    record.key() if field == 'product_id'
+                    else typed_value(_field_columns[field], getattr(record, field))
+                    for field in field_types)
+                for record in records]
+        with self.conn:
+            self.conn.executemany(_upsert, rows)
+        return len(rows)
+
+    def price_history(self, product_id, site=None):
+        """
+        Return the price of a product in every stored run, oldest first.
+
+        Args:
+            product_id (str): The product id.
+            site (str, optional): Only runs of this site.
+
+        Returns:
+            list: (run_ts, price) tuples. The price is None where it could not be parsed.
+        """
+        query = 'SELECT s.run_ts, s.price FROM snapshots s'
+        params = [str(product_id)]
+        if site is None:
+            query += ' WHERE s.product_id = ?'
+        else:
+            query += ' JOIN runs r ON r.run_id = s.run_id WHERE s.product_id = ? AND r.site = ?'
+            params.append(site)
+        return self.conn.execute(query + ' ORDER BY s.run_ts', params).fetchall()
+
+    def runs(self, site=None):
+        """
+        Return the stored runs, oldest first.
+
+        Returns:
+            list: (run_id, site, run_ts, status, rows) tuples.
+        """
+        query = 'SELECT run_id, site, run_ts, status, rows FROM runs'
+        params = []
+        if site is not None:
+            query += ' WHERE site = ?'
+            params.append(site)
+        return self.conn.execute(query + ' ORDER BY run_ts', params).fetchall()
+
+    def known_ids(self, site):
+        """
+        Return the product ids stored for a site, keyed by product name and description.
+
+        Names and descriptions shared by more than one product id are left
+        out, since they do not tell the products apart.
+
+        Args:
+            site (str): The site name.
+
+        Returns:
+            dict: Product ids keyed by (name, description) tuples.
+        """
+        ids = {}
+        rows = self.conn.execute("SELECT DISTINCT s.name, s.description, s.product_id FROM snapshots s "
+                                 "JOIN runs r ON r.run_id = s.run_id "
+                                 "WHERE r.site = ? AND s.product_id != s.name || '|' || s.description", (site,))
+        for name, description, product_id in rows:
+            ids.setdefault((name, description), set()).add(product_id)
+        return {key: product_ids.pop() for key, product_ids in ids.items() if len(product_ids) == 1}
+
+    def import_csv(self, filename, site, run_ts=None):
+        """
+        Load a data file written by an earlier run as a run of its own.
+
+        Args:
+            filename (str): A CSV file such as 'data/data_2024-11-02 10:15:00.csv'.
+            site (str): The site name to record the run under.
+            run_ts (str, optional): The run timestamp. Taken from the file
+                name when not given.
+
+        Files written before records carried the product URL have no
+        'Product ID' or 'Product URL' column. Their rows take the id of the
+        product already stored for the site under the same name and
+        description, so import them after at least one run with ids has been
+        stored. Rows that match no stored product, or several, are keyed by
+        name and description, as ProductRecord.key() does for cards without
+        a link.
+
+        Returns:
+            int: The number of CSV rows read. Rows repeating a product id are
+            merged, as in upsert().
+
+        Raises:
+            ValueError: If run_ts is not given and the file name holds no timestamp.
+        """
+        if run_ts is None:
+            match = _csv_time.search(os.path.basename(filename))
+            if match is None:
+                raise ValueError(f'No run timestamp in file name {filename!r}; pass run_ts')
+            day, time_of_day = match.group(1)[:10], match.group(1)[11:]
+            run_ts = f'{day} {time_of_day.replace("-", ":")}'
+        known_ids = self.known_ids(site)
+        run_id = self.start_run(site, run_ts)
+        rows = 0
+        with open(filename, newline='', encoding='utf-8') as f:
+            batch = []
+            for row in csv.DictReader(f):
+                record = ProductRecord.from_dict(row)
+                if not record.product_id:
+                    record.product_id = known_ids.get((record.name, record.description), '')
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    rows += self.upsert(run_id, run_ts, batch)
+                    batch = []
+            rows += self.upsert(run_id, run_ts, batch)
+        self.finish_run(run_id)
+        return rows
+
+    def close(self):
+        self.conn.close()
+
+
+class StreamingSQLiteWriter:
+    """
+    Upsert product records into a SnapshotStore as one run.
+
+    Records are buffered and written batch_size at a time, one transaction
+    per batch. close() writes the rest and marks the run complete; abort()
+    writes the rest and marks it aborted, so a crashed run keeps the rows
+    it had extracted.
+
+    Args:
+        path (str): The database file.
+        site (str): The site name recorded with the run.
+        run_ts (str): The run timestamp.
+        batch_size (int): Rows buffered before a transaction is committed.
+    """
+
+    def __init__(self, path, site, run_ts, batch_size=batch_size):
+        self.path = path
+        self.site = site
+        self.run_ts = run_ts
+        self.batch_size = batch_size
+        self.rows = 0
+        self.run_id = None
+        self._store = None
+        self._buffer = []
+
+    def open(self):
+        """
+        Open the database and record the start of the run.
+        """
+        self._store = SnapshotStore(self.path)
+        self.run_id = self._store.start_run(self.site, self.run_ts)
+        return self
+
+    def write_rows(self, records):
+        """
+        Buffer records, committing a batch once enough are waiting.
+
+        Args:
+            records (list): ProductRecord objects.
+
+        Returns:
+            int: The number of rows accepted by this call.
+        """
+        if self._store is None:
+            self.open()
+        self._buffer.extend(records)
+        self.rows += len(records)
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+        return len(records)
+
+    def _flush(self):
+        if self._buffer:
+            self._store.upsert(self.run_id, self.run_ts, self._buffer)
+            self._buffer = []
+
+    def _finish(self, status):
+        self._flush()
+        self._store.finish_run(self.run_id, status)
+        self._store.close()
+        self._store = None
+
+    def close(self):
+        """
+        Write the remaining rows and mark the run complete.
+        """
+        if self._store is None:
+            self.open()
+        self._finish(COMPLETE)
+
+    def abort(self):
+        """
+        Write the remaining rows and mark the run aborted.
+        """
+        if self._store is not None:
+            self._finish(ABORTED)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
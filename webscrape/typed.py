@@ -0,0 +1,109 @@
+"""
+Typed columns for product data.
+
+Scraped values arrive as text: prices such as "$295.99", ratings and review
+counts as digit strings. to_typed() converts a product DataFrame in one
+vectorized pass so columnar outputs store real numbers, and arrow_schema()
+gives the matching Arrow schema. typed_value() applies the same conversion
+to a single value, for row-by-row stores. pandas and pyarrow are imported on
+first use.
+"""
+import re
+
+price_column = 'Product Price'
+rating_column = 'Rating'
+reviews_column = 'Reviews'
+
+# pandas nullable dtypes, so a missing value does not turn a column into floats.
+numeric_dtypes = {
+    price_column: 'float64',
+    rating_column: 'Int8',
+    reviews_column: 'Int32',
+}
+
+
+_not_price = re.compile(r'[^0-9.]')
+
+
+def typed_value(column, value):
+    """
+    Convert one text value of a product column, as to_typed() does for a whole column.
+
+    Args:
+        column (str): The column name.
+        value (str): The scraped value.
+
+    Returns:
+        float, int, str or None: The price as a float and the rating and
+        review count as ints; None if a numeric value cannot be parsed. Other
+        columns are returned unchanged.
+    """
+    if column not in numeric_dtypes:
+        return value
+    if column == price_column:
+        value = _not_price.sub('', str(value))
+    try:
+        return float(value) if numeric_dtypes[column] == 'float64' else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_typed(df):
+    """
+    Convert the text columns of a product DataFrame to typed columns.
+
+    Prices lose their currency symbol and thousands separators and become
+    float64; ratings become Int8 and review counts Int32. Values that cannot
+    be parsed become missing. Every other column becomes a string column.
+
+    Args:
+        df (pandas.DataFrame): A DataFrame as built by join().
+
+    Returns:
+        pandas.DataFrame: A new DataFrame with the same columns, typed.
+    """
+    import pandas as pd
+
+    typed = {}
+    for column in df.columns:
+        values = df[column]
+        if column == price_column:
+            values = values.astype('string').str.replace(r'[^0-9.]', '', regex=True)
+        if column in numeric_dtypes:
+            typed[column] = pd.to_numeric(values, errors='coerce').astype(numeric_dtypes[column])
+        else:
+            typed[column] = values.astype('string')
+    return pd.DataFrame(typed, columns=df.columns)
+
+
+def arrow_schema(columns):
+    """
+    Return the Arrow schema matching to_typed() for the given columns.
+
+    Args:
+        columns (list): The column names, in order.
+
+    Returns:
+        pyarrow.Schema: float64 price, int8 rating, int32 reviews and
+        string for every other column.
+    """
+    import pyarrow as pa
+
+    types = {price_column: pa.float64(), rating_column: pa.int8(), reviews_column: pa.int32()}
+    return pa.schema([(column, types.get(column, pa.string())) for column in columns])
+
+
+def write_parquet(df, filename, compression='zstd'):
+    """
+    Write a product DataFrame to a typed, compressed Parquet file.
+
+    Args:
+        df (pandas.DataFrame): A DataFrame as built by join().
+        filename (str): The Parquet path.
+        compression (str): The Parquet codec. Defaults to 'zstd'.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(to_typed(df), schema=arrow_schema(list(df.columns)), preserve_index=False)
+    pq.write_table(table, filename, compression=compression)
@@ -0,0 +1,350 @@
+"""
+Work queues shared by a distributed run's coordinator and workers.
+
+A distributed run is a job: the coordinator splits the catalogue into
+tasks, each a range of pages of one category listing, and puts them on a
+WorkQueue. Workers, on as many machines as needed, claim tasks under a
+lease. A claimed task belongs to its worker until the lease runs out, and
+the worker keeps extending the lease while it is busy. A worker that dies
+stops extending it, so once the lease has expired another worker claims
+the task again. A task that has been tried max_attempts times is given up.
+
+Backends are registered by URL scheme with register_queue() and opened with
+open_queue(). The ``sqlite`` backend keeps the queue in one SQLite file. It
+serves workers on one machine, and machines that share a filesystem with
+working file locks; a server-backed queue implements the same WorkQueue
+methods. Leases compare wall-clock times, so the clocks of the machines
+must be kept in sync.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+max_attempts = 3
+
+queue_backends = {}
+
+
+def register_queue(scheme):
+    """
+    Register a WorkQueue backend under a URL scheme.
+
+    Args:
+        scheme (str): The scheme the backend is opened by, as in 'sqlite:///shared/queue.sqlite'.
+
+    Returns:
+        callable: A decorator that registers the class it wraps.
+    """
+    def decorator(cls):
+        queue_backends[scheme] = cls
+        return cls
+    return decorator
+
+
+def open_queue(spec, **options):
+    """
+    Open a work queue from a URL such as 'sqlite:///shared/queue.sqlite'.
+
+    The backend is given everything after '://': an absolute path for
+    'sqlite:///shared/queue.sqlite', a relative one for 'sqlite://queue.sqlite'.
+    A plain file path opens the sqlite backend.
+
+    Args:
+        spec (str): The queue URL.
+        **options: Passed to the backend.
+
+    Returns:
+        WorkQueue: The queue.
+
+    Raises:
+        ValueError: If no backend is registered for the scheme.
+    """
+    scheme, separator, location = spec.partition('://')
+    if not separator:
+        scheme, location = 'sqlite', spec
+    try:
+        backend = queue_backends[scheme]
+    except KeyError:
+        raise ValueError(f'Unknown work queue scheme {scheme!r}; choose from {sorted(queue_backends)}')
+    return backend(location, **options)
+
+
+class Task:
+    """
+    A range of pages of one category listing, to be scraped by one worker.
+
+    Args:
+        job_id (int): The job the task belongs to.
+        category (str): The category path the products are stored under.
+        url (str): The listing URL.
+        first_page (int): The first page of the range.
+        last_page (int): The last page of the range.
+        tail (bool): Whether the range ends the listing as far as the
+            coordinator could tell. A worker that finds the last page of a
+            tail range full queues the next range.
+    """
+
+    __slots__ = ('task_id', 'job_id', 'category', 'url', 'first_page', 'last_page', 'tail', 'attempts',
+                 'worker', 'lease_until')
+
+    def __init__(self, job_id, category, url, first_page=1, last_page=1, tail=False, task_id=None, attempts=0,
+                 worker=None, lease_until=None):
+        self.task_id = task_id
+        self.job_id = job_id
+        self.category = category
+        self.url = url
+        self.first_page = first_page
+        self.last_page = last_page
+        self.tail = tail
+        self.attempts = attempts
+        self.worker = worker
+        self.lease_until = lease_until
+
+    def __repr__(self):
+        return f'Task({self.task_id}: {self.url} pages {self.first_page}-{self.last_page})'
+
+
+class WorkQueue:
+    """
+    The operations a work queue backend provides.
+
+    Every method must be safe to call from several processes at once; claim()
+    in particular must never hand the same task to two workers while its
+    lease runs.
+    """
+
+    def create_job(self, site, settings):
+        """
+        Record a new job.
+
+        Args:
+            site (str): The site name.
+            settings (dict): JSON-serialisable settings the workers run the job with.
+
+        Returns:
+            int: The job id.
+        """
+        raise NotImplementedError
+
+    def job(self, job_id):
+        """
+        Return a job as a dictionary with 'job_id', 'site', 'settings' and 'status', or None.
+        """
+        raise NotImplementedError
+
+    def put(self, tasks):
+        """
+        Queue tasks.
+
+        Args:
+            tasks (list): Task objects.
+        """
+        raise NotImplementedError
+
+    def claim(self, worker, lease):
+        """
+        Claim the oldest queued task, or one whose lease has expired.
+
+        Args:
+            worker (str): The id of the claiming worker.
+            lease (float): Seconds the task belongs to the worker.
+
+        Returns:
+            Task or None: The task, or None if there is nothing to claim.
+        """
+        raise NotImplementedError
+
+    def extend(self, task, lease):
+        """
+        Extend the lease of a claimed task.
+
+        Returns:
+            bool: False if the task is no longer held by its worker.
+        """
+        raise NotImplementedError
+
+    def complete(self, task, rows):
+        """
+        Mark a claimed task done with the number of rows it produced.
+
+        Returns:
+            bool: False if the task is no longer held by its worker.
+        """
+        raise NotImplementedError
+
+    def fail(self, task, error):
+        """
+        Give a claimed task back after an error, or give it up after max_attempts tries.
+        """
+        raise NotImplementedError
+
+    def counts(self, job_id):
+        """
+        Return the number of tasks of a job in each state.
+        """
+        raise NotImplementedError
+
+    def pending(self):
+        """
+        Return the number of tasks, of any job, still queued or running.
+        """
+        raise NotImplementedError
+
+    def finish_job(self, job_id, status):
+        """
+        Mark a job finished once it has no queued or running tasks.
+
+        Returns:
+            bool: True for the one caller that finished the job.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+_schema = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id INTEGER PRIMARY KEY,
+    job_id INTEGER NOT NULL REFERENCES jobs (job_id),
+    category TEXT NOT NULL,
+    url TEXT NOT NULL,
+    first_page INTEGER NOT NULL,
+    last_page INTEGER NOT NULL,
+    tail INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    rows INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, task_id);
+CREATE INDEX IF NOT EXISTS tasks_job ON tasks (job_id, state);
+"""
+
+_task_columns = 'task_id, job_id, category, url, first_page, last_page, tail, attempts, worker, lease_until'
+
+
+@register_queue('sqlite')
+class SQLiteWorkQueue(WorkQueue):
+    """
+    A work queue in one SQLite file.
+
+    Claims run in an immediate transaction, which takes the database's write
+    lock first, so two processes cannot claim the same task.
+
+    Args:
+        path (str): The database file. Created, with its folder, on first use.
+        max_attempts (int): Tries before a task is given up.
+        timeout (float): Seconds to wait for another process's transaction.
+    """
+
+    def __init__(self, path, max_attempts=max_attempts, timeout=30):
+        self.path = path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # The worker's lease heartbeat runs on its own thread.
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_schema)
+        self._lock = threading.Lock()
+
+    def _transaction(self, work):
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = work(self.conn)
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            return result
+
+    def create_job(self, site, settings):
+        return self._transaction(lambda conn: conn.execute(
+            'INSERT INTO jobs (site, settings, status, created) VALUES (?, ?, ?, ?)',
+            (site, json.dumps(settings), RUNNING, time.time())).lastrowid)
+
+    def job(self, job_id):
+        with self._lock:
+            row = self.conn.execute('SELECT job_id, site, settings, status FROM jobs WHERE job_id = ?',
+                                    (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {'job_id': row[0], 'site': row[1], 'settings': json.loads(row[2]), 'status': row[3]}
+
+    def put(self, tasks):
+        rows = [(task.job_id, task.category, task.url, task.first_page, task.last_page, int(task.tail), QUEUED)
+                for task in tasks]
+        self._transaction(lambda conn: conn.executemany(
+            'INSERT INTO tasks (job_id, category, url, first_page, last_page, tail, state) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', rows))
+
+    def claim(self, worker, lease):
+        def claim(conn):
+            now = time.time()
+            # A task whose lease ran out on its last try took its workers down with it.
+            conn.execute('UPDATE tasks SET state = ?, error = ? WHERE state = ? AND lease_until < ? AND attempts >= ?',
+                         (FAILED, 'lease expired', RUNNING, now, self.max_attempts))
+            row = conn.execute(f'SELECT {_task_columns} FROM tasks WHERE state = ? OR (state = ? AND lease_until < ?) '
+                               f'ORDER BY task_id LIMIT 1', (QUEUED, RUNNING, now)).fetchone()
+            if row is None:
+                return None
+            task = Task(*row[1:7], task_id=row[0], attempts=row[7] + 1, worker=worker, lease_until=now + lease)
+            task.tail = bool(task.tail)
+            conn.execute('UPDATE tasks SET state = ?, worker = ?, lease_until = ?, attempts = ? WHERE task_id = ?',
+                         (RUNNING, worker, task.lease_until, task.attempts, task.task_id))
+            return task
+        return self._transaction(claim)
+
+    def _update_held(self, task, assignments, values):
+        return self._transaction(lambda conn: conn.execute(
+            f'UPDATE tasks SET {assignments} WHERE task_id = ? AND worker = ? AND state = ?',
+            values + (task.task_id, task.worker, RUNNING)).rowcount == 1)
+
+    def extend(self, task, lease):
+        task.lease_until = time.time() + lease
+        return self._update_held(task, 'lease_until = ?', (task.lease_until,))
+
+    def complete(self, task, rows):
+        return self._update_held(task, 'state = ?, rows = ?, error = NULL', (DONE, rows))
+
+    def fail(self, task, error):
+        state = FAILED if task.attempts >= self.max_attempts else QUEUED
+        return self._update_held(task, 'state = ?, error = ?, lease_until = NULL', (state, str(error)))
+
+    def counts(self, job_id):
+        with self._lock:
+            counts = dict(self.conn.execute('SELECT state, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY state',
+                                            (job_id,)).fetchall())
+        return {state: counts.get(state, 0) for state in (QUEUED, RUNNING, DONE, FAILED)}
+
+    def pending(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM tasks WHERE state IN (?, ?)',
+                                     (QUEUED, RUNNING)).fetchone()[0]
+
+    def finish_job(self, job_id, status):
+        return self._transaction(lambda conn: conn.execute(
+            'UPDATE jobs SET status = ? WHERE job_id = ? AND status = ? AND NOT EXISTS '
+            '(SELECT 1 FROM tasks WHERE job_id = ? AND state IN (?, ?))',
+            (status, job_id, RUNNING, job_id, QUEUED, RUNNING)).rowcount == 1)
+
+    def close(self):
+        self.conn.close()
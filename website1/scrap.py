@@ -1,258 +1,55 @@
 #%%
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-import time
-import pandas as pd
-import re 
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from webscrape.logger import INFO
+from webscrape.sites import create_site
 
 
 #%%
 # Constants for the website to scrape and logging
-log_file = "/Users/user/Documents/Webscraping Project/website1/web_scraper_log.txt"
-time_format = '%Y-%m-%d %H:%M:%S'
+# The log file, data/, cache/ and metrics/ folders live under website1/ in home_dir: the project
+# folder, or the folder named by the WEBSCRAPE_HOME environment variable.
+home_dir = os.environ.get('WEBSCRAPE_HOME', os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+log_level = INFO  # set to DEBUG to log every extracted product
 url = 'https://webscraper.io/test-sites/e-commerce/allinone/computers/laptops'
-max_retries = 3
-retry_delay = 5  # seconds
-time_format = '%Y-%m-%d %H:%M:%S'
-now = datetime.now()
-time_str = now.strftime(time_format)
-filename = f'/Users/user/Documents/Webscraping Project/website1/data/data_{time_str}.csv'
-
-#%%
-# Clear previous log content
-with open(log_file, 'w') as f:
-    f.write(f'{time_str} - Log cleared\n')
-
-def log_message(message):
-    """
-    Log a message to a file with a timestamp.
-
-    Args:
-        message (str): The message to be logged.
-    """
-    with open(log_file, 'a') as f:
-        f.write(f'{time_str} - {message}\n')
-#%%
-def extract(url):
-    """
-    Attempts to fetch and extract data from a given URL with retry mechanism.
-
-    This function tries to connect to the specified URL, fetch the HTML content,
-    and extract a specific div element. It includes error handling and a retry
-    mechanism for failed attempts.
-
-    Args:
-        url (str): The URL to fetch data from.
-
-    Returns:
-        BeautifulSoup object or None: Returns a BeautifulSoup object containing
-        the extracted div element if successful, or None if all attempts fail.
-
-    Raises:
-        No exceptions are raised as they are caught and logged internally.
-    """
-    log_message(f'Starting data fetch from URL: {url}')
-    retries = 0
-
-    while retries < max_retries:
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                log_message(f'{time_str} - Successfully connected to URL: {url}')
-                soup = BeautifulSoup(response.text, 'lxml')
-                box = soup.find('div', class_='col-lg-9')
-                return box
-            else:
-                retries += 1
-                log_message(f'{time_str} - Failed to connect to URL {url} - Status Code: {response.status_code} (Attempt {retries} of {max_retries})')
-                if retries < max_retries:
-                    log_message(f'{time_str} - Retrying in {retry_delay} seconds...')
-                    time.sleep(retry_delay)
-        except Exception as e:
-            retries += 1
-            log_message(f'{time_str} - Error while fetching URL {url}: {str(e)} (Attempt {retries} of {max_retries})')
-            if retries < max_retries:
-                log_message(f'{time_str} - Retrying in {retry_delay} seconds...')
-                time.sleep(retry_delay)
-
-    log_message(f'{time_str} - All attempts to fetch URL {url} failed after {max_retries} retries.')
-    return None
-#%%
-def extract_product_names(box):
-    """
-    Extracts product names from a BeautifulSoup object containing HTML elements.
-
-    This function searches for all 'a' tags with class 'title' within the given
-    BeautifulSoup object, extracts the text content of each tag, and logs each
-    product name found.
-
-    Args:
-        box (BeautifulSoup): A BeautifulSoup object containing HTML elements
-                             from which to extract product names.
-
-    Returns:
-        list: A list of strings, where each string is a product name extracted
-              from the HTML.
-
-    """
-    log_message(f'{time_str} - Extracting product names from div element')
-    product_names = []
-    items = box.find_all('a', class_='title')
-    for item in items:
-        product_names.append(item.text.strip())
-        log_message(f'{time_str} - Product name: {item.text.strip()}')
-    return product_names
-#%%
-def extract_product_prices(box):
-    """
-    Extracts product prices from a BeautifulSoup object containing HTML elements.
-
-    This function searches for all 'h4' tags with specific classes within the given
-    BeautifulSoup object, extracts the text content of each tag (which represents
-    the price), and logs each price found.
+max_retries = 3  # retries after a failed request or a 429/5xx reply
+retry_delay = 1  # seconds; backoff ceiling for the first retry, doubled for each further one
+rate_limit = 10.0  # requests per second per host, halved on 429/503 replies
+output_format = 'csv'  # 'csv', 'parquet' (typed, zstd-compressed; needs pyarrow) or 'both'
+pool_size = 10  # keep-alive connections per host
+max_workers = 8  # listing pages fetched at the same time by a crawl_all crawl
+parse_backend = 'strainer'  # 'full', 'strainer' or 'lxml'; see webscrape/parse.py
+use_cache = True  # revalidate pages against the on-disk HTTP cache
+crawl_all = False  # crawl every category under root_url instead of url
+resume = False  # continue the last crawl_all crawl that stopped part-way from data/checkpoint.jsonl
+root_url = 'https://webscraper.io/test-sites/e-commerce/allinone'
+incremental = False  # only parse changed pages and write a delta file
+write_snapshot = True  # in incremental mode, also write the full CSV
+enrich_details = False  # follow each product link for the full name, variants and specs
+sqlite_store = False  # also upsert every run into data/snapshots.sqlite for price history
+detail_workers = 16  # product pages fetched at the same time when enriching
+parse_workers = 0  # processes parsing pages in parallel; 0 parses in the main process
 
-    Args:
-        box (BeautifulSoup): A BeautifulSoup object containing HTML elements
-                             from which to extract product prices.
-
-    Returns:
-        list: A list of strings, where each string is a product price extracted
-              from the HTML. The prices are stripped of leading and trailing whitespace.
-    """
-    log_message(f'{time_str} - Extracting product prices from div element')
-    product_prices = []
-    prices = box.find_all('h4', class_='price float-end card-title pull-right')
-    for price in prices:
-        product_prices.append(price.text.strip())
-        log_message(f'{time_str} - Product price: {price.text.strip()}')
-    return product_prices
 #%%
-def extract_product_descriptions(box):
-    """
-    Extracts product descriptions from a BeautifulSoup object containing HTML elements.
-
-    This function searches for all 'p' tags with class 'description card-text' within the given
-    BeautifulSoup object, extracts the text content of each tag, and logs each
-    product description found.
-
-    Args:
-        box (BeautifulSoup): A BeautifulSoup object containing HTML elements
-                             from which to extract product descriptions.
-
-    Returns:
-        list: A list of strings, where each string is a product description extracted
-              from the HTML. The descriptions are stripped of leading and trailing whitespace.
-    """
-    log_message(f'{time_str} - Extracting product descriptions from div element')
-    product_descriptions = []
-    descriptions = box.find_all('p', class_='description card-text')
-    for description in descriptions:
-        product_descriptions.append(description.text.strip())
-        log_message(f'{time_str} - Product description: {description.text.strip()}')
-    return product_descriptions
-#%%
-def extract_ratings(box):
-    """
-    Extracts the rating from a BeautifulSoup object containing HTML elements.
-
-    This function searches for a 'div' element with class 'ratings' within the given
-    BeautifulSoup object, then looks for a 'p' element with a 'data-rating' attribute.
-    If found, it extracts and returns the rating value.
-
-    Args:
-        box (BeautifulSoup): A BeautifulSoup object containing HTML elements
-                             from which to extract the rating.
-
-    Returns:
-        str or None: The rating value as a string if found, or None if not found.
-    """
-    log_message(f'{time_str} - Extracting ratings from products')
-    ratings = []
-    rating_elements = box.find_all('p', {'data-rating': True})
-    
-    for rating_element in rating_elements:
-        rating = rating_element.get('data-rating')
-        ratings.append(rating)
-        log_message(f'{time_str} - Product rating: {rating}')
-    
-    return ratings
-           
-#%%    
-def extract_reviews(box):
+def main():
     """
-    Extracts the rating from a BeautifulSoup object containing HTML elements.
-
-    This function searches for a 'div' element with class 'ratings' within the given
-    BeautifulSoup object, then looks for a 'p' element with a 'data-rating' attribute.
-    If found, it extracts and returns the rating value.
+    Scrapes the allinone laptops listing with the settings above.
 
-    Args:
-        box (BeautifulSoup): A BeautifulSoup object containing HTML elements
-                             from which to extract the rating.
+    The scraping itself lives in webscrape.sites.StaticSite; the same run is
+    available from the command line as `webscrape website1`.
 
     Returns:
-        str or None: The rating value as a string if found, or None if not found.
-    """
-    log_message(f'{time_str} - Extracting reviews from products')
-    reviews = []
-    review_elements = box.find_all('p', class_='review-count float-end')
-    
-    for review_element in review_elements:
-        review_count = ''.join(filter(str.isdigit, review_element.text.strip()))
-        reviews.append(review_count)
-        log_message(f'{time_str} - Product reviews: {review_count}')
-    
-    return reviews
-        
-#%%    
-def join(product_names, product_prices, product_descriptions, ratings, reviews):
-    log_message(f'{time_str} - Creating a DataFrame from extracted data')
-    df = pd.DataFrame({
-        'Product Name': product_names,
-        'Product Price': product_prices,
-        'Product Description': product_descriptions,
-        'Rating': ratings,
-        'Reviews': reviews
-    })
-    log_message(f'{time_str} - DataFrame created')
-    return df
-#%%
-def load_to_csv(df, filename):
-    log_message(f'{time_str} - Saving DataFrame to CSV file: {filename}')
-    # with pd.ExcelWriter(filename, mode='w') as writer:
-    #     df.to_excel(writer, index=False, sheet_name='Products')
-    df.to_csv(filename, index=False)
-    log_message(f'{time_str} - DataFrame saved to csv file: {filename}')
-    
-#%%
-def main():
-    try:
-        box = extract(url)
-        if box:
-            product_names = extract_product_names(box)
-            product_prices = extract_product_prices(box)
-            product_descriptions = extract_product_descriptions(box)
-            ratings = extract_ratings(box)
-            reviews = extract_reviews(box)
-
-            # Verify all lists have the same length
-            if len(product_names) == len(product_prices) == len(product_descriptions) == len(ratings) == len(reviews):
-                df = join(product_names, product_prices, product_descriptions, ratings, reviews)
-                load_to_csv(df, filename)
-                log_message(f'{time_str} - Data fetching and processing completed successfully')
-            else:
-                log_message(f'{time_str} - Error: Mismatched number of elements extracted')
-                log_message(f'Products: {len(product_names)}, Prices: {len(product_prices)}, ' 
-                          f'Descriptions: {len(product_descriptions)}, Ratings: {len(ratings)}, '
-                          f'Reviews: {len(reviews)}')
-        else:
-            log_message(f'{time_str} - Failed to fetch data from URL: {url}')
-        log_message(f'{time_str} - Program completed and terminated')
-    except Exception as e:
-        log_message(f'{time_str} - An error occurred: {str(e)}')
-        log_message(f'{time_str} - Program terminated')
-        raise e
+        int: The number of products written.
+    """
+    site = create_site('website1', os.path.join(home_dir, 'website1'), url=url, root_url=root_url,
+                       log_level=log_level, output_format=output_format, parse_backend=parse_backend,
+                       use_cache=use_cache, pool_size=pool_size, max_workers=max_workers, max_retries=max_retries,
+                       retry_delay=retry_delay, rate=rate_limit, resume=resume, crawl_all=crawl_all,
+                       incremental=incremental, write_snapshot=write_snapshot, enrich_details=enrich_details,
+                       detail_workers=detail_workers, sqlite_store=sqlite_store, parse_workers=parse_workers)
+    return site.run()
 
 
 if __name__ == "__main__":